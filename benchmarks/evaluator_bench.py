@@ -0,0 +1,147 @@
+"""
+Expression evaluator microbenchmark
+
+Usage:
+    python benchmarks/evaluator_bench.py [--min-time 0.2] [--output evaluator-results.json]
+
+Measures evaluations per second through NaturalLanguageEvaluator.evaluate for
+the case tables in modules/evaluator/tester.py, then how throughput scales
+with expression length, bracket nesting depth and variables in scope.
+Plain dict scopes are used, so the expression cache is bypassed and every
+evaluation takes the full parsing path.
+"""
+
+import json
+import os
+import platform
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from modules.evaluator.main import NaturalLanguageEvaluator
+from modules.evaluator import tester
+
+CATEGORIES = {
+    "arithmetic": (tester.ARITHMETIC_CASES, tester.VARIABLES),
+    "comparison": (tester.COMPARISON_CASES, tester.VARIABLES),
+    "logic": (tester.LOGICAL_CASES, tester.VARIABLES),
+    "brackets": (tester.BRACKET_CASES, tester.VARIABLES),
+    "concatenation": (tester.CONCATENATION_CASES, tester.STRING_VARIABLES),
+    "between": (tester.BETWEEN_CASES, tester.VARIABLES),
+}
+
+LENGTHS = [1, 2, 4, 8, 16]
+DEPTHS = [1, 2, 4, 8, 16]
+SCOPE_SIZES = [10, 100, 1000]
+
+
+def evals_per_second(evaluator, expressions, variables, min_time):
+    """Evaluate the expressions round-robin for at least min_time seconds"""
+    evaluate = evaluator.evaluate
+    count = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_time:
+        for expression in expressions:
+            evaluate(expression, variables)
+        count += len(expressions)
+        elapsed = time.perf_counter() - start
+    return count / elapsed
+
+
+def bench_categories(evaluator, min_time):
+    results = []
+    for category, (cases, variables) in CATEGORIES.items():
+        expressions = [expression for expression, _ in cases]
+        # Record correctness alongside speed so a fast wrong answer is visible
+        correct = sum(evaluator.evaluate(expr, dict(variables)) == expected for expr, expected in cases)
+        results.append({
+            "category": category,
+            "cases": len(cases),
+            "correct": correct,
+            "evals_per_second": evals_per_second(evaluator, expressions, dict(variables), min_time),
+        })
+    return results
+
+
+def concatenation_chain(length):
+    return " + ".join(["name"] * length)
+
+
+def logic_chain(length):
+    return " and ".join(["x greater 3"] * length)
+
+
+def nested_brackets(depth):
+    return "(" * depth + "x" + " add 1)" * depth
+
+
+def bench_scaling(evaluator, min_time):
+    variables = dict(tester.VARIABLES)
+    results = []
+    for length in LENGTHS:
+        for kind, build in (("concatenation", concatenation_chain), ("logic", logic_chain)):
+            results.append({
+                "dimension": "length", "kind": kind, "size": length,
+                "evals_per_second": evals_per_second(evaluator, [build(length)], variables, min_time),
+            })
+    for depth in DEPTHS:
+        results.append({
+            "dimension": "nesting", "kind": "brackets", "size": depth,
+            "evals_per_second": evals_per_second(evaluator, [nested_brackets(depth)], variables, min_time),
+        })
+    for size in SCOPE_SIZES:
+        scope = dict(variables)
+        scope.update({f"v{i}": i for i in range(size)})
+        for kind, expression in (("arithmetic", "x add y"), ("logic", "x greater 3 and y less 15")):
+            results.append({
+                "dimension": "variables", "kind": kind, "size": size,
+                "evals_per_second": evals_per_second(evaluator, [expression], scope, min_time),
+            })
+    return results
+
+
+def parse_args(argv):
+    options = {"min_time": 0.2, "output": "evaluator-results.json"}
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg in ("--min-time", "--output") and i + 1 < len(argv):
+            options[arg[2:].replace("-", "_")] = float(argv[i + 1]) if arg == "--min-time" else argv[i + 1]
+            i += 2
+        else:
+            raise SystemExit(f"Unknown argument: {arg}")
+    return options
+
+
+def main(argv):
+    options = parse_args(argv)
+    evaluator = NaturalLanguageEvaluator()
+
+    categories = bench_categories(evaluator, options["min_time"])
+    print(f"{'category':<16}{'correct':>10}{'evals/s':>14}")
+    for row in categories:
+        print(f"{row['category']:<16}{row['correct']:>5}/{row['cases']:<4}{row['evals_per_second']:>14.0f}")
+
+    scaling = bench_scaling(evaluator, options["min_time"])
+    print(f"\n{'dimension':<12}{'kind':<16}{'size':>6}{'evals/s':>14}")
+    for row in scaling:
+        print(f"{row['dimension']:<12}{row['kind']:<16}{row['size']:>6}{row['evals_per_second']:>14.0f}")
+
+    with open(options["output"], "w") as f:
+        json.dump({
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "min_time": options["min_time"],
+            "categories": categories,
+            "scaling": scaling,
+        }, f, indent=2)
+    print(f"\nResults written to {options['output']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
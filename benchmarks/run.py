@@ -0,0 +1,167 @@
+"""
+ZENOLang benchmark harness
+
+Usage:
+    python benchmarks/run.py [workload ...] [--scale 0.01] [--output results.json]
+
+Each workload runs in a fresh worker process with scripted 'ask' input and
+discarded output. Reports wall time, statements per second and peak memory
+as JSON so runs can be compared over time. Wall time and peak memory come
+from an uninstrumented run; statements are counted in a second run.
+"""
+
+import io
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from contextlib import redirect_stdout
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks import workloads
+
+
+def peak_memory_kb():
+    """Peak resident set size of this process, or None where unsupported"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _run_once(lines, inputs, counter=None):
+    """Run a script in a fresh interpreter; returns wall seconds"""
+    from modules.interpreter import ZENOLangInterpreter
+
+    stdin = io.StringIO("".join(f"{value}\n" for value in inputs))
+    with open(os.devnull, "w") as devnull:
+        interpreter = ZENOLangInterpreter(stdout=devnull, stdin=stdin)
+        if counter is not None:
+            interpreter.add_hook("statement_start", lambda stmt, variables: next(counter))
+        with redirect_stdout(devnull):
+            start = time.perf_counter()
+            interpreter.run(lines)
+            return time.perf_counter() - start
+
+
+def run_workload(name, scale):
+    """Run one workload in this process and return its measurements"""
+    lines, inputs = workloads.load(name, scale)
+    sys.setrecursionlimit(100_000)
+
+    # Timed on the plain path: a statement hook would swap in the traced executor
+    wall = _run_once(lines, inputs)
+    peak = peak_memory_kb()
+
+    # Statements are counted in a second, untimed run
+    counter = itertools.count()
+    _run_once(lines, inputs, counter)
+    statements = next(counter)
+
+    return {
+        "workload": name,
+        "scale": scale,
+        "statements": statements,
+        "wall_seconds": wall,
+        "statements_per_second": statements / wall if wall else 0.0,
+        "peak_memory_kb": peak,
+    }
+
+
+def run_in_worker(name, scale):
+    """Run a workload in a fresh interpreter process so peak memory is per workload"""
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", name, "--scale", str(scale)],
+        capture_output=True, text=True, cwd=ROOT,
+    )
+    if proc.returncode != 0:
+        return {"workload": name, "scale": scale, "error": proc.stderr.strip()}
+    return json.loads(proc.stdout)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, cwd=ROOT
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def format_table(results):
+    lines = [f"{'workload':<22}{'statements':>12}{'wall s':>10}{'stmts/s':>12}{'peak MB':>10}", "-" * 66]
+    for result in results:
+        if "error" in result:
+            lines.append(f"{result['workload']:<22}  error: {result['error'].splitlines()[-1]}")
+            continue
+        peak = result["peak_memory_kb"]
+        peak_str = f"{peak / 1024:.1f}" if peak is not None else "n/a"
+        lines.append(
+            f"{result['workload']:<22}{result['statements']:>12}{result['wall_seconds']:>10.3f}"
+            f"{result['statements_per_second']:>12.0f}{peak_str:>10}"
+        )
+    return "\n".join(lines)
+
+
+def parse_args(argv):
+    options = {"scale": 1.0, "output": "benchmark-results.json", "worker": None, "workloads": []}
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg in ("--scale", "--output", "--worker"):
+            if i + 1 >= len(argv):
+                raise SystemExit(f"Missing value for {arg}")
+            value = argv[i + 1]
+            options[arg[2:]] = float(value) if arg == "--scale" else value
+            i += 2
+        else:
+            options["workloads"].append(arg)
+            i += 1
+    return options
+
+
+def main(argv):
+    options = parse_args(argv)
+
+    if options["worker"]:
+        print(json.dumps(run_workload(options["worker"], options["scale"])))
+        return 0
+
+    selected = options["workloads"] or workloads.names()
+    unknown = [name for name in selected if name not in workloads.names()]
+    if unknown:
+        print(f"Unknown workload(s): {', '.join(unknown)}")
+        print(f"Available: {', '.join(workloads.names())}")
+        return 1
+
+    results = []
+    for name in selected:
+        results.append(run_in_worker(name, options["scale"]))
+        print(format_table(results[-1:]).splitlines()[-1], flush=True)
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "revision": git_revision(),
+        "results": results,
+    }
+    with open(options["output"], "w") as f:
+        json.dump(report, f, indent=2)
+
+    print()
+    print(format_table(results))
+    print(f"\nResults written to {options['output']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
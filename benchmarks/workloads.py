@@ -0,0 +1,88 @@
+"""
+Benchmark workloads: the example programs plus scaled-up synthetic scripts
+Each workload is (source_lines, scripted_ask_inputs)
+"""
+
+import os
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples")
+
+EXAMPLES = ["fizzbuzz.znl", "binary_srch.znl", "grade_evaluator.znl", "code.znl"]
+
+# Size of each synthetic workload at --scale 1.0
+SYNTHETIC_SIZES = {
+    "deep_recursion": 1000,
+    "counting_loop": 1_000_000,
+    "string_building": 20_000,
+    "large_list": 100_000,
+}
+
+
+def example(name):
+    with open(os.path.join(EXAMPLES_DIR, name)) as f:
+        return f.readlines(), []
+
+
+def deep_recursion(n):
+    return [
+        "define countdown with n",
+        "    if n less 1 then",
+        "        return 0",
+        "    let next be n minus 1",
+        "    let rest be call countdown with next",
+        "    return rest add 1",
+        f"let depth be call countdown with {n}",
+        "say depth",
+    ], []
+
+
+def counting_loop(n):
+    return [
+        "let total be 0",
+        f"repeat counting i from 1 to {n}",
+        "    let total be total add i",
+        "say total",
+    ], []
+
+
+def string_building(n):
+    return [
+        'let text be ""',
+        f"repeat counting i from 1 to {n}",
+        '    let text be text + "x"',
+        "let size be length text",
+        "say size",
+    ], []
+
+
+def large_list(n):
+    return [
+        "let items be []",
+        f"repeat counting i from 1 to {n}",
+        "    add i to items",
+        "let total be 0",
+        "repeat each item in items",
+        "    let total be total add item",
+        "say total",
+    ], []
+
+
+SYNTHETIC = {
+    "deep_recursion": deep_recursion,
+    "counting_loop": counting_loop,
+    "string_building": string_building,
+    "large_list": large_list,
+}
+
+
+def names():
+    return [name[:-len(".znl")] for name in EXAMPLES] + list(SYNTHETIC)
+
+
+def load(name, scale=1.0):
+    """Source lines and scripted input for a workload"""
+    if name in SYNTHETIC:
+        size = max(1, int(SYNTHETIC_SIZES[name] * scale))
+        lines, inputs = SYNTHETIC[name](size)
+        return [line + "\n" for line in lines], inputs
+    return example(name + ".znl")
@@ -1,34 +1,18 @@
-from modules.evaluator.context import set_evaluator
-from modules.evaluator.main import NaturalLanguageEvaluator
-from modules import runner, custom_operators
 import sys
 import os
 
-# Initialize and set evaluator
-evaluator = NaturalLanguageEvaluator()
-set_evaluator(evaluator)
-custom_operators.register_custom_operators()
+from modules.interpreter import ZENOLangInterpreter, create_evaluator
 
-class ZENOLangInterpreter:
-    def __init__(self):
-        self.variables = {}
-
-    def run(self, lines):
-        runner.run_script(lines, self.variables)
+# Everything else is imported on first use so that the REPL and short
+# scripts don't pay for modules they never touch
 
 def pause_if_needed():
     # Only pause if launched by double-click (i.e. not from terminal)
     if os.environ.get('PROMPT') is None and os.environ.get('TERM') is None:
         input("\n[Press Enter to close ZENOLang interpreter...]")
 
-if __name__ == "__main__":
-    if len(sys.argv) == 1:
-        print("ZENOLang Interpreter v1.0")
-        print("Usage: zeno <script_file.znl>")
-        sys.exit(0)
-
-    script_file = sys.argv[1]
-
+def load_script(script_file):
+    """Read a .znl script, exiting with a message if it can't be used"""
     if not script_file.endswith(".znl"):
         print("Error: Please provide a .znl file.")
         pause_if_needed()
@@ -36,12 +20,92 @@ if __name__ == "__main__":
 
     try:
         with open(script_file, 'r') as f:
-            lines = f.readlines()
+            return f.readlines()
     except FileNotFoundError:
         print(f"Error: File '{script_file}' not found.")
         pause_if_needed()
         sys.exit(1)
 
+def profile_script(script_file):
+    """Run a script under the line profiler and report per-line timings"""
+    from modules.profiler import LineProfiler
+
+    lines = load_script(script_file)
+    interpreter = ZENOLangInterpreter()
+    profiler = LineProfiler()
+    profiler.attach(interpreter.runtime)
+    profiler.run(interpreter.run, lines)
+
+    report_file = script_file[:-len(".znl")] + ".profile.json"
+    profiler.write_json(report_file, script_file)
+    print()
+    print(profiler.format_table())
+    print(f"Profile written to {report_file}")
+
+if __name__ == "__main__":
+    if getattr(sys, 'frozen', False):
+        # Worker processes of a frozen build start by re-running this executable
+        import multiprocessing
+        multiprocessing.freeze_support()
+
+    if len(sys.argv) == 1 or sys.argv[1] == "--repl":
+        from modules import repl
+        sys.exit(repl.main())
+
+    if sys.argv[1] in ("-h", "--help"):
+        print("ZENOLang Interpreter v1.0")
+        print("Usage: zeno [--repl]")
+        print("       zeno <script_file.znl>")
+        print("       zeno --watch <script_file.znl>")
+        print("       zeno --check <script_file.znl>")
+        print("       zeno --profile <script_file.znl>")
+        print("       zeno --startup-report [--budget MS]")
+        print("       zeno run-batch <dir-or-glob> [--jobs N] [--timeout SECONDS] [--output FILE] [--input FILE]")
+        print("       zeno serve [--host HOST] [--port PORT] [--socket PATH] [--workers N] [--timeout SECONDS]")
+        sys.exit(0)
+
+    if sys.argv[1] in ("run-batch", "serve"):
+        if sys.argv[1] == "serve":
+            from modules import server
+            sys.exit(server.main(sys.argv[2:]))
+        from modules import batch
+        sys.exit(batch.main(sys.argv[2:]))
+
+    if sys.argv[1] == "--startup-report":
+        from modules import startup_report
+        budget_ms = None
+        if len(sys.argv) == 4 and sys.argv[2] == "--budget":
+            budget_ms = float(sys.argv[3])
+        elif len(sys.argv) != 2:
+            print("Usage: zeno --startup-report [--budget MS]")
+            sys.exit(1)
+        sys.exit(startup_report.main(create_evaluator, budget_ms))
+
+    if sys.argv[1] == "--watch":
+        if len(sys.argv) != 3:
+            print("Usage: zeno --watch <script_file.znl>")
+            sys.exit(1)
+        load_script(sys.argv[2])
+        from modules import watch
+        sys.exit(watch.main(sys.argv[2]))
+
+    if sys.argv[1] == "--check":
+        if len(sys.argv) != 3:
+            print("Usage: zeno --check <script_file.znl>")
+            sys.exit(1)
+        load_script(sys.argv[2])
+        from modules import analysis
+        sys.exit(analysis.main(sys.argv[2]))
+
+    if sys.argv[1] == "--profile":
+        if len(sys.argv) < 3:
+            print("Usage: zeno --profile <script_file.znl>")
+            sys.exit(1)
+        profile_script(sys.argv[2])
+        sys.exit(0)
+
+    lines = load_script(sys.argv[1])
+
     interpreter = ZENOLangInterpreter()
     interpreter.run(lines)
 
@@ -6,7 +6,14 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=[],
+    # Statement modules are imported lazily by name, so PyInstaller can't see them
+    hiddenimports=[
+        'modules.let', 'modules.say', 'modules.ask', 'modules.if_else',
+        'modules.while_', 'modules.for_', 'modules.list_operations',
+        'modules.csv_', 'modules.function_handler', 'modules.condition_checker',
+        'modules.custom_operators', 'modules.startup_report', 'modules.profiler', 'modules.hooks', 'modules.runtime',
+        'modules.batch', 'modules.server', 'modules.limits', 'modules.repl', 'modules.watch', 'modules.parallel', 'modules.tasks', 'modules.tiering', 'modules.analysis', 'modules.use', 'modules.dispatch',
+    ],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -0,0 +1,427 @@
+"""
+Static analysis
+
+    zeno --check script.znl
+
+Walks a compiled program without running it. Along the way it infers the
+type of each variable from 'let' literals and simple expressions, from
+loop variables ('repeat counting' is always int) and from what each
+function returns. It reports:
+
+- errors: names that nothing in the script ever sets, calls to functions
+  that are never defined or with the wrong number of arguments, and
+  lines that aren't statements
+- warnings: names read before every path to them has set them, and
+  operations on known types that can only fail (e.g. 'name minus 1'
+  when name is text)
+
+The evaluator turns a bad read into an '[Error: ...]' value instead of
+stopping, so these mistakes are otherwise easy to miss in the output.
+"""
+
+import re
+from collections import namedtuple
+
+from . import condition_checker, function_handler, runner
+from .evaluator import sites
+
+# Type names; ANY when the type isn't known statically
+ANY = None
+TYPE_NAMES = {int: 'int', float: 'float', str: 'str', bool: 'bool', type(None): 'none', list: 'list'}
+# A value of each type, run through an operator to find its result type (or that it fails)
+SAMPLES = {'int': 2, 'float': 2.5, 'str': 'a', 'bool': True, 'none': None, 'list': [1]}
+# Records whose fields are read as '<name>.<column>' ('load csv', csv rows)
+RECORD = 'record'
+
+QUOTED = re.compile(r'"[^"]*"|\'[^\']*\'')
+NAME = re.compile(r"(?<![\w.])[A-Za-z_][\w.]*")
+# Words in expressions that are never variables
+NOT_NAMES = {'true', 'false', 'null', 'none', 'not', 'and', 'or'}
+PARALLEL_SUFFIX = re.compile(r"(.+?) in parallel(?: using (\S+) workers?)?$")
+
+Diagnostic = namedtuple('Diagnostic', 'lineno severity message')
+
+
+def phrase_mask(template):
+    """
+    A pattern matching a phrase operator's fixed words wherever the phrase
+    is used in an expression; its groups are the operands between them
+    """
+    words = template.split()
+    while words[-1] == '{}':
+        # A last operand runs to wherever the phrase ends, so it stays unmatched
+        words.pop()
+    return re.compile(r'\s+'.join('(.+?)' if word == '{}' else rf'\b{re.escape(word)}\b' for word in words))
+
+
+def merge(a, b):
+    return a if a == b else ANY
+
+
+def join(a, b):
+    """Variables set on both paths, with their merged types"""
+    return {name: merge(kind, b[name]) for name, kind in a.items() if name in b}
+
+
+def _names_set(block):
+    """Every name a block could assign, at any depth"""
+    names = set()
+    for stmt in block:
+        keyword = runner.keyword_of(stmt.text)
+        text = stmt.text
+        if keyword == 'let':
+            names.add(text[4:].split(" be ")[0].strip())
+        elif keyword == 'ask':
+            names.update(text.split()[1:2])
+        elif keyword in ('repeat counting', 'repeat each'):
+            names.add(text.split(None, 2)[2].split(" ", 1)[0])
+        elif keyword in ('load csv', 'wait for'):
+            names.add(text.rsplit(" into ", 1)[-1].strip())
+        elif keyword == 'spawn':
+            names.add(text.rsplit(" as ", 1)[-1].strip())
+        elif keyword == 'sort':
+            self.list_name(text.split()[1] if len(text.split()) > 1 else '', env, lineno)
+        elif keyword == 'length of':
+            names.add('_last_length')
+        elif keyword == 'define':
+            names.update(function_handler.parse_function_definition(text)[1])
+        elif keyword == 'at':
+            names.add(text.split(" at ", 1)[0].strip())
+        for inner in (stmt.body, stmt.orelse):
+            if inner:
+                names |= _names_set(inner)
+    return names
+
+
+def _functions_defined(block):
+    names = set()
+    for stmt in block:
+        if runner.keyword_of(stmt.text) == 'define':
+            names.add(function_handler.parse_function_definition(stmt.text)[0])
+        for inner in (stmt.body, stmt.orelse):
+            if inner:
+                names |= _functions_defined(inner)
+    return names
+
+
+class Analysis:
+    """One pass over a program; diagnostics collect in self.diagnostics"""
+
+    def __init__(self, program, operators=None, phrases=()):
+        from .evaluator.operators import OPERATORS
+
+        self.operators = operators if operators is not None else OPERATORS
+        # Phrase operators ('count of {} in {}'), longest first so 'position of {} in sorted {}'
+        # masks 'sorted' before 'position of {} in {}' is tried
+        self.phrase_masks = [phrase_mask(template)
+                             for template in sorted(phrases, key=lambda t: -len(t.replace('{}', ' ').split()))]
+        self.program = program
+        self.assigned = _names_set(program)
+        self.all_functions = _functions_defined(program)
+        # Functions defined so far: name -> [params, return type]
+        self.functions = {}
+        self.diagnostics = {}
+        self.in_function = False
+        self.returns = None
+        # Set by a statement the analysis doesn't model; its effects are unknown
+        self.opaque = False
+        # Top-level variables set at the end, with their types
+        self.types = {}
+
+    def run(self):
+        """Analyse the program; returns its diagnostics in line order"""
+        self.types = self.block(self.program, {})
+        return sorted(self.diagnostics, key=lambda d: d.lineno)
+
+    def report(self, lineno, severity, message):
+        self.diagnostics.setdefault(Diagnostic(lineno, severity, message), None)
+
+    # ─────────────────────────────
+    # Expressions
+
+    def read(self, name, env, lineno):
+        """Check that a name read at lineno has been set"""
+        if name in env or name.split('.', 1)[0] in env:
+            return
+        if name not in self.assigned and name.split('.', 1)[0] not in self.assigned and not self.opaque:
+            self.report(lineno, 'error', f"'{name}' is not defined")
+        elif not self.in_function:
+            self.report(lineno, 'warning', f"'{name}' may not be set yet")
+
+    def expression(self, expression, env, lineno):
+        """Check the names an expression reads; returns its type"""
+        expression = expression.strip()
+        text = QUOTED.sub(' ', expression.replace("isn't", " "))
+        for mask in self.phrase_masks:
+            # Keep a phrase's operands, drop its fixed words
+            text = mask.sub(lambda m: f" {' '.join(m.groups())} ", text)
+        between = 'between' in text.lower()
+        for name in NAME.findall(text):
+            lower = name.lower()
+            if (lower in self.operators or lower in NOT_NAMES
+                    or (between and lower == 'to')):
+                continue
+            self.read(name, env, lineno)
+
+        if sites.parse_site(expression, self.operators) is None:
+            if expression.startswith('"') and expression.endswith('"') and expression.count('"') == 2:
+                return 'str'
+            if '+' in text:
+                return 'str'
+            return ANY
+        return self.site_type(expression, env, lineno)
+
+    def site_type(self, expression, env, lineno):
+        shape = sites.parse_site(expression, self.operators)
+        types = []
+        for token in shape[::2]:
+            value = sites.constant(token)
+            types.append(TYPE_NAMES.get(type(value[0])) if value is not None else env.get(token))
+        if len(shape) == 1:
+            return types[0]
+
+        op = shape[1]
+        left, right = types
+        if left not in SAMPLES or right not in SAMPLES:
+            return ANY
+        try:
+            result = self.operators[op](SAMPLES[left], SAMPLES[right])
+        except TypeError:
+            self.report(lineno, 'warning', f"'{op}' can't be applied to {left} and {right} in '{expression}'")
+            return ANY
+        return TYPE_NAMES.get(type(result))
+
+    def condition(self, condition, env, lineno):
+        """Check each simple part of an if/while condition"""
+        condition = condition_checker.TRUE_PATTERN.sub('True', condition.strip())
+        condition = condition_checker.FALSE_PATTERN.sub('False', condition)
+        if condition.startswith("not "):
+            return self.condition(condition[4:], env, lineno)
+        for logical in ('and', 'or'):
+            if f' {logical} ' in condition and condition_checker.is_safe_to_split(condition, logical):
+                for part in condition_checker.split_by_logical(condition, logical):
+                    self.condition(part, env, lineno)
+                return
+        self.expression(condition, env, lineno)
+
+    def call(self, text, env, lineno):
+        """Check a 'call f with args' expression; returns the function's return type"""
+        func_name, args = function_handler.parse_function_call(text)
+        for arg in args:
+            self.expression(arg, env, lineno)
+        if func_name not in self.all_functions and not self.opaque:
+            self.report(lineno, 'error', f"Function '{func_name}' is not defined")
+            return ANY
+        func = self.functions.get(func_name)
+        if func is None:
+            if not self.in_function:
+                self.report(lineno, 'warning', f"Function '{func_name}' is called before it is defined")
+            return ANY
+        params, returns = func
+        if len(args) != len(params):
+            self.report(lineno, 'error', f"Function '{func_name}' expects {len(params)} arguments, got {len(args)}")
+        return returns
+
+    def list_name(self, name, env, lineno):
+        name = name.strip()
+        self.read(name, env, lineno)
+        if env.get(name) not in (ANY, 'list'):
+            self.report(lineno, 'warning', f"'{name}' is a {env[name]}, not a list")
+
+    # ─────────────────────────────
+    # Statements
+
+    def block(self, block, env):
+        """Analyse statements in order; returns the variables set afterwards"""
+        env = dict(env)
+        for stmt in block:
+            env = self.statement(stmt, env)
+        return env
+
+    def loop(self, body, env):
+        # A second pass sees the types left behind by the first iteration
+        first = self.block(body, env)
+        self.block(body, join(env, first))
+        return env
+
+    def match(self, stmt, env):
+        """Each case is a branch; without 'otherwise', no case may run"""
+        from . import dispatch
+
+        self.expression(stmt.text[len("match "):], env, stmt.lineno)
+        branches = []
+        for case in stmt.body or ():
+            keyword = runner.keyword_of(case.text)
+            if keyword == 'when':
+                try:
+                    dispatch.parse_when(case)
+                except SyntaxError as e:
+                    self.report(case.lineno, 'error', str(e))
+            elif case.text != 'otherwise':
+                self.report(case.lineno, 'error', "Only 'when' and 'otherwise' cases can go in a 'match' block")
+                continue
+            branches.append(self.block(case.body or [], env))
+        if not any(case.text == 'otherwise' for case in stmt.body or ()):
+            branches.append(env)
+        result = branches[0]
+        for branch in branches[1:]:
+            result = join(result, branch)
+        return result
+
+    def statement(self, stmt, env):
+        text, lineno = stmt.text, stmt.lineno
+        keyword = runner.keyword_of(text)
+
+        if stmt.handler is runner._unknown_command:
+            self.report(lineno, 'error', f"Unknown command: {text}")
+        elif stmt.handler is runner._unexpected_else:
+            self.report(lineno, 'error', "'else' without a matching 'if'")
+        elif keyword in ('when', 'otherwise'):
+            self.report(lineno, 'error', f"'{keyword}' outside a 'match' block")
+        elif keyword == 'match':
+            return self.match(stmt, env)
+        elif keyword == 'let':
+            name, _, value = text[4:].partition(" be ")
+            value = value.strip()
+            if value == '""':
+                kind = 'str'
+            elif value.startswith('call '):
+                kind = self.call(value, env, lineno)
+            elif value.startswith("[") and value.endswith("]"):
+                kind = 'list'
+            else:
+                kind = self.expression(value, env, lineno)
+            env[name.strip()] = kind
+        elif keyword == 'say':
+            parts = text.split(" ", 1)
+            for fragment in parts[1].split('+') if len(parts) == 2 else ():
+                fragment = fragment.strip()
+                if not (fragment.startswith('"') and fragment.endswith('"')):
+                    self.expression(fragment, env, lineno)
+        elif keyword == 'ask':
+            env.update({name: ANY for name in text.split()[1:2]})
+        elif keyword == 'return':
+            kind = self.expression(text[6:], env, lineno) if text[6:].strip() else 'none'
+            if self.returns is not None:
+                self.returns.append(kind)
+        elif keyword in ('if', 'while'):
+            condition = text[len(keyword) + 1:].split(" then")[0]
+            self.condition(condition, env, lineno)
+            if keyword == 'while':
+                return self.loop(stmt.body or [], env)
+            body = self.block(stmt.body or [], env)
+            orelse = self.block(stmt.orelse or [], env)
+            return join(body, orelse)
+        elif keyword == 'repeat counting':
+            var_name, _, bounds = text[len("repeat counting "):].partition(" from ")
+            for token in re.split(r" to | step ", bounds):
+                token = token.strip()
+                if token and not token.lstrip('-').isdigit():
+                    self.read(token, env, lineno)
+            return self.loop(stmt.body or [], dict(env, **{var_name.strip(): 'int'}))
+        elif keyword == 'repeat each':
+            line = text
+            parallel = PARALLEL_SUFFIX.match(line)
+            if parallel:
+                line = parallel[1]
+            var_name, _, source = line[len("repeat each "):].partition(" in ")
+            source = source.strip()
+            if source.startswith("csv "):
+                self.expression(source[4:], env, lineno)
+                kind = RECORD
+            else:
+                self.list_name(source, env, lineno)
+                kind = ANY
+            return self.loop(stmt.body or [], dict(env, **{var_name.strip(): kind}))
+        elif keyword == 'load csv':
+            path, _, name = text[len("load csv "):].rpartition(" into ")
+            self.expression(path, env, lineno)
+            env[name.strip()] = RECORD
+        elif keyword in ('add', 'remove'):
+            match = re.match(r"(?:add (.+) to|remove (.+) from) (.+)", text)
+            if match:
+                self.expression(match[1] or match[2], env, lineno)
+                self.list_name(match[3], env, lineno)
+        elif keyword == 'length of':
+            self.list_name(text[len("length of "):], env, lineno)
+            env['_last_length'] = 'int'
+        elif keyword == 'at':
+            match = re.match(r"(.+) at (.+) in (.+)", text)
+            if match:
+                self.expression(match[2], env, lineno)
+                self.list_name(match[3], env, lineno)
+                env[match[1].strip()] = ANY
+        elif keyword == 'define':
+            self.define(stmt, env)
+        elif keyword == 'call':
+            self.call(text, env, lineno)
+        elif keyword == 'spawn':
+            call_text, _, task = text[len("spawn "):].rpartition(" as ")
+            self.call(call_text, env, lineno)
+            env[task.strip()] = 'task'
+        elif keyword == 'wait for':
+            task, _, name = text[len("wait for "):].partition(" into ")
+            self.read(task.strip(), env, lineno)
+            env[name.strip()] = ANY
+        elif keyword == 'use':
+            self.use(text, lineno)
+        elif keyword != 'stop':
+            self.opaque = True
+        return env
+
+    def use(self, text, lineno):
+        """The functions of a used module become defined from here on"""
+        from . import use
+
+        try:
+            functions = use.functions_of(use.parse_path(text))
+        except (OSError, SyntaxError) as e:
+            self.report(lineno, 'error', str(e))
+            return
+        for func_name, (params, _) in functions.items():
+            self.all_functions.add(func_name)
+            self.functions[func_name] = [params, ANY]
+
+    def define(self, stmt, env):
+        func_name, params = function_handler.parse_function_definition(stmt.text)
+        self.functions[func_name] = [params, ANY]
+        body = stmt.body or []
+        outer = self.in_function, self.returns
+        self.in_function, self.returns = True, []
+        try:
+            # The body runs in a copy of the caller's variables, which include these
+            self.block(body, dict(env, **{param: ANY for param in params}))
+            returns = self.returns
+            if not body or runner.keyword_of(body[-1].text) != 'return':
+                returns.append('none')
+        finally:
+            self.in_function, self.returns = outer
+        kind = returns[0] if returns else 'none'
+        for other in returns[1:]:
+            kind = merge(kind, other)
+        self.functions[func_name][1] = kind
+
+
+def check(program, operators=None, phrases=()):
+    """Diagnostics for a compiled program (see runner.compile_block)"""
+    return Analysis(program, operators, phrases).run()
+
+
+def main(path):
+    """zeno --check: report problems without running the script; status 1 on errors"""
+    from .interpreter import ZENOLangInterpreter, create_evaluator
+
+    with open(path) as f:
+        program = ZENOLangInterpreter.compile(f.readlines())
+    # The custom operators (floor, sum of, ...) are words too, not variables
+    evaluator = create_evaluator().evaluator
+    diagnostics = check(program, evaluator.operators, evaluator.phrases)
+    for lineno, severity, message in diagnostics:
+        print(f"{path}:{lineno}: {severity}: {message}")
+    errors = sum(1 for d in diagnostics if d.severity == 'error')
+    warnings = len(diagnostics) - errors
+    if not diagnostics:
+        print(f"{path}: no problems found")
+    else:
+        print(f"{path}: {errors} error(s), {warnings} warning(s)")
+    return 1 if errors else 0
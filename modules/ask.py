@@ -1,10 +1,10 @@
-def execute(line, variables):
+def execute(line, variables, rt):
     parts = line.split()
     if len(parts) != 2:
         raise SyntaxError("Invalid syntax in 'ask' command")
     
     var_name = parts[1].strip()
-    user_input = input(">> ").strip()
+    user_input = rt.input(">> ").strip()
 
     # Try to convert to integer if it's a number
     if user_input.isdigit() or (user_input.startswith('-') and user_input[1:].isdigit()):
@@ -0,0 +1,240 @@
+import glob
+import io
+import json
+import os
+import signal
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from .exception_case import LimitExceeded, ScriptTimeout
+
+# Exit status recorded for each script
+STATUS_OK = 0
+STATUS_ERRORS = 1       # ran to the end but reported runtime errors
+STATUS_TIMEOUT = 2
+STATUS_CRASHED = 3      # failed before or outside script execution, or killed its worker
+STATUS_LIMIT = 4        # stopped by --max-statements, --max-depth or --max-size
+
+# Command-line options shared by run-batch and serve, passed to run_compiled()
+LIMIT_OPTIONS = ("--max-statements", "--max-depth", "--max-size")
+
+
+def collect_scripts(target):
+    """Expand a directory (all .znl files below it) or a glob pattern into script paths"""
+    if os.path.isdir(target):
+        pattern = os.path.join(target, "**", "*.znl")
+    else:
+        pattern = target
+    return sorted(path for path in glob.glob(pattern, recursive=True) if path.endswith(".znl"))
+
+
+def input_for(script, default_input):
+    """Scripted 'ask' input: <script>.in next to the script, else the shared input"""
+    input_file = script[:-len(".znl")] + ".in"
+    if os.path.exists(input_file):
+        with open(input_file) as f:
+            return f.read()
+    return default_input
+
+
+def warm_up():
+    """
+    Process pool initializer: import every statement module and build an
+    evaluator once, so individual scripts don't pay for it
+    """
+    from . import runner
+    from .interpreter import create_evaluator
+
+    for keyword in list(runner.STATEMENTS):
+        runner.resolve_statement(keyword)
+    create_evaluator()
+
+
+def _raise_timeout(signum, frame):
+    raise ScriptTimeout("Script exceeded its time limit")
+
+
+def limits_from_options(options):
+    """{'max_statements': N, ...} for the LIMIT_OPTIONS present in parsed options"""
+    return {option[2:].replace("-", "_"): int(options[option])
+            for option in LIMIT_OPTIONS if options.get(option)}
+
+
+def execute(program, input_text="", timeout=None, limits=None):
+    """
+    Run a compiled program in a fresh interpreter with captured output
+    limits: optional run_compiled() limits (max_statements, max_depth, max_size)
+    Returns: result dict with status, errors, wall_seconds, stdout (and error)
+    """
+    from .interpreter import ZENOLangInterpreter
+
+    stdout = io.StringIO()
+    result = {"status": STATUS_OK, "errors": 0, "wall_seconds": 0.0}
+    start = time.perf_counter()
+
+    # Wall-clock limit via an interval timer where the platform has one
+    use_timer = bool(timeout) and hasattr(signal, "setitimer")
+    try:
+        interpreter = ZENOLangInterpreter(stdout=stdout, stdin=io.StringIO(input_text))
+        if use_timer:
+            signal.signal(signal.SIGALRM, _raise_timeout)
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        try:
+            interpreter.run_compiled(program, timeout=timeout, **(limits or {}))
+        finally:
+            if use_timer:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+        result["errors"] = interpreter.runtime.errors
+        if interpreter.runtime.errors:
+            result["status"] = STATUS_ERRORS
+    except ScriptTimeout as e:
+        result["status"] = STATUS_TIMEOUT
+        result["error"] = str(e)
+    except LimitExceeded as e:
+        result["status"] = STATUS_LIMIT
+        result["error"] = str(e)
+    except Exception as e:
+        result["status"] = STATUS_CRASHED
+        result["error"] = f"{type(e).__name__}: {e}"
+
+    result["wall_seconds"] = time.perf_counter() - start
+    result["stdout"] = stdout.getvalue()
+    return result
+
+
+def run_one(task):
+    """Run one script file in this worker; returns a JSON-serialisable result"""
+    from .interpreter import ZENOLangInterpreter
+
+    script, default_input, timeout, limits = task
+    try:
+        with open(script) as f:
+            program = ZENOLangInterpreter.compile(f.readlines())
+    except Exception as e:
+        return _crashed(task, f"{type(e).__name__}: {e}")
+    return {"script": script, **execute(program, input_for(script, default_input), timeout, limits)}
+
+
+def _crashed(task, error):
+    return {"script": task[0], "status": STATUS_CRASHED, "errors": 0, "wall_seconds": 0.0,
+            "error": error, "stdout": ""}
+
+
+def _run_alone(task):
+    """Rerun one script in a worker of its own, so a worker death is attributable to it"""
+    with ProcessPoolExecutor(max_workers=1, initializer=warm_up) as pool:
+        try:
+            return pool.submit(run_one, task).result()
+        except BrokenProcessPool:
+            return _crashed(task, "Worker process died while running the script")
+
+
+def _run_all(tasks, jobs):
+    """
+    Yield (index, result) for every task, in completion order
+    At most `jobs` scripts are in flight. A worker that dies (e.g. killed for
+    running out of memory) breaks the whole pool and fails every in-flight
+    script, so those are rerun one by one and the rest go to a fresh pool
+    """
+    queue = deque(range(len(tasks)))
+    while queue:
+        suspects = []
+        with ProcessPoolExecutor(max_workers=jobs, initializer=warm_up) as pool:
+            running = {}
+            while queue or running:
+                while queue and len(running) < jobs and not suspects:
+                    index = queue.popleft()
+                    running[pool.submit(run_one, tasks[index])] = index
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = running.pop(future)
+                    try:
+                        yield index, future.result()
+                    except BrokenProcessPool:
+                        suspects.append(index)
+        for index in sorted(suspects):
+            yield index, _run_alone(tasks[index])
+
+
+def run_batch(target, jobs=None, timeout=None, output="batch-results.jsonl", default_input="", limits=None):
+    """
+    Run every script matched by target in a pool of warm worker processes
+    Results are written to output as JSON lines, in script order
+    Returns: list of results
+    """
+    scripts = collect_scripts(target)
+    tasks = [(script, default_input, timeout, limits) for script in scripts]
+    results = [None] * len(tasks)
+    written = 0
+
+    with open(output, "w") as out:
+        for index, result in _run_all(tasks, jobs or os.cpu_count() or 1):
+            results[index] = result
+            # Write the finished prefix so the file stays in script order
+            while written < len(results) and results[written] is not None:
+                out.write(json.dumps(results[written]) + "\n")
+                written += 1
+    return results
+
+
+def summarize(results, elapsed):
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    return (
+        f"{len(results)} scripts in {elapsed:.2f}s: "
+        f"{counts.get(STATUS_OK, 0)} ok, {counts.get(STATUS_ERRORS, 0)} with errors, "
+        f"{counts.get(STATUS_TIMEOUT, 0)} timed out, {counts.get(STATUS_LIMIT, 0)} over limits, "
+        f"{counts.get(STATUS_CRASHED, 0)} crashed"
+    )
+
+
+def main(argv):
+    """
+    zeno run-batch <dir-or-glob> [--jobs N] [--timeout SECONDS] [--output FILE] [--input FILE]
+                   [--max-statements N] [--max-depth N] [--max-size N]
+    """
+    options = {"--jobs": None, "--timeout": 10.0, "--output": "batch-results.jsonl", "--input": None}
+    target = None
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg in options or arg in LIMIT_OPTIONS:
+            if i + 1 >= len(argv):
+                print(f"Error: Missing value for {arg}")
+                return 1
+            options[arg] = argv[i + 1]
+            i += 2
+        elif target is None:
+            target = arg
+            i += 1
+        else:
+            print(f"Error: Unexpected argument '{arg}'")
+            return 1
+
+    if target is None:
+        print("Usage: zeno run-batch <dir-or-glob> [--jobs N] [--timeout SECONDS] [--output FILE] [--input FILE]")
+        print("                      [--max-statements N] [--max-depth N] [--max-size N]")
+        return 1
+
+    default_input = ""
+    if options["--input"]:
+        with open(options["--input"]) as f:
+            default_input = f.read()
+
+    start = time.perf_counter()
+    results = run_batch(
+        target,
+        jobs=int(options["--jobs"]) if options["--jobs"] else None,
+        timeout=float(options["--timeout"]) or None,
+        output=options["--output"],
+        default_input=default_input,
+        limits=limits_from_options(options),
+    )
+    print(summarize(results, time.perf_counter() - start))
+    print(f"Results written to {options['--output']}")
+    return 0
@@ -1,38 +1,93 @@
 import re
-from .evaluator.main import NaturalLanguageEvaluator
+from functools import lru_cache
 from .evaluator.context import get_evaluator
 
 
+TRUE_PATTERN = re.compile(r'\btrue\b', flags=re.IGNORECASE)
+FALSE_PATTERN = re.compile(r'\bfalse\b', flags=re.IGNORECASE)
 
 
-def check_condition(expr: str, variables: dict) -> bool:
-    evaluator = get_evaluator()
-    evaluate_expression = evaluator.evaluate
+def check_condition(expr: str, variables: dict, evaluate_expression=None) -> bool:
+    if evaluate_expression is None:
+        evaluate_expression = get_evaluator().evaluate
+    return compile_condition(expr)(variables, evaluate_expression)
+
+
+@lru_cache(maxsize=1024)
+def compile_condition(expr: str):
+    """
+    Compile a condition string once into a predicate tree
+    Returns: predicate(variables, evaluate_expression) -> bool
+    """
     expr = expr.strip()
 
     # Preprocess booleans to Python style
-    expr = re.sub(r'\btrue\b', 'True', expr, flags=re.IGNORECASE)
-    expr = re.sub(r'\bfalse\b', 'False', expr, flags=re.IGNORECASE)
+    expr = TRUE_PATTERN.sub('True', expr)
+    expr = FALSE_PATTERN.sub('False', expr)
 
     # Handle leading "not"
     if expr.startswith("not "):
-        return not check_condition(expr[4:].strip(), variables)
+        return _negate(compile_condition(expr[4:].strip()))
 
     # Handle 'and' with higher precedence
     if ' and ' in expr and is_safe_to_split(expr, 'and'):
         parts = split_by_logical(expr, 'and')
-        return all(check_condition(part, variables) for part in parts)
+        return _all_of([compile_condition(part) for part in parts])
 
     # Handle 'or'
     if ' or ' in expr and is_safe_to_split(expr, 'or'):
         parts = split_by_logical(expr, 'or')
-        return any(check_condition(part, variables) for part in parts)
+        return _any_of([compile_condition(part) for part in parts])
 
     # Base condition — simple expression
-    try:
-        return bool(evaluate_expression(expr, variables))
-    except Exception as e:
-        raise ValueError(f"Condition evaluation failed for '{expr}': {e}")
+    return _leaf(expr)
+
+
+def _leaf(expr):
+    def predicate(variables, evaluate_expression):
+        try:
+            return bool(evaluate_expression(expr, variables))
+        except Exception as e:
+            raise ValueError(f"Condition evaluation failed for '{expr}': {e}")
+    return predicate
+
+
+def _negate(inner):
+    def predicate(variables, evaluate_expression):
+        return not inner(variables, evaluate_expression)
+    return predicate
+
+
+def _all_of(predicates):
+    # Short-circuits on the first false part
+    if len(predicates) == 2:
+        first, second = predicates
+        def predicate(variables, evaluate_expression):
+            return first(variables, evaluate_expression) and second(variables, evaluate_expression)
+        return predicate
+
+    def predicate(variables, evaluate_expression):
+        for part in predicates:
+            if not part(variables, evaluate_expression):
+                return False
+        return True
+    return predicate
+
+
+def _any_of(predicates):
+    # Short-circuits on the first true part
+    if len(predicates) == 2:
+        first, second = predicates
+        def predicate(variables, evaluate_expression):
+            return first(variables, evaluate_expression) or second(variables, evaluate_expression)
+        return predicate
+
+    def predicate(variables, evaluate_expression):
+        for part in predicates:
+            if part(variables, evaluate_expression):
+                return True
+        return False
+    return predicate
 
 
 def split_by_logical(expr: str, logical_op: str):
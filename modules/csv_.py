@@ -0,0 +1,106 @@
+import csv
+from array import array
+from itertools import islice
+
+# Rows are pulled from the reader in fixed-size chunks so memory stays
+# bounded no matter how large the file is
+CHUNK_SIZE = 1024
+
+
+def parse_cell(cell):
+    """Convert a CSV cell to int or float when it looks numeric"""
+    cell = cell.strip()
+    num_str = cell[1:] if cell.startswith('-') else cell
+    if num_str.isdigit():
+        return int(cell)
+    if num_str.replace('.', '', 1).isdigit():
+        return float(cell)
+    return cell
+
+
+def parse_path(path_expr, variables, evaluate_expression):
+    """Resolve the file name of a csv statement (string literal or variable)"""
+    path = evaluate_expression(path_expr.strip(), variables)
+    if not isinstance(path, str) or path.startswith("[Error"):
+        raise ValueError(f"Invalid csv file name: {path_expr}")
+    return path
+
+
+def iter_rows(path, chunk_size=CHUNK_SIZE):
+    """
+    Stream rows of a CSV file as dicts keyed by the header row
+    Only one chunk of rows is held in memory at a time. Every row has every
+    header column: cells missing from short rows are empty strings
+    """
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        header = [name.strip() for name in next(reader, [])]
+        while True:
+            chunk = list(islice(reader, chunk_size))
+            if not chunk:
+                break
+            for raw in chunk:
+                if raw:
+                    if len(raw) < len(header):
+                        raw += [''] * (len(header) - len(raw))
+                    yield dict(zip(header, map(parse_cell, raw)))
+
+
+def bind_fields(var_name, row, variables):
+    """Expose each column of a row as a '<var>.<column>' variable"""
+    for column, value in row.items():
+        variables[f"{var_name}.{column}"] = value
+
+
+def append_value(column, value):
+    """Append to a typed column, widening int -> float -> str as needed"""
+    if isinstance(column, array):
+        if isinstance(value, int) and column.typecode == 'q':
+            column.append(value)
+            return column
+        if isinstance(value, (int, float)):
+            if column.typecode == 'q':
+                column = array('d', column)
+            column.append(value)
+            return column
+        column = [str(v) for v in column]
+    column.append(value if isinstance(value, str) else str(value))
+    return column
+
+
+def load_columns(path, chunk_size=CHUNK_SIZE):
+    """
+    Load a CSV file into a dict of whole columns
+    Numeric columns are stored as compact typed arrays, others as lists of str
+    """
+    columns = {}
+    for row in iter_rows(path, chunk_size):
+        for name, value in row.items():
+            if name not in columns:
+                if isinstance(value, int):
+                    column = array('q')
+                elif isinstance(value, float):
+                    column = array('d')
+                else:
+                    column = []
+                columns[name] = column
+            columns[name] = append_value(columns[name], value)
+    return columns
+
+
+def execute_load(line, variables, rt):
+    """
+    Handle: load csv "<file>" into <var>
+    Binds <var> to the column dict and each column to '<var>.<column>'
+    """
+    remaining = line[len("load csv "):].strip()
+    if " into " not in remaining:
+        raise SyntaxError("Missing 'into' in 'load csv' command")
+
+    path_expr, var_name = remaining.rsplit(" into ", 1)
+    var_name = var_name.strip()
+    path = parse_path(path_expr, variables, rt.evaluate)
+
+    columns = load_columns(path)
+    variables[var_name] = columns
+    bind_fields(var_name, columns, variables)
@@ -1,10 +1,107 @@
 from modules.evaluator.context import get_evaluator
 from math import floor
 
-def register_custom_operators():
-    evaluator = get_evaluator()
+from modules.list_operations import LIST_TYPES, position_in_sorted, position_of
+
+def register_custom_operators(evaluator=None):
+    if evaluator is None:
+        evaluator = get_evaluator()
     evaluator.add_operator("length", lambda value: len(value))
     evaluator.add_operator("reverse", lambda value: value[::-1])
     evaluator.add_operator("floor", lambda value: floor(value))
     evaluator.add_operator("upper", lambda value: value.upper())
-    evaluator.add_operator("lower", lambda value: value.lower())
\ No newline at end of file
+    evaluator.add_operator("lower", lambda value: value.lower())
+    # List aggregates, as phrases: '{}' marks an operand, the other words are
+    # fixed text, so 'sum', 'count' etc. stay usable as variables
+    evaluator.add_operator("sum of {}", aggregate("sum of", sum))
+    evaluator.add_operator("min of {}", aggregate("min of", min, needs_items=True))
+    evaluator.add_operator("max of {}", aggregate("max of", max, needs_items=True))
+    evaluator.add_operator("average of {}", aggregate("average of", lambda items: sum(items) / len(items), needs_items=True))
+    evaluator.add_operator("count of {} in {}", count_of)
+    # 'position of <value> in <list>' scans; '... in sorted <list>' binary-searches
+    evaluator.add_operator("position of {} in {}", position_of)
+    evaluator.add_operator("position of {} in sorted {}", position_in_sorted)
+    # String builtins
+    evaluator.add_operator("split {} by {}", split_by)
+    evaluator.add_operator("join {} with {}", join_with)
+    evaluator.add_operator("replace {} with {} in {}", replace_in)
+    evaluator.add_operator("substring of {} from {} to {}", substring)
+    evaluator.add_operator("index of {} in {}", index_of)
+    evaluator.add_operator("repeat {} {} times", repeat)
+
+
+def aggregate(name, func, needs_items=False):
+    """A list aggregate running in one builtin call (plain lists and typed csv columns alike)"""
+    def operator(items):
+        if not isinstance(items, LIST_TYPES):
+            raise TypeError(f"'{name}' needs a list, got {items!r}")
+        if needs_items and not len(items):
+            raise ValueError(f"'{name}' needs a non-empty list")
+        return func(items)
+    return operator
+
+
+def count_of(value, items):
+    """'count of <value> in <list>': how many items equal value"""
+    if not isinstance(items, LIST_TYPES):
+        raise TypeError(f"'count of' needs a list, got {items!r}")
+    return items.count(value)
+
+
+def _text(name, value):
+    if not isinstance(value, str):
+        raise TypeError(f"'{name}' needs text, got {value!r}")
+    return value
+
+
+def _whole_number(name, value):
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise TypeError(f"'{name}' needs a whole number, got {value!r}")
+    return value
+
+
+def split_by(text, separator):
+    """'split <text> by <separator>': a list of the pieces; by "" splits into characters"""
+    text = _text("split", text)
+    separator = _text("split", separator)
+    return list(text) if separator == "" else text.split(separator)
+
+
+def join_with(items, separator):
+    """'join <list> with <separator>': the items as text, separator in between"""
+    if not isinstance(items, LIST_TYPES):
+        raise TypeError(f"'join' needs a list, got {items!r}")
+    return _text("join", separator).join(str(item) for item in items)
+
+
+def replace_in(old, new, text):
+    """'replace <old> with <new> in <text>': every occurrence replaced"""
+    return _text("replace", text).replace(_text("replace", old), _text("replace", new))
+
+
+def substring(text, start, end):
+    """'substring of <text> from <start> to <end>': positions count from 0, end included"""
+    text = _text("substring", text)
+    start = _whole_number("substring", start)
+    end = _whole_number("substring", end)
+    if start < 0 or end < start - 1 or end >= len(text):
+        raise IndexError(f"'substring' positions {start} to {end} are outside text of length {len(text)}")
+    return text[start:end + 1]
+
+
+def index_of(value, container):
+    """'index of <part> in <text or list>': position of the first occurrence, or -1"""
+    if isinstance(container, str):
+        return container.find(_text("index of", value))
+    if isinstance(container, LIST_TYPES):
+        return position_of(value, container)
+    raise TypeError(f"'index of' needs text or a list, got {container!r}")
+
+
+def repeat(text, count):
+    """'repeat <text> <count> times': text written count times in a row"""
+    text = _text("repeat", text)
+    count = _whole_number("repeat", count)
+    if count < 0:
+        raise ValueError(f"'repeat' needs a count of 0 or more, got {count}")
+    return text * count
@@ -0,0 +1,260 @@
+"""
+Multi-way branches
+
+    match grade
+        when "A", "A+"
+            say "Excellent"
+        when "B"
+            say "Good"
+        otherwise
+            say "Keep going"
+
+'match' evaluates its expression once and jumps to the first 'when' case
+listing an equal value ('is' equality: 1 and 1.0 are the same case).
+'otherwise' runs when no case matches. Case values are literals
+(numbers, quoted text, true/false, null), so the cases are a dict built
+the first time the statement runs, and dispatch is one lookup.
+
+if/else ladders are turned into the same kind of table when every
+condition compares one variable with a literal using one operator:
+
+- 'x is 1' / 'else if x is 2' / ... becomes a dict from value to branch
+- 'x greater 90' / 'else if x greater 80' / ... with thresholds that
+  keep going down (up for less/atmost) becomes a bisect over the sorted
+  thresholds, for variables holding a number
+
+Any other value (a missing variable, text in a range ladder), or an
+operator redefined with add_operator, runs the conditions one by one as
+before. Ladders aren't used while hooks are active, so tracing still sees
+each nested 'if'.
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+
+from . import condition_checker, runner
+from .evaluator import sites
+from .evaluator.operators import OPERATORS
+
+# Conditions in a ladder before it is worth a table
+MIN_CASES = 3
+
+EQUALITY_OPS = {"is", "equals"}
+# Range operator -> direction the thresholds must run in (-1: down, 1: up)
+RANGE_OPS = {
+    "greater": -1, "more": -1, "greater_than": -1, "atleast": -1, "at_least": -1,
+    "less": 1, "less_than": 1, "atmost": 1, "at_most": 1,
+}
+LEAF = re.compile(r"(\S+)\s+(\S+)\s+(.+)")
+VALUE = re.compile(r'"[^"]*"|\'[^\']*\'|[^,]+')
+_MISSING = object()
+
+
+def literal(token):
+    """(value,) for a literal token (number, quoted text, true/false, null), or None"""
+    token = token.strip()
+    if len(token) >= 2 and token[0] == token[-1] and token[0] in "\"'" and token[0] not in token[1:-1]:
+        return token[1:-1],
+    if token.lower() in ('true', 'false'):
+        return token.lower() == 'true',
+    return sites.constant(token)
+
+
+def hooks_active(rt):
+    return rt._hooks is not None and rt._hooks.active
+
+
+# ─────────────────────────────
+# match / when / otherwise
+
+class MatchTable:
+    """The cases of one 'match' statement: value -> index into blocks"""
+
+    def __init__(self, stmt):
+        self.subject = stmt.text[len("match "):].strip()
+        if not self.subject:
+            raise SyntaxError("Invalid syntax in 'match' command (expected: match <expression>)")
+        self.cases = {}
+        self.blocks = []
+        # Index of the 'otherwise' block; past the end when there is none
+        self.otherwise = None
+        for case in stmt.body or ():
+            keyword = runner.keyword_of(case.text)
+            if self.otherwise is not None:
+                raise SyntaxError(f"'{keyword}' at line {case.lineno} comes after 'otherwise'")
+            if keyword == 'otherwise' and case.text == 'otherwise':
+                self.otherwise = len(self.blocks)
+            elif keyword == 'when':
+                for value in parse_when(case):
+                    # An earlier case keeps a repeated value
+                    self.cases.setdefault(value, len(self.blocks))
+            else:
+                raise SyntaxError(f"Line {case.lineno} in 'match' must be a 'when' or 'otherwise' case")
+            self.blocks.append(case.body)
+        if self.otherwise is None:
+            self.otherwise = len(self.blocks)
+            self.blocks.append(None)
+
+    def select(self, value):
+        """Index of the block to run for a subject value"""
+        try:
+            return self.cases.get(value, self.otherwise)
+        except TypeError:
+            # Unhashable (a list): never equal to a literal
+            return self.otherwise
+
+
+def parse_when(case):
+    """The literal values of a 'when' line"""
+    values = []
+    for token in VALUE.findall(case.text[len("when"):]):
+        value = literal(token)
+        if value is None:
+            raise SyntaxError(f"'when' values at line {case.lineno} must be numbers, quoted text, "
+                              f"true/false or null, got '{token.strip()}'")
+        values.append(value[0])
+    if not values:
+        raise SyntaxError(f"'when' at line {case.lineno} needs at least one value")
+    return values
+
+
+def match_table(stmt):
+    """The MatchTable of a 'match' statement, built on first use"""
+    if stmt.compiled is None:
+        stmt.compiled = MatchTable(stmt)
+    return stmt.compiled
+
+
+def execute_match(stmt, variables, rt):
+    """
+    Handle match statement
+    Syntax: match <expression>, then indented 'when <value>[, <value>...]' cases
+    and an optional last 'otherwise' case
+    """
+    table = match_table(stmt)
+    block = table.blocks[table.select(rt.evaluate(table.subject, variables))]
+    if block:
+        rt.execute_block(block, variables, rt)
+    rt.wait_for_tasks()
+
+
+def case_outside_match(stmt, variables, rt):
+    rt.errors += 1
+    print(f"Unexpected '{runner.keyword_of(stmt.text)}' at line {stmt.lineno} - "
+          f"cases belong inside a 'match' block", file=rt.stdout)
+
+
+# ─────────────────────────────
+# if/else ladders
+
+class Ladder:
+    """
+    A chain of 'if' / 'else if' conditions on one variable; blocks holds
+    each condition's body, then the final else block
+    """
+
+    def __init__(self, subject, op, values, blocks):
+        self.subject = subject
+        self.op = op
+        self.blocks = blocks
+        if op in EQUALITY_OPS:
+            self.cases = {}
+            for index, value in enumerate(values):
+                self.cases.setdefault(value, index)
+            self.thresholds = None
+        else:
+            self.cases = None
+            self.thresholds = sorted(values)
+
+    def select(self, variables, rt):
+        """Index of the block the conditions would pick, or None to run them instead"""
+        if hooks_active(rt):
+            return None
+        operators = rt.evaluator.evaluator.operators
+        if operators.get(self.op) is not OPERATORS[self.op] or self.subject.lower() in operators:
+            return None
+        value = variables.get(self.subject, _MISSING)
+        if value is _MISSING:
+            return None
+        last = len(self.blocks) - 1
+        if self.cases is not None:
+            try:
+                return self.cases.get(value, last)
+            except TypeError:
+                return last
+        if type(value) not in (int, float) or value != value:
+            # Text, booleans and NaN compare in ways a bisect doesn't model
+            return None
+        thresholds = self.thresholds
+        op = self.op
+        if op in ("greater", "more", "greater_than"):
+            return last - bisect_left(thresholds, value)
+        if op in ("atleast", "at_least"):
+            return last - bisect_right(thresholds, value)
+        if op in ("less", "less_than"):
+            return bisect_right(thresholds, value)
+        return bisect_left(thresholds, value)
+
+
+def _leaf(stmt):
+    """(subject, op, value) for an 'if' whose condition compares a variable with a literal"""
+    from .if_else import compile_header
+
+    try:
+        compile_header(stmt.text)
+    except SyntaxError:
+        return None
+    condition = stmt.text.strip()[3:].split(" then")[0].strip()
+    # As condition_checker reads it
+    condition = condition_checker.TRUE_PATTERN.sub('True', condition)
+    condition = condition_checker.FALSE_PATTERN.sub('False', condition)
+    match = LEAF.fullmatch(condition)
+    if not match:
+        return None
+    subject, op, value = match.groups()
+    value = literal(value)
+    if (value is None or subject == 'not' or sites.constant(subject) is not None
+            or not sites._operand_ok(subject, OPERATORS)
+            or (op not in EQUALITY_OPS and op not in RANGE_OPS)):
+        return None
+    return subject, op, value[0]
+
+
+def _build_ladder(stmt):
+    from .if_else import execute
+
+    leaves = []
+    blocks = []
+    current = stmt
+    while True:
+        leaf = _leaf(current)
+        if leaf is None:
+            return None
+        leaves.append(leaf)
+        blocks.append(current.body)
+        orelse = current.orelse
+        if not (orelse and len(orelse) == 1 and orelse[0].handler is execute):
+            blocks.append(orelse)
+            break
+        current = orelse[0]
+
+    subject, op, _ = leaves[0]
+    if len(leaves) < MIN_CASES or any(leaf[:2] != (subject, op) for leaf in leaves):
+        return None
+    values = [leaf[2] for leaf in leaves]
+    if op in RANGE_OPS:
+        if any(type(value) not in (int, float) for value in values):
+            return None
+        step = RANGE_OPS[op]
+        # Only a steady run of thresholds makes the first true condition a bisect
+        if any((b - a) * step <= 0 for a, b in zip(values, values[1:])):
+            return None
+    return Ladder(subject, op, values, blocks)
+
+
+def ladder(stmt):
+    """The Ladder starting at an 'if' statement, or None; worked out once per statement"""
+    found = stmt.compiled
+    if found is None:
+        found = stmt.compiled = _build_ladder(stmt) or False
+    return found or None
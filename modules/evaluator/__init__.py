@@ -0,0 +1,3 @@
+# Stand-in for typing.TYPE_CHECKING: modules in this package guard their
+# typing imports with it, so typing itself is never imported at runtime
+TYPE_CHECKING = False
@@ -6,7 +6,13 @@ def set_evaluator(evaluator_instance):
     # print("Evaluator set successfully!")
 
 def get_evaluator():
+    """
+    The process-wide evaluator used by callers that don't pass a runtime
+    (runner.run_script without rt, if_else.evaluate, check_condition, ...)
+    Created with the custom operators on first use unless set_evaluator was called
+    """
     global _evaluator
     if _evaluator is None:
-        raise RuntimeError("Evaluator not set yet!")
+        from ..interpreter import create_evaluator
+        _evaluator = create_evaluator()
     return _evaluator
@@ -2,30 +2,147 @@
 Evaluator Module - Core expression evaluation logic
 """
 
+from __future__ import annotations
+
 import re
-import ast
-from typing import Any, Dict
+
+from . import TYPE_CHECKING
+if TYPE_CHECKING:
+    from typing import Any, Dict
+
 from .parser import ExpressionParser
-from .operators import OPERATORS, OPERATOR_SYMBOLS, is_arithmetic_only, is_arithmetic_comparison
+from .operators import OPERATORS, OPERATOR_SYMBOLS, is_arithmetic_only, is_arithmetic_comparison, operator_arity
+from .utils import ExpressionCache, CACHE_MISS
+from .sites import compile_site
+
+# Only results computed from immutable values are safe to reuse
+CACHEABLE_TYPES = (int, float, str, bool, type(None))
+# An expression that misses this many times in a row reads values that change
+# between every evaluation (e.g. 'total add i' in a loop); stop caching it and
+# only retry once every RETRY_INTERVAL evaluations
+MISS_STREAK_LIMIT = 8
+RETRY_INTERVAL = 64
+NAME_PATTERN = re.compile(r"[A-Za-z_][\w.]*|\w+")
+# Expression strings whose site (or lack of one) is remembered
+MAX_SITES = 1024
+# One operand of a phrase operator: a quoted string, or the shortest text that fits
+PHRASE_OPERAND = r'("[^"]*"|\'[^\']*\'|.+?)'
 
 
 class ExpressionEvaluator:
     """Core expression evaluation engine"""
     
-    def __init__(self, operators: Dict[str, Any] = None):
-        self.operators = operators or OPERATORS.copy()
+    def __init__(self, operators: Dict[str, Any] = None, cache_size: int = 256):
+        # Private copies: custom operators added to one evaluator never leak into another
+        self.operators = dict(operators) if operators else OPERATORS.copy()
+        self.arities = {name: operator_arity(func) for name, func in self.operators.items()}
+        # Phrase operators: template ('replace {} with {} in {}') -> function
+        self.phrases = {}
+        self._phrase_index = None
+        self.operator_symbols = OPERATOR_SYMBOLS.copy()
         self.parser = ExpressionParser()
+        self.cache = ExpressionCache(cache_size) if cache_size else None
+        # Bumped whenever the operator table changes, so compiled code can notice
+        self.operators_version = 0
+        self._read_names = {}
+        self._miss_streaks = {}
+        # expression -> inline-cached site function, or False when it isn't a site
+        self._sites = {}
     
-    def add_operator(self, name: str, func: callable, symbol: str = None):
-        """Add a custom operator"""
-        self.operators[name] = func
+    def add_operator(self, name: str, func: callable, symbol: str = None, arity: int = None):
+        """
+        Add a custom operator
+        A word operator goes before its one operand ('double x') or between its
+        two ('x max y'). A phrase operator is a template starting with a word,
+        with one {} per operand ('replace {} with {} in {}'); its words stay
+        free to use as variable names. arity defaults to the number of
+        required positional parameters of func
+        """
+        if arity is None:
+            arity = operator_arity(func)
+        if '{}' in name:
+            operands = name.split().count('{}')
+            if name.split()[0] == '{}':
+                raise ValueError(f"Phrase operator '{name}' must start with a word")
+            if arity is not None and arity != operands:
+                raise ValueError(f"Phrase operator '{name}' has {operands} operands but its function takes {arity}")
+            self.phrases[name] = func
+            self._phrase_index = None
+        else:
+            self.operators[name] = func
+            self.arities[name] = arity
+        self.operators_version += 1
+        self._sites.clear()
         if symbol:
-            OPERATOR_SYMBOLS[name] = symbol
+            self.operator_symbols[name] = symbol
+        if self.cache is not None:
+            self.cache.clear()
+            self._miss_streaks.clear()
     
     def evaluate(self, expression: str, variables: Dict[str, Any]) -> Any:
         """Main evaluation method with bracket handling"""
         expression = expression.strip()
-        
+
+        # Results are cached only for scopes that track variable versions
+        versions = getattr(variables, 'versions', None)
+        if versions is None or self.cache is None:
+            return self._evaluate_uncached(expression, variables)
+
+        streaks = self._miss_streaks
+        streak = streaks.get(expression, 0)
+        if streak >= MISS_STREAK_LIMIT:
+            streaks[expression] = streak + 1
+            if streak % RETRY_INTERVAL:
+                return self._evaluate_uncached(expression, variables)
+
+        names = self._read_names.get(expression)
+        if names is None:
+            names = self._names_read_by(expression)
+        for name in names:
+            if name in variables and not isinstance(variables[name], CACHEABLE_TYPES):
+                return self._evaluate_uncached(expression, variables)
+
+        key = tuple([versions.get(name, 0) for name in names])
+        result = self.cache.get(expression, key)
+        if result is CACHE_MISS:
+            result = self._evaluate_uncached(expression, variables)
+            self.cache.set(expression, key, result)
+            if streak >= MISS_STREAK_LIMIT:
+                # Retry missed: look up once more next time, in case it is stable now
+                streaks[expression] = MISS_STREAK_LIMIT - 1
+            elif len(streaks) < 4 * self.cache.max_size:
+                streaks[expression] = streak + 1
+        elif streak:
+            streaks[expression] = 0
+        return result
+
+    def _names_read_by(self, expression: str) -> tuple:
+        """Every word an expression could resolve as a variable (a safe superset)"""
+        names = set()
+        for word in NAME_PATTERN.findall(expression):
+            names.add(word)
+            if '.' in word:
+                names.update(part for part in word.split('.') if part)
+        names = tuple(sorted(names))
+        if len(self._read_names) < 4 * self.cache.max_size:
+            self._read_names[expression] = names
+        return names
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Expression cache statistics (hits, misses, evictions, hit rate)"""
+        return self.cache.stats() if self.cache is not None else {}
+
+    def _evaluate_uncached(self, expression: str, variables: Dict[str, Any]) -> Any:
+        """Evaluate without consulting the expression cache"""
+        # Single values and single operations dispatch through their site's inline cache
+        site = self._sites.get(expression)
+        if site is None:
+            site = compile_site(expression, self.operators) or False
+            if len(self._sites) < MAX_SITES:
+                self._sites[expression] = site
+        if site:
+            return site(variables)
+
         # Handle brackets recursively
         if '(' in expression and ')' in expression:
             expression = self._evaluate_brackets_recursively(expression, variables)
@@ -72,6 +189,8 @@ class ExpressionEvaluator:
             op, operand = tokens
             # print("Operator:", op, "Operand:", operand)
             if op in self.operators:
+                if self.arities.get(op) not in (None, 1):
+                    raise ValueError(f"'{op}' takes {self.arities[op]} operand(s), not 1")
                 value = self._evaluate_without_brackets(operand, variables)
                 # print("Value:", value)
                 return self.operators[op](value)
@@ -90,11 +209,19 @@ class ExpressionEvaluator:
             else:
                 return f"[Error: Cannot apply 'not' to {val}]"
         
-        # Handle string concatenation
-        if '+' in expression:
+        # Handle string concatenation ('+' inside quotes is just text)
+        if '+' in expression and self.parser.contains_operator_outside_quotes(expression, ['+']):
             # print("Calling _handle_string_concatenation for:", expression)
             return self._handle_string_concatenation(expression, variables)
         
+        # Handle phrase operators ('sum of marks', 'replace "a" with "b" in text')
+        if self.phrases and tokens:
+            for pattern, template in self._phrase_patterns().get(tokens[0], ()):
+                match = pattern.fullmatch(expression)
+                if match:
+                    operands = [self._evaluate_without_brackets(operand, variables) for operand in match.groups()]
+                    return self.phrases[template](*operands)
+        
         # Handle single values
         if not self._contains_operators(expression):
             # print("Calling _handle_single_value for:", expression)
@@ -142,6 +269,20 @@ class ExpressionEvaluator:
             raise TypeError("Operator '+' is only for string concatenation.")
         
     
+    def _phrase_patterns(self) -> Dict[str, Any]:
+        """First word -> [(pattern, template)] of the phrase operators, most specific first"""
+        if self._phrase_index is None:
+            index = {}
+            for template in self.phrases:
+                words = template.split()
+                pattern = r'\s+'.join(PHRASE_OPERAND if word == '{}' else re.escape(word) for word in words)
+                index.setdefault(words[0], []).append((re.compile(pattern), template))
+            for entries in index.values():
+                # 'position of {} in sorted {}' is tried before 'position of {} in {}'
+                entries.sort(key=lambda entry: -len(entry[1].replace('{}', ' ').split()))
+            self._phrase_index = index
+        return self._phrase_index
+    
     def _handle_between_expression(self, expression: str, variables: Dict[str, Any]) -> bool:
         """Handle 'value between lower to upper' expressions"""
         value_part, lower_part, upper_part = self.parser.extract_between_expression(expression)
@@ -208,6 +349,8 @@ class ExpressionEvaluator:
         
         if not operator_found:
             raise ValueError(f"No valid operator found: '{expression}'")
+        if self.arities.get(operator_found) not in (None, 2):
+            raise ValueError(f"'{operator_found}' takes {self.arities[operator_found]} operand(s), not 2")
         
         parts = self.parser.split_outside_quotes(expression, operator_found)
         if len(parts) != 2:
@@ -224,7 +367,7 @@ class ExpressionEvaluator:
     def _evaluate_complex_expression(self, expression: str, variables: Dict[str, Any]) -> Any:
         """Evaluate complex expressions using AST"""
         # Replace operators with Python equivalents
-        for word_op, symbol in sorted(OPERATOR_SYMBOLS.items(), key=lambda x: -len(x[0])):
+        for word_op, symbol in sorted(self.operator_symbols.items(), key=lambda x: -len(x[0])):
             pattern = r'\b' + re.escape(word_op) + r'\b'
             expression = re.sub(pattern, f' {symbol} ', expression, flags=re.IGNORECASE)
         
@@ -234,7 +377,8 @@ class ExpressionEvaluator:
             replacement = f'"{variables[var]}"' if isinstance(variables[var], str) else str(variables[var])
             expression = re.sub(pattern, replacement, expression)
         
-        # Safe evaluation using AST
+        # Safe evaluation using AST (imported here: only complex expressions need it)
+        import ast
         try:
             tree = ast.parse(expression, mode='eval')
             self._validate_ast_safety(tree)
@@ -244,6 +388,7 @@ class ExpressionEvaluator:
     
     def _validate_ast_safety(self, tree: ast.AST):
         """Validate AST for safety - no function calls, imports, etc."""
+        import ast
         class SafeVisitor(ast.NodeVisitor):
             def visit_Call(self, node):
                 raise ValueError("Function calls not allowed")
@@ -3,7 +3,12 @@ Natural Language Expression Evaluator - Main Module
 Handles expression parsing and evaluation coordination
 """
 
-from typing import Any, Dict
+from __future__ import annotations
+
+from . import TYPE_CHECKING
+if TYPE_CHECKING:
+    from typing import Any, Dict
+
 from .parser import ExpressionParser
 from .operators import OPERATORS
 from .evaluator import ExpressionEvaluator
@@ -37,9 +42,13 @@ class NaturalLanguageEvaluator:
         except Exception as e:
             return f"[Error: {e}]"
     
-    def add_operator(self, name: str, func: callable, symbol: str = None):
-        """Add a custom operator"""
-        self.evaluator.add_operator(name, func, symbol)
+    def add_operator(self, name: str, func: callable, symbol: str = None, arity: int = None):
+        """Add a custom operator (see ExpressionEvaluator.add_operator)"""
+        self.evaluator.add_operator(name, func, symbol, arity)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Expression cache statistics (hits, misses, evictions, hit rate)"""
+        return self.evaluator.cache_stats()
     
     def add_variable(self, name: str, value: Any, variables: Dict[str, Any]):
         """Helper to add variables"""
@@ -2,7 +2,11 @@
 Operators Module - Defines all supported operators and their implementations
 """
 
-from typing import Any
+from __future__ import annotations
+
+from . import TYPE_CHECKING
+if TYPE_CHECKING:
+    from typing import Any, Optional
 
 
 # Core operator implementations
@@ -96,6 +100,15 @@ STRING_OPS = {"contains", "startswith", "endswith"}
 SPECIAL_OPS = {"between"}
 
 
+def operator_arity(func: Any) -> Optional[int]:
+    """Number of operands func takes (its required positional parameters), or None if unknown"""
+    code = getattr(func, '__code__', None)
+    if code is None:
+        return None
+    arity = code.co_argcount - len(getattr(func, '__defaults__', None) or ())
+    return arity - 1 if getattr(func, '__self__', None) is not None else arity
+
+
 def get_operator_type(op_name: str) -> str:
     """Get the category of an operator"""
     op_lower = op_name.lower()
@@ -2,8 +2,13 @@
 Parser Module - Handles parsing of values and expressions
 """
 
+from __future__ import annotations
+
 import re
-from typing import Any, Dict, List, Tuple, Optional
+
+from . import TYPE_CHECKING
+if TYPE_CHECKING:
+    from typing import Any, Dict, List, Tuple, Optional
 
 
 class ExpressionParser:
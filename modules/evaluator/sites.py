@@ -0,0 +1,166 @@
+"""
+Sites Module - Inline caches for operator dispatch
+
+A site is one expression string of the simplest shape: a single value
+('total') or one binary operation between two plain operands ('i plus 1',
+'i less n'). Its shape is parsed once. After that, each evaluation reads
+the operands directly and dispatches through an inline cache:
+
+- the cache remembers the operand types it saw last and the handler
+  chosen for them. A type guard (the same types as last time) leads
+  straight to that handler
+- for numbers, and for strings with comparisons and 'plus', the handler
+  is the Python operation itself (operator.add, operator.lt, ...) rather
+  than the operator table's lambda
+- when the guard fails, the site looks the new types up. It keeps up to
+  POLYMORPHIC_LIMIT type pairs; past that it uses the generic operator
+  for the rest of its life
+
+Any other expression returns None from compile_site and goes through the
+full evaluator.
+"""
+
+from __future__ import annotations
+
+import operator
+import re
+
+from . import TYPE_CHECKING
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, Optional
+
+from .operators import ARITHMETIC_OPS, COMPARISON_OPS, OPERATORS, STRING_OPS
+
+OPERAND = re.compile(r"-?\d+(\.\d+)?|[A-Za-z_][\w.]*")
+# Type pairs a site keeps specialised handlers for before going megamorphic
+POLYMORPHIC_LIMIT = 4
+
+# Python operations with the same result as the operator table's lambda
+FAST_OPS = {
+    "add": operator.add, "adds": operator.add, "plus": operator.add,
+    "subtract": operator.sub, "subtracts": operator.sub, "minus": operator.sub,
+    "multiply": operator.mul, "multiplies": operator.mul, "times": operator.mul,
+    "is": operator.eq, "equals": operator.eq, "isn't": operator.ne, "not_equals": operator.ne,
+    "less": operator.lt, "less_than": operator.lt,
+    "more": operator.gt, "greater": operator.gt, "greater_than": operator.gt,
+    "atleast": operator.ge, "at_least": operator.ge, "atmost": operator.le, "at_most": operator.le,
+}
+NUMBER_TYPES = (int, float)
+# Operations specialised for a pair of strings (subtract/multiply would only raise)
+STRING_FAST_OPS = {name for name, func in FAST_OPS.items() if func not in (operator.sub, operator.mul)}
+
+
+def parse_site(expression: str, operators: Dict[str, Any]) -> Optional[tuple]:
+    """
+    Shape of an expression the evaluator would handle as a single value or
+    one binary operation: (token,) or (left, op, right); None otherwise
+    """
+    if any(c in expression for c in '"\'()+') or 'between' in expression.lower():
+        return None
+    tokens = expression.split()
+    if len(tokens) == 1 and _operand_ok(tokens[0], operators):
+        return tuple(tokens)
+    if len(tokens) != 3:
+        return None
+    left, op, right = tokens
+    if op not in operators or op not in ARITHMETIC_OPS | COMPARISON_OPS | STRING_OPS:
+        return None
+    if not (_operand_ok(left, operators) and _operand_ok(right, operators)):
+        return None
+    # The evaluator splits on the operator text, so it must not occur inside an operand
+    if op in left or op in right:
+        return None
+    return left, op, right
+
+
+def _operand_ok(token: str, operators: Dict[str, Any]) -> bool:
+    """The evaluator would treat token as one plain value (not an operator word)"""
+    return (OPERAND.fullmatch(token) is not None
+            and not any(part.lower() in operators for part in token.split('.')))
+
+
+def constant(token: str) -> Optional[tuple]:
+    """(parse_value(token),) for a literal token, or None when it names a variable"""
+    if token == 'True':
+        return True,
+    if token == 'False':
+        return False,
+    if token.lower() in ('null', 'none'):
+        return None,
+    if token.lstrip('-').replace('.', '', 1).isdigit():
+        return (float(token) if '.' in token else int(token)),
+    return None
+
+
+def getter(token: str) -> Callable:
+    """function(variables) returning what parser.parse_value(token, variables) would"""
+    value = constant(token)
+    if value is not None:
+        value = value[0]
+        return lambda variables: value
+
+    def get(variables):
+        try:
+            return variables[token]
+        except KeyError:
+            raise ValueError(f"Cannot resolve value: '{token}'") from None
+    return get
+
+
+def specialise(op: str, left_type: type, right_type: type, generic: Callable) -> Callable:
+    """The handler a site uses for one pair of operand types"""
+    fast = FAST_OPS.get(op)
+    if fast is None:
+        return generic
+    if left_type in NUMBER_TYPES and right_type in NUMBER_TYPES:
+        return fast
+    if left_type is str and right_type is str and op in STRING_FAST_OPS:
+        return fast
+    return generic
+
+
+def compile_site(expression: str, operators: Dict[str, Any], on_miss: Callable = None) -> Optional[Callable]:
+    """
+    A function(variables) returning what the evaluator would for expression
+    (and raising the same errors), or None when the expression isn't a site.
+    on_miss() is called whenever the type guard fails
+    """
+    shape = parse_site(expression, operators)
+    if shape is None:
+        return None
+    if len(shape) == 1:
+        return getter(shape[0])
+
+    left, op, right = shape
+    get_left, get_right = getter(left), getter(right)
+    generic = operators[op]
+    if op not in FAST_OPS or generic is not OPERATORS[op]:
+        # Only the built-in operators match the Python operations (add_operator may replace them)
+        return lambda variables: generic(get_left(variables), get_right(variables))
+
+    # (left type, right type) -> handler, filled as type pairs are seen
+    handlers = {}
+    # The monomorphic entry: the pair seen last and its handler
+    left_type = right_type = None
+    handler = generic
+
+    def site(variables):
+        nonlocal left_type, right_type, handler
+        x = get_left(variables)
+        y = get_right(variables)
+        if type(x) is left_type and type(y) is right_type:
+            return handler(x, y)
+
+        if on_miss is not None and left_type is not None:
+            on_miss()
+        key = (type(x), type(y))
+        found = handlers.get(key)
+        if found is None:
+            if len(handlers) >= POLYMORPHIC_LIMIT:
+                # Megamorphic: the guard would keep failing, so stop specialising
+                return generic(x, y)
+            found = handlers[key] = specialise(op, key[0], key[1], generic)
+        left_type, right_type = key
+        handler = found
+        return found(x, y)
+    return site
@@ -4,6 +4,108 @@ Comprehensive Test Suite for Natural Language Expression Evaluator
 
 import unittest
 from .main import NaturalLanguageEvaluator, evaluate_expression
+from .utils import ExpressionCache, VariableScope, CACHE_MISS
+from . import sites
+
+# Expression cases shared with benchmarks/evaluator_bench.py
+VARIABLES = {
+    "x": 5,
+    "y": 10,
+    "z": 3,
+    "flag": False,
+    "name": "Sagnik",
+    "score": 85.5,
+    "count": 0
+}
+
+ARITHMETIC_CASES = [
+    ("x add y", 15),
+    ("x plus y", 15),
+    ("y minus x", 5),
+    ("x multiply z", 15),
+    ("y times z", 30),
+    ("y divide x", 2.0),
+    ("y divided_by x", 2.0),
+    ("y modulus z", 1),
+    ("x power z", 125),
+    ("x to_the_power_of z", 125)
+]
+
+COMPARISON_CASES = [
+    ("x is 5", True),
+    ("x equals 5", True),
+    ("x isn't 10", True),
+    ("x not_equals 10", True),
+    ("x less y", True),
+    ("y greater x", True),
+    ("x atleast 5", True),
+    ("x at_least 5", True),
+    ("y atmost 10", True),
+    ("y at_most 10", True)
+]
+
+STRING_CASES = [
+    ("name contains 'Sag'", True),
+    ("name contains 'xyz'", False),
+    ("name startswith 'Sag'", True),
+    ("name startswith 'nik'", False),
+    ("name endswith 'nik'", True),
+    ("name endswith 'Sag'", False)
+]
+
+LOGICAL_CASES = [
+    ("x greater 3 and y less 15", True),
+    ("x greater 10 and y less 15", False),
+    ("x greater 10 or y less 15", True),
+    ("flag or x equals 5", True),
+    ("not flag", True),
+    ("not flag and x equals 5", True)
+]
+
+BETWEEN_CASES = [
+    ("x between 1 to 10", True),
+    ("x between 6 to 10", False),
+    ("score between 80 to 90", True),
+    ("score between 90 to 100", False)
+]
+
+BRACKET_CASES = [
+    ("(x add y) multiply z", 45),
+    ("x add (y multiply z)", 35),
+    ("((x add y) multiply z) add 5", 50),
+    ("(x add y) between (z multiply 2) to (z multiply 6)", True),
+    ("(x greater 3) and (y less 15)", True)
+]
+
+COMPLEX_CASES = [
+    ("x modulus z is 2", True),
+    ("(x add y) divide z greater 4", True),
+    ("name contains 'Sag' and x greater z", True),
+    ("score between 80 to 90 and name startswith 'Sag'", True)
+]
+
+CONCATENATION_CASES = [
+    ("first + space + second", "Hello World"),
+    ("'Hello' + ' ' + 'World'", "Hello World")
+]
+
+QUOTED_CASES = [
+    ("'hello world'", "hello world"),
+    ('"hello world"', "hello world"),
+    ("'hello' contains 'ell'", True),
+    ('"test string" startswith "test"', True)
+]
+
+BOOLEAN_CASES = [
+    ("True", True),
+    ("False", False),
+    ("True and False", False),
+    ("True or False", True),
+    ("not True", False),
+    ("not False", True)
+]
+
+STRING_VARIABLES = {"first": "Hello", "second": "World", "space": " "}
 
 
 class TestNaturalLanguageEvaluator(unittest.TestCase):
@@ -11,30 +113,11 @@ class TestNaturalLanguageEvaluator(unittest.TestCase):
     def setUp(self):
         """Set up test fixtures"""
         self.evaluator = NaturalLanguageEvaluator()
-        self.variables = {
-            "x": 5,
-            "y": 10,
-            "z": 3,
-            "flag": False,
-            "name": "Sagnik",
-            "score": 85.5,
-            "count": 0
-        }
+        self.variables = dict(VARIABLES)
     
     def test_arithmetic_operations(self):
         """Test basic arithmetic operations"""
-        test_cases = [
-            ("x add y", 15),
-            ("x plus y", 15),
-            ("y minus x", 5),
-            ("x multiply z", 15),
-            ("y times z", 30),
-            ("y divide x", 2.0),
-            ("y divided_by x", 2.0),
-            ("y modulus z", 1),
-            ("x power z", 125),
-            ("x to_the_power_of z", 125)
-        ]
+        test_cases = ARITHMETIC_CASES
         
         for expr, expected in test_cases:
             with self.subTest(expr=expr):
@@ -43,18 +126,7 @@ class TestNaturalLanguageEvaluator(unittest.TestCase):
     
     def test_comparison_operations(self):
         """Test comparison operations"""
-        test_cases = [
-            ("x is 5", True),
-            ("x equals 5", True),
-            ("x isn't 10", True),
-            ("x not_equals 10", True),
-            ("x less y", True),
-            ("y greater x", True),
-            ("x atleast 5", True),
-            ("x at_least 5", True),
-            ("y atmost 10", True),
-            ("y at_most 10", True)
-        ]
+        test_cases = COMPARISON_CASES
         
         for expr, expected in test_cases:
             with self.subTest(expr=expr):
@@ -63,14 +135,7 @@ class TestNaturalLanguageEvaluator(unittest.TestCase):
     
     def test_string_operations(self):
         """Test string operations"""
-        test_cases = [
-            ("name contains 'Sag'", True),
-            ("name contains 'xyz'", False),
-            ("name startswith 'Sag'", True),
-            ("name startswith 'nik'", False),
-            ("name endswith 'nik'", True),
-            ("name endswith 'Sag'", False)
-        ]
+        test_cases = STRING_CASES
         
         for expr, expected in test_cases:
             with self.subTest(expr=expr):
@@ -79,14 +144,7 @@ class TestNaturalLanguageEvaluator(unittest.TestCase):
     
     def test_logical_operations(self):
         """Test logical operations"""
-        test_cases = [
-            ("x greater 3 and y less 15", True),
-            ("x greater 10 and y less 15", False),
-            ("x greater 10 or y less 15", True),
-            ("flag or x equals 5", True),
-            ("not flag", True),
-            ("not flag and x equals 5", True)
-        ]
+        test_cases = LOGICAL_CASES
         
         for expr, expected in test_cases:
             with self.subTest(expr=expr):
@@ -95,12 +153,7 @@ class TestNaturalLanguageEvaluator(unittest.TestCase):
     
     def test_between_expressions(self):
         """Test between expressions"""
-        test_cases = [
-            ("x between 1 to 10", True),
-            ("x between 6 to 10", False),
-            ("score between 80 to 90", True),
-            ("score between 90 to 100", False)
-        ]
+        test_cases = BETWEEN_CASES
         
         for expr, expected in test_cases:
             with self.subTest(expr=expr):
@@ -109,13 +162,7 @@ class TestNaturalLanguageEvaluator(unittest.TestCase):
     
     def test_bracket_expressions(self):
         """Test expressions with brackets"""
-        test_cases = [
-            ("(x add y) multiply z", 45),
-            ("x add (y multiply z)", 35),
-            ("((x add y) multiply z) add 5", 50),
-            ("(x add y) between (z multiply 2) to (z multiply 6)", True),
-            ("(x greater 3) and (y less 15)", True)
-        ]
+        test_cases = BRACKET_CASES
         
         for expr, expected in test_cases:
             with self.subTest(expr=expr):
@@ -124,12 +171,7 @@ class TestNaturalLanguageEvaluator(unittest.TestCase):
     
     def test_complex_expressions(self):
         """Test complex mixed expressions"""
-        test_cases = [
-            ("x modulus z is 2", True),
-            ("(x add y) divide z greater 4", True),
-            ("name contains 'Sag' and x greater z", True),
-            ("score between 80 to 90 and name startswith 'Sag'", True)
-        ]
+        test_cases = COMPLEX_CASES
         
         for expr, expected in test_cases:
             with self.subTest(expr=expr):
@@ -138,12 +180,9 @@ class TestNaturalLanguageEvaluator(unittest.TestCase):
     
     def test_string_concatenation(self):
         """Test string concatenation"""
-        string_vars = {"first": "Hello", "second": "World", "space": " "}
+        string_vars = dict(STRING_VARIABLES)
         
-        test_cases = [
-            ("first + space + second", "Hello World"),
-            ("'Hello' + ' ' + 'World'", "Hello World")
-        ]
+        test_cases = CONCATENATION_CASES
         
         for expr, expected in test_cases:
             with self.subTest(expr=expr):
@@ -152,12 +191,7 @@ class TestNaturalLanguageEvaluator(unittest.TestCase):
     
     def test_quoted_strings(self):
         """Test quoted string handling"""
-        test_cases = [
-            ("'hello world'", "hello world"),
-            ('"hello world"', "hello world"),
-            ("'hello' contains 'ell'", True),
-            ('"test string" startswith "test"', True)
-        ]
+        test_cases = QUOTED_CASES
         
         for expr, expected in test_cases:
             with self.subTest(expr=expr):
@@ -166,14 +200,7 @@ class TestNaturalLanguageEvaluator(unittest.TestCase):
     
     def test_boolean_values(self):
         """Test boolean value handling"""
-        test_cases = [
-            ("True", True),
-            ("False", False),
-            ("True and False", False),
-            ("True or False", True),
-            ("not True", False),
-            ("not False", True)
-        ]
+        test_cases = BOOLEAN_CASES
         
         for expr, expected in test_cases:
             with self.subTest(expr=expr):
@@ -207,6 +234,183 @@ class TestNaturalLanguageEvaluator(unittest.TestCase):
         result = self.evaluator.evaluate("x max y", self.variables)
         self.assertEqual(result, 10)
 
+    def test_operator_arity(self):
+        """A word operator is only used with the number of operands its function takes"""
+        self.evaluator.add_operator("max", lambda x, y: max(x, y))
+        self.evaluator.add_operator("double", lambda x: x * 2)
+        self.assertEqual(self.evaluator.evaluate("double y", self.variables), 20)
+        self.assertEqual(self.evaluator.evaluate("max y", self.variables), "[Error: 'max' takes 2 operand(s), not 1]")
+        self.assertEqual(self.evaluator.evaluate("x double y", self.variables),
+                         "[Error: 'double' takes 1 operand(s), not 2]")
+
+    def test_phrase_operators(self):
+        """'{}' marks each operand of a phrase operator; its words stay free as variable names"""
+        self.evaluator.add_operator("clamp {} between {} and {}", lambda v, low, high: min(max(v, low), high))
+        variables = dict(self.variables, clamp=1)
+        self.assertEqual(self.evaluator.evaluate("clamp y between 0 and x add 1", variables), 6)
+        self.assertEqual(self.evaluator.evaluate("clamp 'a b' between 'a' and 'z'", variables), "a b")
+        self.assertEqual(self.evaluator.evaluate("clamp", variables), 1)
+
+    def test_phrase_operator_arity_checked(self):
+        with self.assertRaisesRegex(ValueError, "has 2 operands but its function takes 1"):
+            self.evaluator.add_operator("pad {} with {}", lambda text: text)
+        with self.assertRaisesRegex(ValueError, "must start with a word"):
+            self.evaluator.add_operator("{} squared", lambda x: x * x)
+
+
+class TestExpressionCache(unittest.TestCase):
+    """Tests for the versioned LRU expression cache"""
+    
+    def setUp(self):
+        self.evaluator = NaturalLanguageEvaluator()
+        self.variables = VariableScope({"x": 5, "y": 10})
+    
+    def test_lru_eviction(self):
+        """Test least recently used entries are evicted at capacity"""
+        cache = ExpressionCache(max_size=2)
+        cache.set("a", (), 1)
+        cache.set("b", (), 2)
+        cache.get("a", ())
+        cache.set("c", (), 3)
+        
+        self.assertEqual(cache.get("a", ()), 1)
+        self.assertIs(cache.get("b", ()), CACHE_MISS)
+        self.assertEqual(cache.stats()["evictions"], 1)
+    
+    def test_hit_on_unchanged_variables(self):
+        """Test repeated evaluation hits the cache"""
+        self.evaluator.evaluate("x add y", self.variables)
+        self.evaluator.evaluate("x add y", self.variables)
+        
+        stats = self.evaluator.cache_stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hit_rate"], 0.5)
+    
+    def test_write_invalidates(self):
+        """Test writing a variable the expression reads invalidates the entry"""
+        self.assertEqual(self.evaluator.evaluate("x add y", self.variables), 15)
+        self.variables["x"] = 7
+        self.assertEqual(self.evaluator.evaluate("x add y", self.variables), 17)
+        
+        local = self.variables.copy()
+        local["y"] = 1
+        self.assertEqual(self.evaluator.evaluate("x add y", local), 8)
+        self.assertEqual(self.evaluator.evaluate("x add y", self.variables), 17)
+    
+    def test_mutable_values_not_cached(self):
+        """Test expressions reading lists are always re-evaluated"""
+        self.evaluator.add_operator("length", lambda value: len(value))
+        self.variables["items"] = [1, 2]
+        self.assertEqual(self.evaluator.evaluate("length items", self.variables), 2)
+        self.variables["items"].append(3)
+        self.assertEqual(self.evaluator.evaluate("length items", self.variables), 3)
+    
+    def test_volatile_expression_stops_filling_cache(self):
+        """Test an expression whose inputs change every time stops evicting other entries"""
+        self.evaluator.evaluate("x add y", self.variables)
+        for i in range(200):
+            self.variables["i"] = i
+            self.assertEqual(self.evaluator.evaluate("x add i", self.variables), 5 + i)
+        self.evaluator.evaluate("x add y", self.variables)
+        
+        stats = self.evaluator.cache_stats()
+        self.assertLess(stats["size"], 20)
+        self.assertEqual(stats["hits"], 1)
+    
+    def test_volatile_expression_caches_again_once_stable(self):
+        """Test a volatile expression is cached again after its inputs stop changing"""
+        for i in range(20):
+            self.variables["i"] = i
+            self.evaluator.evaluate("x add i", self.variables)
+        for _ in range(200):
+            self.assertEqual(self.evaluator.evaluate("x add i", self.variables), 24)
+        
+        self.assertGreater(self.evaluator.cache_stats()["hits"], 100)
+    
+    def test_bulk_removal_invalidates(self):
+        """Test clear, popitem and |= bump versions like single writes do"""
+        self.assertEqual(self.evaluator.evaluate("x add y", self.variables), 15)
+        self.variables.clear()
+        self.assertNotEqual(self.evaluator.evaluate("x add y", self.variables), 15)
+        
+        self.variables |= {"x": 1, "y": 2}
+        self.assertEqual(self.evaluator.evaluate("x add y", self.variables), 3)
+        self.variables.popitem()
+        self.assertNotEqual(self.evaluator.evaluate("x add y", self.variables), 3)
+
+
+class TestSites(unittest.TestCase):
+    """Tests for inline-cached dispatch of simple expressions"""
+    
+    EXPRESSIONS = ["x", "x plus y", "y minus 2.5", "score times z", "x less y", "name is 'Sagnik'",
+                   "name is x", "name plus name", "x greater score", "y divide x", "flag is False",
+                   "name contains x", "missing plus 1", "name minus x", "-3 less x"]
+    
+    def setUp(self):
+        self.evaluator = NaturalLanguageEvaluator()
+    
+    def full_path(self, expression, variables):
+        """The result without sites, or the error it raises"""
+        try:
+            return self.evaluator.evaluator._evaluate_without_brackets(expression, variables)
+        except Exception as e:
+            return type(e), str(e)
+    
+    def test_same_results_as_full_evaluator(self):
+        """Test every site computes what the full evaluator does"""
+        operators = self.evaluator.evaluator.operators
+        for expression in self.EXPRESSIONS:
+            site = sites.compile_site(expression, operators)
+            if site is None:
+                continue
+            for variables in (VARIABLES, dict(VARIABLES, x=2.5, y="a"), dict(VARIABLES, x=True)):
+                with self.subTest(expression=expression, x=variables["x"]):
+                    try:
+                        result = site(variables)
+                    except Exception as e:
+                        result = type(e), str(e)
+                    self.assertEqual(result, self.full_path(expression, variables))
+    
+    def test_guard_respecialises(self):
+        """Test a site follows its operand types and reports each failed guard"""
+        misses = []
+        site = sites.compile_site("a plus b", self.evaluator.evaluator.operators, lambda: misses.append(1))
+        self.assertEqual(site({"a": 1, "b": 2}), 3)
+        self.assertEqual(site({"a": 1, "b": 2}), 3)
+        self.assertEqual(site({"a": "x", "b": "y"}), "xy")
+        self.assertEqual(site({"a": 1.5, "b": 2}), 3.5)
+        self.assertEqual(site({"a": 1, "b": 2}), 3)
+        self.assertEqual(len(misses), 3)
+    
+    def test_megamorphic_site_stays_correct(self):
+        """Test a site with more type pairs than it caches still computes every result"""
+        site = sites.compile_site("a times b", self.evaluator.evaluator.operators)
+        for a in (2, 2.5, True, "ab", [1]):
+            for b in (2, 3.0):
+                with self.subTest(a=a, b=b):
+                    try:
+                        expected = a * b
+                    except TypeError:
+                        self.assertRaises(TypeError, site, {"a": a, "b": b})
+                    else:
+                        self.assertEqual(site({"a": a, "b": b}), expected)
+    
+    def test_not_a_site(self):
+        """Test expressions needing the full evaluator get no site"""
+        operators = self.evaluator.evaluator.operators
+        for expression in ("(x plus 1)", "x plus y times z", "'a' + name", "x between 1 to 9",
+                           "x and y", "not flag", "row.add plus 1", "x LESS y"):
+            with self.subTest(expression=expression):
+                self.assertIsNone(sites.compile_site(expression, operators))
+    
+    def test_add_operator_replaces_sites(self):
+        """Test an operator added later is seen by expressions evaluated before"""
+        variables = {"x": 5, "y": 10}
+        self.assertEqual(self.evaluator.evaluate("x less y", variables), True)
+        self.evaluator.add_operator("less", lambda x, y: "custom")
+        self.assertEqual(self.evaluator.evaluate("x less y", variables), "custom")
+
 
 class TestPerformance(unittest.TestCase):
     """Performance tests for the evaluator"""
@@ -2,7 +2,14 @@
 Utils Module - Utility functions and helpers
 """
 
-from typing import List, Any
+from __future__ import annotations
+
+import itertools
+from collections import OrderedDict
+
+from . import TYPE_CHECKING
+if TYPE_CHECKING:
+    from typing import List, Any
 
 
 def is_quoted_string(s: str) -> bool:
@@ -111,39 +118,109 @@ def validate_expression_syntax(expression: str) -> tuple[bool, str]:
     return True, "Valid"
 
 
+class VariableScope(dict):
+    """Variable dictionary that stamps every write with a fresh version number"""
+
+    __slots__ = ('versions',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.versions = {name: next(_version_counter) for name in self}
+
+    def __setitem__(self, name: str, value: Any):
+        dict.__setitem__(self, name, value)
+        self.versions[name] = next(_version_counter)
+
+    def __delitem__(self, name: str):
+        dict.__delitem__(self, name)
+        self.versions[name] = next(_version_counter)
+
+    def update(self, *args, **kwargs):
+        for name, value in dict(*args, **kwargs).items():
+            self[name] = value
+
+    def setdefault(self, name: str, default: Any = None) -> Any:
+        if name not in self:
+            self[name] = default
+        return self[name]
+
+    def clear(self):
+        for name in self:
+            self.versions[name] = next(_version_counter)
+        dict.clear(self)
+
+    def popitem(self) -> tuple:
+        name, value = dict.popitem(self)
+        self.versions[name] = next(_version_counter)
+        return name, value
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def pop(self, name: str, *default) -> Any:
+        if name in self:
+            self.versions[name] = next(_version_counter)
+        return dict.pop(self, name, *default)
+
+    def copy(self) -> "VariableScope":
+        scope = VariableScope()
+        dict.update(scope, self)
+        scope.versions = self.versions.copy()
+        return scope
+
+
+# Shared across scopes so equal versions always mean the same written value
+_version_counter = itertools.count(1)
+
+CACHE_MISS = object()
+
+
 class ExpressionCache:
-    """Simple cache for expression results"""
-    
-    def __init__(self, max_size: int = 100):
-        self.cache = {}
+    """Fixed-capacity LRU cache of expression results keyed by variable versions"""
+
+    def __init__(self, max_size: int = 256):
+        self.cache = OrderedDict()
         self.max_size = max_size
-        self.access_order = []
-    
-    def get(self, expression: str, variables_hash: str) -> Any:
-        """Get cached result"""
-        key = f"{expression}|{variables_hash}"
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, expression: str, versions: tuple, default: Any = CACHE_MISS) -> Any:
+        """Get cached result, or default on a miss"""
+        key = (expression, versions)
+        try:
+            result = self.cache[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.cache.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def set(self, expression: str, versions: tuple, result: Any):
+        """Cache result, evicting the least recently used entry at capacity"""
+        key = (expression, versions)
         if key in self.cache:
-            # Move to end (most recent)
-            self.access_order.remove(key)
-            self.access_order.append(key)
-            return self.cache[key]
-        return None
-    
-    def set(self, expression: str, variables_hash: str, result: Any):
-        """Cache result"""
-        key = f"{expression}|{variables_hash}"
-        
-        # Remove oldest if at capacity
-        if len(self.cache) >= self.max_size and key not in self.cache:
-            oldest = self.access_order.pop(0)
-            del self.cache[oldest]
-        
+            self.cache.move_to_end(key)
+        elif len(self.cache) >= self.max_size:
+            self.cache.popitem(last=False)
+            self.evictions += 1
         self.cache[key] = result
-        if key in self.access_order:
-            self.access_order.remove(key)
-        self.access_order.append(key)
-    
+
+    def stats(self) -> dict:
+        """Hit/miss/eviction counters for reporting"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.cache),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
     def clear(self):
-        """Clear cache"""
+        """Clear cache and reset statistics"""
         self.cache.clear()
-        self.access_order.clear()
\ No newline at end of file
+        self.hits = self.misses = self.evictions = 0
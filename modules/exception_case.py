@@ -1,3 +1,19 @@
 class BreakLoop(Exception):
     """Exception raised to break out of loops"""
-    pass
\ No newline at end of file
+    pass
+
+class ReturnValue(Exception):
+    """Exception used to handle return statements in functions"""
+    def __init__(self, value=None):
+        self.value = value
+
+class LimitExceeded(BaseException):
+    """
+    Raised when a run goes over one of its resource limits (see modules/limits.py)
+    Derives from BaseException so the per-block error handling can't swallow it
+    """
+    pass
+
+class ScriptTimeout(LimitExceeded):
+    """Raised when a script runs past its wall-clock limit"""
+    pass
@@ -1,5 +1,11 @@
-from . import runner
-from .evaluator.context import get_evaluator
+import re
+
+from . import tiering
+from .exception_case import BreakLoop
+from .list_operations import LIST_TYPES
+
+# repeat each item in items in parallel [using N workers]
+PARALLEL_SUFFIX = re.compile(r"(.+?) in parallel(?: using (\S+) workers?)?$")
 
 # evaluator = get_evaluator()
 # evaluate_expression = evaluator.evaluate
@@ -48,8 +54,9 @@ def evaluate(line, variables):
     return var_name, start_value, end_value, step
 
 
-def evaluate_list_loop(line, variables):
+def evaluate_list_loop(line, variables, evaluate_expression):
     # Expected: repeat each item in mylist
+    # Or: repeat each row in csv "file.csv" (rows streamed in chunks)
     if not line.startswith("repeat each "):
         raise SyntaxError("Invalid syntax in 'repeat each' command.")
 
@@ -60,16 +67,61 @@ def evaluate_list_loop(line, variables):
 
     var_name, list_name = map(str.strip, line.split(" in ", 1))
 
+    if list_name.startswith("csv "):
+        from . import csv_
+        path = csv_.parse_path(list_name[4:], variables, evaluate_expression)
+        return var_name, csv_.iter_rows(path)
+
     if list_name not in variables:
         raise NameError(f"List variable '{list_name}' is not defined.")
 
     iterable = variables[list_name]
-    if not isinstance(iterable, list):
+    if not isinstance(iterable, LIST_TYPES):
         raise TypeError(f"Variable '{list_name}' is not a list.")
 
     return var_name, iterable
 
 
+def execute_counting(stmt, variables, rt):
+    # Block handler for 'repeat counting'
+    var_name, start, end, step = evaluate(stmt.text, variables)
+    loop = tiering.Loop(stmt, rt)
+    step_sign = 1 if step > 0 else -1
+    for val in range(start, end + step_sign, step):
+        variables[var_name] = val
+        try:
+            loop.run(variables)
+        except BreakLoop:
+            break
+
+
+def execute_each(stmt, variables, rt):
+    # Block handler for 'repeat each'
+    line = stmt.text
+    in_parallel = PARALLEL_SUFFIX.match(line)
+    if in_parallel:
+        line = in_parallel[1]
+    var_name, iterable = evaluate_list_loop(line, variables, rt.evaluate)
+    body = stmt.body
+    if in_parallel and isinstance(iterable, LIST_TYPES):
+        # Runs sequentially below when the body isn't safe to split up
+        from . import parallel
+        workers = resolve_value(in_parallel[2], variables) if in_parallel[2] else None
+        if parallel.run_each(body, var_name, iterable, variables, rt, workers):
+            return
+    loop = tiering.Loop(stmt, rt)
+    for val in iterable:
+        variables[var_name] = val
+        if isinstance(val, dict):
+            # CSV rows expose their columns as row fields
+            from . import csv_
+            csv_.bind_fields(var_name, val, variables)
+        try:
+            loop.run(variables)
+        except BreakLoop:
+            break
+
+
 # def handle_repeat_block(lines, i, variables):
 #     header = lines[i]
 #     i += 1  # move to body
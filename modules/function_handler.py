@@ -1,19 +1,11 @@
 import contextlib
-from .exception_case import BreakLoop
+from . import runner, tiering
+from .exception_case import BreakLoop, LimitExceeded, ReturnValue
 
-# Global function storage
+# Function storage for the default runtime; each interpreter's Runtime
+# owns its own registry (rt.functions)
 functions = {}
 
-class ReturnValue(Exception):
-    """Exception used to handle return statements in functions"""
-    def __init__(self, value=None):
-        self.value = value
-
-def get_indent_level(line):
-    """Get indentation level of a line"""
-    line_expanded = line.expandtabs(4)
-    return len(line_expanded) - len(line_expanded.lstrip(' '))
-
 def parse_function_definition(line):
     """
     Parse function definition line
@@ -70,69 +62,32 @@ def parse_function_call(line):
     
     return func_name, args
 
-def collect_function_body(lines, start_index):
-    """
-    Collect all lines that belong to a function body
-    Returns: (body_lines, next_line_index)
-    """
-    body_lines = []
-    base_indent = get_indent_level(lines[start_index])
-    
-    i = start_index + 1
-    while i < len(lines):
-        line = lines[i]
-        stripped = line.strip()
-        
-        # Skip empty lines and comments within function
-        if not stripped or stripped.startswith('#') or stripped.startswith('//'):
-            i += 1
-            continue
-        
-        current_indent = get_indent_level(line)
-        
-        # If we hit same or lower indentation, we're done with the function body
-        if current_indent <= base_indent:
-            break
-            
-        body_lines.append(line)
-        i += 1
-    
-    return body_lines, i
-
-def is_function_definition(line):
-    """Check if line is a function definition"""
-    stripped = line.strip()
-    return stripped.startswith('define ')
-
-def is_function_call(line):
-    """Check if line is a function call"""
-    stripped = line.strip()
-    return stripped.startswith('call ')
-
-def register_function(func_name, params, body):
-    """Register a function in the global functions dictionary"""
-    functions[func_name] = {
+def register_function(func_name, params, body, rt=None):
+    """Register a function in the runtime's functions dictionary (global one if no rt)"""
+    if body and isinstance(body[0], str):
+        # Raw source lines: compile them once here rather than on every call
+        body = runner.compile_block(body)
+    registry = rt.functions if rt is not None else functions
+    registry[func_name] = {
         "params": params,
         "body": body
     }
     # print(f"Function '{func_name}' defined with {len(params)} parameters")
 
-def execute_function(func_name, args, global_variables, run_script_func, expression_evaluator_func=None):
+def execute_function(func_name, args, global_variables, rt):
     """
     Execute a user-defined function
     Args:
         func_name: Name of function to execute
         args: List of argument expressions
         global_variables: Global variable scope
-        run_script_func: The run_script function to execute function body
-        expression_evaluator_func: Your existing expression evaluator function (optional)
+        rt: Runtime of the calling interpreter (provides the shared evaluator)
     """
-    if func_name not in functions:
+    func_def = rt.functions.get(func_name)
+    if func_def is None:
         raise Exception(f"Function '{func_name}' is not defined")
     
-    func_def = functions[func_name]
     params = func_def["params"]
-    body = func_def["body"]
     
     # Check argument count
     if len(args) != len(params):
@@ -142,24 +97,26 @@ def execute_function(func_name, args, global_variables, run_script_func, express
     local_variables = global_variables.copy()
     
     # Evaluate arguments and bind to parameters
+    evaluate_expression = rt.evaluate
     for param, arg_expr in zip(params, args):
-        if expression_evaluator_func:
-            # Use your existing expression evaluator if provided
-            try:
-                arg_value = expression_evaluator_func(arg_expr, global_variables)
-            except Exception as e:
-                # Fallback to simple evaluation
-                arg_value = simple_evaluate_expression(arg_expr, global_variables)
-        else:
-            # Use simple built-in evaluator
+        try:
+            arg_value = evaluate_expression(arg_expr, global_variables)
+        except Exception as e:
+            # Fallback to simple evaluation
             arg_value = simple_evaluate_expression(arg_expr, global_variables)
         
         local_variables[param] = arg_value
     
-    # Execute function body
+    return rt.call_function(func_name, func_def, local_variables, rt)
+
+def call_function(func_name, func_def, local_variables, rt):
+    """Run a function body in its bound local scope and return its value"""
+    if rt.depth >= rt.max_depth:
+        raise LimitExceeded(f"Call depth limit of {rt.max_depth} exceeded in '{func_name}'")
+    rt.depth += 1
     try:
-        return_value = run_script_func(body, local_variables)
-        return return_value
+        tiering.run_function(func_def, local_variables, rt)
+        return None
     except ReturnValue as rv:
         return rv.value
     except BreakLoop:
@@ -167,17 +124,37 @@ def execute_function(func_name, args, global_variables, run_script_func, express
         raise Exception("'stop' command cannot be used to exit from functions")
     except Exception as e:
         raise Exception(f"Error in function '{func_name}': {e}")
+    finally:
+        rt.depth -= 1
+
+def handle_definition(stmt, variables, rt):
+    """
+    Handle function definition (block handler)
+    Syntax: define <func_name> with <var1>,<var2>,...
+    The compiled body is registered as-is
+    """
+    func_name, params = parse_function_definition(stmt.text)
+    register_function(func_name, params, stmt.body, rt)
 
-def handle_return_statement(line, variables):
+def handle_call_statement(line, variables, rt):
+    """
+    Handle a function call used as a statement
+    Syntax: call <func_name> with <arg1>,<arg2>,...
+    """
+    func_name, args = parse_function_call(line)
+    if function_exists(func_name, rt):
+        execute_function(func_name, args, variables, rt)
+    else:
+        rt.errors += 1
+        print(f"Function '{func_name}' is not defined", file=rt.stdout)
+
+def handle_return_statement(line, variables, rt):
     """
     Handle return statement
     Syntax: return <expression>
     Or: return
     """
-    from .evaluator.context import get_evaluator
-
-    evaluator = get_evaluator()
-    evaluate_expression = evaluator.evaluate
+    evaluate_expression = rt.evaluate
 
     line = line.strip()
     
@@ -229,15 +206,14 @@ def simple_evaluate_expression(expr, variables):
     except Exception:
         return expr
 
-def get_function_names():
+def get_function_names(rt=None):
     """Get list of all defined function names"""
-    return list(functions.keys())
+    return list((rt.functions if rt is not None else functions).keys())
 
-def function_exists(func_name):
+def function_exists(func_name, rt=None):
     """Check if a function exists"""
-    return func_name in functions
+    return func_name in (rt.functions if rt is not None else functions)
 
-def clear_functions():
+def clear_functions(rt=None):
     """Clear all defined functions (useful for testing)"""
-    global functions
-    functions = {}
\ No newline at end of file
+    (rt.functions if rt is not None else functions).clear()
\ No newline at end of file
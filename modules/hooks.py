@@ -0,0 +1,97 @@
+from .exception_case import BreakLoop, ReturnValue
+
+# Callback signatures:
+#   statement_start(stmt, variables)
+#   statement_end(stmt, variables)             also called when the statement raises
+#   function_enter(func_name, arguments)       arguments: dict of param -> value
+#   function_exit(func_name, return_value)     also called when the body raises (return_value None)
+#   expression(expression, variables, result)
+EVENTS = ('statement_start', 'statement_end', 'function_enter', 'function_exit', 'expression')
+
+
+class Hooks:
+    """
+    Instrumentation callbacks for one runtime
+    Traced executors are swapped into the runtime only while callbacks for
+    their events exist, so an interpreter without hooks runs the plain path
+    """
+
+    def __init__(self, rt):
+        self.rt = rt
+        self.callbacks = {event: [] for event in EVENTS}
+        # Any callbacks registered (compiled code is skipped while tracing)
+        self.active = False
+        self._plain_execute_block = rt.execute_block
+        self._plain_call_function = rt.call_function
+        self._plain_evaluate = rt.evaluate
+
+    def add(self, event, callback):
+        """Register a callback for one of EVENTS"""
+        if event not in self.callbacks:
+            raise ValueError(f"Unknown hook event '{event}' (expected one of: {', '.join(EVENTS)})")
+        self.callbacks[event].append(callback)
+        self._install()
+
+    def remove(self, event, callback):
+        """Unregister a callback; the plain path returns once no callbacks remain"""
+        if event not in self.callbacks:
+            raise ValueError(f"Unknown hook event '{event}' (expected one of: {', '.join(EVENTS)})")
+        self.callbacks[event].remove(callback)
+        self._install()
+
+    def _install(self):
+        rt = self.rt
+        callbacks = self.callbacks
+        self.active = any(callbacks.values())
+        if callbacks['statement_start'] or callbacks['statement_end']:
+            rt.execute_block = self.execute_block
+        else:
+            rt.execute_block = self._plain_execute_block
+        if callbacks['function_enter'] or callbacks['function_exit']:
+            rt.call_function = self.call_function
+        else:
+            rt.call_function = self._plain_call_function
+        rt.evaluate = self.evaluate if callbacks['expression'] else self._plain_evaluate
+
+    def execute_block(self, block, variables, rt):
+        """Traced runner.execute_block"""
+        on_start = self.callbacks['statement_start']
+        on_end = self.callbacks['statement_end']
+        rt.steps += len(block)
+        if rt.steps >= rt.next_check:
+            rt.limits.checkpoint(rt)
+        try:
+            for stmt in block:
+                for callback in on_start:
+                    callback(stmt, variables)
+                try:
+                    stmt.handler(stmt.arg, variables, rt)
+                finally:
+                    for callback in on_end:
+                        callback(stmt, variables)
+        except (BreakLoop, ReturnValue):
+            raise
+        except Exception as e:
+            rt.errors += 1
+            print(f"Error: {e}", file=rt.stdout)
+
+    def call_function(self, func_name, func_def, local_variables, rt):
+        """Traced function_handler.call_function"""
+        if self.callbacks['function_enter']:
+            arguments = {param: local_variables[param] for param in func_def["params"]}
+            for callback in self.callbacks['function_enter']:
+                callback(func_name, arguments)
+        result = None
+        try:
+            result = self._plain_call_function(func_name, func_def, local_variables, rt)
+        finally:
+            for callback in self.callbacks['function_exit']:
+                callback(func_name, result)
+        return result
+
+    def evaluate(self, expression, variables=None):
+        """Traced evaluator.evaluate"""
+        result = self._plain_evaluate(expression, variables)
+        for callback in self.callbacks['expression']:
+            callback(expression, variables, result)
+        return result
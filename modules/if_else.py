@@ -1,7 +1,15 @@
-from . import runner, condition_checker
+from functools import lru_cache
+from . import condition_checker, dispatch
+from .evaluator.context import get_evaluator
 # from commands.operators import operators
 
 def evaluate(line: str, variables: dict) -> bool:
+    # Compiled once per distinct 'if' line, then reused
+    return compile_header(line)(variables, get_evaluator().evaluate)
+
+
+@lru_cache(maxsize=1024)
+def compile_header(line: str):
     # Basic syntax check
     if not line.startswith("if ") or " then" not in line:
         raise SyntaxError("Invalid syntax in 'if' command - missing 'then'")
@@ -10,42 +18,25 @@ def evaluate(line: str, variables: dict) -> bool:
     condition_part = line.strip()[3:].split(" then")[0].strip()
     
     # Pass condition to the condition checker
-    return condition_checker.check_condition(condition_part, variables)
-
-
-
-def handle_if_block(lines, i, variables):
-    try:
-        condition = evaluate(lines[i], variables)
-    except (SyntaxError, ValueError) as e:
-        print(f"Error: {e}")
-        return i + 1
-
-    i += 1  # move to line after 'if ... then'
-
-    if condition:
-        # Run indented block under the if
-        while i < len(lines) and (lines[i].startswith("   ") or lines[i].startswith("\t")):
-            runner.run_script([lines[i].lstrip()], variables)
-            i += 1
-
-        # Check for 'else' for skipping
-        if i < len(lines) and lines[i].strip() == "else":
-            # Skip the else block entirely
-            i += 1
-            while i < len(lines) and (lines[i].startswith("   ") or lines[i].startswith("\t")):
-                i += 1  # just skip
-    else:
-        # Skip indented block
-        while i < len(lines) and (lines[i].startswith("   ") or lines[i].startswith("\t")):
-            i += 1
-
-        # Check for 'else'
-        if i < len(lines) and lines[i].strip() == "else":
-            i += 1
-            while i < len(lines) and (lines[i].startswith("   ") or lines[i].startswith("\t")):
-                runner.run_script([lines[i].lstrip()], variables)
-                i += 1
-
-    return i
+    return condition_checker.compile_condition(condition_part)
+
+
+def execute(stmt, variables, rt):
+    # Block handler: stmt.body is the if block, stmt.orelse the matching else block
+    ladder = dispatch.ladder(stmt)
+    if ladder is not None:
+        # An else-if chain on one variable: jump straight to the branch (see dispatch.py)
+        case = ladder.select(variables, rt)
+        if case is not None:
+            block = ladder.blocks[case]
+            if block:
+                rt.execute_block(block, variables, rt)
+            rt.wait_for_tasks()
+            return
+
+    if compile_header(stmt.text)(variables, rt.evaluate):
+        if stmt.body:
+            rt.execute_block(stmt.body, variables, rt)
+    elif stmt.orelse:
+        rt.execute_block(stmt.orelse, variables, rt)
 
@@ -0,0 +1,73 @@
+def create_evaluator():
+    """A new evaluator with the custom operators registered"""
+    from .evaluator.main import NaturalLanguageEvaluator
+    from . import custom_operators
+
+    evaluator = NaturalLanguageEvaluator()
+    custom_operators.register_custom_operators(evaluator)
+    return evaluator
+
+
+class ZENOLangInterpreter:
+    """
+    One isolated ZENOLang session: variables, functions, evaluator and I/O
+    streams all belong to the instance, so interpreters can run in parallel threads
+    """
+    def __init__(self, stdout=None, stdin=None):
+        from .evaluator.utils import VariableScope
+        from .runtime import Runtime
+
+        self.evaluator = create_evaluator()
+        self.variables = VariableScope()
+        self.runtime = Runtime(self.evaluator, stdout=stdout, stdin=stdin)
+
+    def run(self, lines, max_statements=None, max_depth=None, max_size=None, timeout=None):
+        """
+        Run source lines in this session
+        Optional limits stop the run with LimitExceeded (ScriptTimeout for
+        timeout) instead of letting it loop or grow forever; see modules/limits.py
+        """
+        self.run_compiled(self.compile(lines), max_statements, max_depth, max_size, timeout)
+
+    def reset(self):
+        """Start a fresh session: no variables, functions or errors; the evaluator stays warm"""
+        from .evaluator.utils import VariableScope
+
+        self.variables = VariableScope()
+        self.runtime.functions.clear()
+        self.runtime.errors = 0
+
+    @staticmethod
+    def compile(lines, first_lineno=1):
+        """Compile source lines once; the result can be run by any number of interpreters"""
+        from . import runner
+        return runner.compile_block(lines, first_lineno)
+
+    def run_compiled(self, program, max_statements=None, max_depth=None, max_size=None, timeout=None):
+        """Run a program returned by compile(), with the same optional limits as run()"""
+        rt = self.runtime
+        if max_statements is None and max_depth is None and max_size is None and timeout is None:
+            rt.execute_block(program, self.variables, rt)
+            rt.wait_for_tasks()
+            return
+
+        from .limits import Limits
+        limits = Limits(max_statements, max_depth, max_size, timeout)
+        limits.start(rt)
+        try:
+            rt.execute_block(program, self.variables, rt)
+            rt.wait_for_tasks()
+        finally:
+            limits.stop(rt)
+
+    def add_hook(self, event, callback):
+        """
+        Register an instrumentation callback
+        Events: statement_start, statement_end, function_enter, function_exit, expression
+        (see modules/hooks.py for callback signatures)
+        """
+        self.runtime.hooks.add(event, callback)
+
+    def remove_hook(self, event, callback):
+        """Unregister a callback added with add_hook"""
+        self.runtime.hooks.remove(event, callback)
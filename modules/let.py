@@ -1,12 +1,9 @@
-import re
-from .evaluator.main import NaturalLanguageEvaluator
 from . import function_handler
 
 
 
-def execute(line, variables, run_script_func=None):
-    evaluator = NaturalLanguageEvaluator()
-    evaluate_expression = evaluator.evaluate
+def execute(line, variables, rt):
+    evaluate_expression = rt.evaluate
     parts = line[4:].split(" be ")
     if len(parts) != 2:
         raise SyntaxError("Invalid syntax in 'let' command")
@@ -22,13 +19,10 @@ def execute(line, variables, run_script_func=None):
         value = evaluate_expression(value_str, variables)
     elif value_str.startswith('call '):
         # Handle function call
-        if run_script_func is None:
-            raise Exception("Function calls in 'let' require run_script_func to be passed")
-        
         try:
             func_name, args = function_handler.parse_function_call(value_str)
-            if function_handler.function_exists(func_name):
-                value = function_handler.execute_function(func_name, args, variables, run_script_func, evaluate_expression)
+            if function_handler.function_exists(func_name, rt):
+                value = function_handler.execute_function(func_name, args, variables, rt)
                 # print(f"Function '{func_name}' returned: {value}")
             else:
                 raise Exception(f"Function '{func_name}' is not defined")
@@ -47,4 +41,7 @@ def execute(line, variables, run_script_func=None):
         # print(f"Evaluating expression for variable '{var_name}': {value_str}")
         value = evaluate_expression(value_str, variables)
 
+    if rt.max_size is not None:
+        from .limits import check_size
+        check_size(rt, var_name, value)
     variables[var_name] = value
\ No newline at end of file
@@ -0,0 +1,75 @@
+import time
+from array import array
+
+from .exception_case import LimitExceeded, ScriptTimeout
+
+# Statements executed between checks of the statement budget and the deadline
+CHECK_INTERVAL = 256
+
+UNLIMITED = float('inf')
+
+# Values max_size applies to ('load csv' columns are arrays)
+SIZED_TYPES = (str, list, array)
+
+
+class Limits:
+    """
+    Resource limits for one interpreter run; None means unlimited
+
+    max_statements: statements executed (counted as each block starts)
+    max_depth:      nested function calls
+    max_size:       length of any list or string stored in a variable
+    timeout:        wall-clock seconds from the start of the run
+
+    The runtime keeps the counters. Executing a block costs one addition and
+    one comparison; the budget and the clock are only looked at every
+    CHECK_INTERVAL statements, so the checks can stay on in production.
+    """
+
+    def __init__(self, max_statements=None, max_depth=None, max_size=None, timeout=None):
+        self.max_statements = max_statements
+        self.max_depth = max_depth
+        self.max_size = max_size
+        self.timeout = timeout
+        self.deadline = None
+
+    def start(self, rt):
+        """Reset the runtime's counters and arm the limits"""
+        rt.limits = self
+        rt.steps = 0
+        rt.depth = 0
+        rt.max_depth = self.max_depth if self.max_depth is not None else UNLIMITED
+        rt.max_size = self.max_size
+        self.deadline = time.monotonic() + self.timeout if self.timeout is not None else None
+        rt.next_check = self._next_check(0)
+
+    def stop(self, rt):
+        """Disarm: the runtime goes back to unlimited"""
+        rt.limits = None
+        rt.max_depth = UNLIMITED
+        rt.max_size = None
+        rt.next_check = UNLIMITED
+
+    def _next_check(self, steps):
+        if self.deadline is not None:
+            next_check = steps + CHECK_INTERVAL
+        else:
+            next_check = UNLIMITED
+        if self.max_statements is not None:
+            next_check = min(next_check, self.max_statements + 1)
+        return next_check
+
+    def checkpoint(self, rt):
+        """Called by the executor once rt.steps reaches rt.next_check"""
+        if self.max_statements is not None and rt.steps > self.max_statements:
+            raise LimitExceeded(f"Statement limit of {self.max_statements} exceeded")
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise ScriptTimeout(f"Time limit of {self.timeout:g}s exceeded")
+        rt.next_check = self._next_check(rt.steps)
+
+
+def check_size(rt, name, value):
+    """Raise if value (about to be stored in name) is a list or string over the size limit"""
+    if isinstance(value, SIZED_TYPES) and len(value) > rt.max_size:
+        kind = "String" if isinstance(value, str) else "List"
+        raise LimitExceeded(f"{kind} '{name}' exceeds the size limit of {rt.max_size}")
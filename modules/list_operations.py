@@ -1,13 +1,88 @@
-import contextlib
 import re
+from array import array
+from bisect import bisect_left
 
-from .evaluator.context import get_evaluator
+from .exception_case import LimitExceeded
 
+# Plain lists plus the compact typed columns produced by 'load csv'
+LIST_TYPES = (list, array)
 
 
-def handle_list_command(line, variables):
-    evaluator = get_evaluator()
-    evaluate_expression = evaluator.evaluate
+def _append_to_column(variables, list_name, column, value):
+    """
+    Append to a typed 'load csv' column, widening it when the value doesn't fit
+    A widened column is a new object, so rebind it everywhere the old one was bound
+    """
+    from . import csv_
+    widened = csv_.append_value(column, value)
+    if widened is column:
+        return
+    variables[list_name] = widened
+    owner, _, name = list_name.rpartition('.')
+    columns = variables.get(owner)
+    if isinstance(columns, dict) and columns.get(name) is column:
+        columns[name] = widened
+
+
+def append_item(variables, list_name, target_list, value, rt):
+    """Append value to the list bound to list_name, honouring the size limit"""
+    if rt.max_size is not None and len(target_list) >= rt.max_size:
+        raise LimitExceeded(f"List '{list_name}' exceeds the size limit of {rt.max_size}")
+    if isinstance(target_list, array):
+        _append_to_column(variables, list_name, target_list, value)
+    else:
+        target_list.append(value)
+
+
+def sort_key(key_name, operators):
+    """'by <key>': a one-value operator (length, lower, ...) or the named field of each item"""
+    if key_name is None:
+        return None
+    func = operators.get(key_name)
+    if func is not None:
+        return func
+
+    def field(item):
+        try:
+            return item[key_name]
+        except (KeyError, IndexError, TypeError):
+            raise ValueError(f"Cannot sort by '{key_name}': {item!r} has no such field") from None
+    return field
+
+
+def sort_list(items, key=None, descending=False):
+    """Sort in place (Timsort, stable); typed columns keep their array type"""
+    try:
+        if isinstance(items, array):
+            items[:] = array(items.typecode, sorted(items, key=key, reverse=descending))
+        else:
+            items.sort(key=key, reverse=descending)
+    except TypeError as e:
+        raise TypeError(f"Cannot sort these values: {e}") from None
+
+
+def position_of(value, items):
+    """'position of <value> in <list>': index of the first equal item, or -1"""
+    if not isinstance(items, LIST_TYPES):
+        raise TypeError(f"'position of' needs a list, got {items!r}")
+    try:
+        return items.index(value)
+    except (ValueError, TypeError):
+        return -1
+
+
+def position_in_sorted(value, items):
+    """'position of <value> in sorted <list>': binary search of an ascending list, or -1"""
+    if not isinstance(items, LIST_TYPES):
+        raise TypeError(f"'position of' needs a list, got {items!r}")
+    index = bisect_left(items, value)
+    if index < len(items) and items[index] == value:
+        return index
+    return -1
+
+
+def handle_list_command(line, variables, rt):
+    evaluate_expression = rt.evaluate
     if line.startswith("add "):
         match = re.match(r"add (.+) to (.+)", line)
         if not match:
@@ -17,10 +92,10 @@ def handle_list_command(line, variables):
         if list_name not in variables:
             raise NameError(f"List variable '{list_name}' not defined")
         target_list = variables[list_name]
-        if not isinstance(target_list, list):
+        if not isinstance(target_list, LIST_TYPES):
             raise TypeError(f"Variable '{list_name}' is not a list")
         value = evaluate_expression(value_expr.strip(), variables)
-        target_list.append(value)
+        append_item(variables, list_name, target_list, value, rt)
 
     elif line.startswith("remove "):
         match = re.match(r"remove (.+) from (.+)", line)
@@ -31,11 +106,13 @@ def handle_list_command(line, variables):
         if list_name not in variables:
             raise NameError(f"List variable '{list_name}' not defined")
         target_list = variables[list_name]
-        if not isinstance(target_list, list):
+        if not isinstance(target_list, LIST_TYPES):
             raise TypeError(f"Variable '{list_name}' is not a list")
         value = evaluate_expression(value_expr.strip(), variables)
-        with contextlib.suppress(ValueError):
+        try:
             target_list.remove(value)
+        except ValueError:
+            pass
     elif line.startswith("length of "):
         match = re.match(r"length of (.+)", line)
         if not match:
@@ -44,7 +121,7 @@ def handle_list_command(line, variables):
         if list_name not in variables:
             raise NameError(f"List variable '{list_name}' not defined")
         target_list = variables[list_name]
-        if not isinstance(target_list, list):
+        if not isinstance(target_list, LIST_TYPES):
             raise TypeError(f"Variable '{list_name}' is not a list")
         variables["_last_length"] = len(target_list)
 
@@ -57,12 +134,24 @@ def handle_list_command(line, variables):
         if list_name not in variables:
             raise NameError(f"List variable '{list_name}' not defined")
         target_list = variables[list_name]
-        if not isinstance(target_list, list):
+        if not isinstance(target_list, LIST_TYPES):
             raise TypeError(f"Variable '{list_name}' is not a list")
         index = int(evaluate_expression(index_expr.strip(), variables))
         if index < 0 or index >= len(target_list):
             raise IndexError("Index out of range")
         variables[var_name.strip()] = target_list[index]
 
+    elif line.startswith("sort "):
+        match = re.match(r"sort (\S+)( descending)?(?: by (\S+))?$", line)
+        if not match:
+            raise SyntaxError("Invalid syntax for 'sort' command (expected: sort <list> [descending] [by <key>])")
+        list_name, descending, key_name = match.groups()
+        if list_name not in variables:
+            raise NameError(f"List variable '{list_name}' not defined")
+        target_list = variables[list_name]
+        if not isinstance(target_list, LIST_TYPES):
+            raise TypeError(f"Variable '{list_name}' is not a list")
+        sort_list(target_list, sort_key(key_name, rt.evaluator.evaluator.operators), descending is not None)
+
     else:
         raise SyntaxError("Unknown list operation")
@@ -0,0 +1,255 @@
+"""
+repeat each <item> in <list> in parallel [using N workers]
+
+The loop body runs in a pool of worker processes when static analysis
+shows every item can be computed on its own:
+
+- the body only reads variables that existed before the loop, apart from
+  names it assigns unconditionally before any use ("private" names, such
+  as the loop variable and temporaries)
+- the only shared writes are 'add <value> to <list>' on result lists
+  that the body doesn't otherwise use
+- it doesn't ask for input, stop, return, define functions, load files,
+  or call functions that change lists
+
+Each worker runs its items against a copy of the variables. Output, error
+counts and appended values come back per item and are merged in list
+order, so the result is the same as running the loop sequentially.
+Anything the analysis can't prove safe simply runs sequentially.
+"""
+
+import io
+import os
+import pickle
+import re
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from . import list_operations, runner
+
+# Names as they can appear in expressions (including row.column fields)
+NAME = re.compile(r"[A-Za-z_][\w.]*")
+
+# Chunks handed out per worker, so uneven items still balance
+CHUNKS_PER_WORKER = 4
+
+# Statements that never write variables or lists
+READ_ONLY = ('say',)
+# Statements a parallel body may never contain
+FORBIDDEN = ('ask', 'stop', 'return', 'define', 'load csv', 'else')
+
+
+class NotParallelizable(Exception):
+    """The loop body can't be shown to be safe to run in parallel"""
+    pass
+
+
+class _Analysis:
+    def __init__(self, var_name, functions):
+        self.functions = functions
+        self.private = {var_name}
+        # Every name mentioned so far, in execution order
+        self.seen = {var_name}
+        self.results = {}
+        self.checked_functions = set()
+
+    def mention(self, text):
+        self.seen.update(NAME.findall(text))
+
+    def write(self, name, unconditional, value_text=""):
+        """Record an assignment; only names the body owns may be assigned"""
+        if name in self.private:
+            self.mention(value_text)
+            return
+        if name in self.results:
+            raise NotParallelizable(f"'{name}' is both a result list and assigned")
+        if not unconditional or name in self.seen or name in NAME.findall(value_text):
+            raise NotParallelizable(f"'{name}' is shared between items")
+        self.mention(value_text)
+        self.private.add(name)
+        self.seen.add(name)
+
+    def block(self, block, unconditional):
+        for stmt in block:
+            self.statement(stmt, unconditional)
+
+    def statement(self, stmt, unconditional):
+        text = stmt.text
+        keyword = runner.keyword_of(text)
+        if keyword in FORBIDDEN:
+            raise NotParallelizable(f"'{keyword}' at line {stmt.lineno}")
+
+        if keyword in READ_ONLY:
+            self.mention(text)
+        elif keyword == 'let':
+            name, _, value = text[4:].partition(" be ")
+            if value.strip().startswith("call "):
+                self.call(value.strip(), stmt.lineno)
+            self.write(name.strip(), unconditional, value)
+        elif keyword == 'call':
+            self.call(text, stmt.lineno)
+            self.mention(text)
+        elif keyword == 'add':
+            match = re.match(r"add (.+) to (.+)", text)
+            if not match:
+                raise NotParallelizable(f"Invalid 'add' at line {stmt.lineno}")
+            self.mention(match[1])
+            self.append(match[2].strip())
+        elif keyword == 'remove':
+            match = re.match(r"remove (.+) from (.+)", text)
+            if not match or match[2].strip() not in self.private:
+                raise NotParallelizable(f"'remove' from a shared list at line {stmt.lineno}")
+            self.mention(match[1])
+        elif keyword == 'length of':
+            self.mention(text[len("length of "):])
+            self.write("_last_length", unconditional)
+        elif keyword == 'at':
+            match = re.match(r"(.+) at (.+) in (.+)", text)
+            if not match:
+                raise NotParallelizable(f"Invalid 'at' at line {stmt.lineno}")
+            self.mention(match[2] + " " + match[3])
+            self.write(match[1].strip(), unconditional)
+        elif keyword in ('repeat each', 'repeat counting'):
+            loop_var, _, rest = text.split(None, 2)[2].partition(
+                " in " if keyword == 'repeat each' else " from ")
+            self.write(loop_var.strip(), unconditional, rest)
+            # The body may run zero or many times
+            self.block(stmt.body, False)
+        elif keyword in ('if', 'while'):
+            self.mention(text)
+            self.block(stmt.body, False)
+            self.block(stmt.orelse or (), False)
+        elif keyword == 'match':
+            self.mention(text)
+            for case in stmt.body or ():
+                self.block(case.body or (), False)
+        else:
+            raise NotParallelizable(f"'{keyword}' at line {stmt.lineno}")
+
+    def append(self, list_name):
+        if list_name not in self.private:
+            self.results[list_name] = True
+
+    def call(self, text, lineno):
+        from .function_handler import parse_function_call
+
+        func_name, _ = parse_function_call(text)
+        self.function(func_name, lineno)
+
+    def function(self, func_name, lineno):
+        """Functions run in their own scope, but must not change lists or read input"""
+        if func_name in self.checked_functions:
+            return
+        self.checked_functions.add(func_name)
+        func_def = self.functions.get(func_name)
+        if func_def is None:
+            return
+        for stmt in _walk(func_def["body"]):
+            keyword = runner.keyword_of(stmt.text)
+            if keyword in ('add', 'remove', 'ask', 'define', 'load csv'):
+                raise NotParallelizable(f"Function '{func_name}' uses '{keyword}' (called at line {lineno})")
+            if keyword == 'call' or (keyword == 'let' and " be call " in stmt.text):
+                from .function_handler import parse_function_call
+                self.function(parse_function_call(stmt.text[stmt.text.index("call "):])[0], lineno)
+
+
+def _walk(block):
+    for stmt in block:
+        yield stmt
+        if stmt.body:
+            yield from _walk(stmt.body)
+        if stmt.orelse:
+            yield from _walk(stmt.orelse)
+
+
+def analyze(body, var_name, functions):
+    """
+    Check a 'repeat each' body for parallel execution
+    Returns: (private names, result list names)
+    Raises: NotParallelizable with the reason when items may depend on each other
+    """
+    analysis = _Analysis(var_name, functions)
+    analysis.block(body, True)
+    for name in analysis.results:
+        if name in analysis.seen:
+            raise NotParallelizable(f"Result list '{name}' is also read in the loop")
+    return analysis.private, list(analysis.results)
+
+
+# Per worker process: (runtime, body, var_name, items, variables, private, results)
+_worker = None
+
+
+def _init_worker(evaluator, functions, body, var_name, items, variables, private, results):
+    global _worker
+    from .runtime import Runtime
+
+    _worker = (Runtime(evaluator, functions=functions), body, var_name, items, variables, private, results)
+
+
+def _run_items(task):
+    """Run items[start:stop]; returns per-item (output, errors, appended values, final private values)"""
+    start, stop, last = task
+    rt, body, var_name, items, shared, private, results = _worker
+    done = []
+    for index in range(start, stop):
+        rt.stdout = io.StringIO()
+        rt.errors = 0
+        variables = shared.copy()
+        variables[var_name] = items[index]
+        appended = {}
+        for name in results:
+            variables[name] = appended[name] = []
+        rt.execute_block(body, variables, rt)
+        final = {name: variables[name] for name in private if name in variables} if index == last else None
+        done.append((rt.stdout.getvalue(), rt.errors, appended, final))
+    return done
+
+
+def _chunks(count, workers):
+    chunks = min(count, workers * CHUNKS_PER_WORKER)
+    bounds = [count * n // chunks for n in range(chunks + 1)]
+    return [(bounds[n], bounds[n + 1], count - 1) for n in range(chunks)]
+
+
+def run_each(body, var_name, items, variables, rt, workers=None):
+    """
+    Run a 'repeat each' body over items in worker processes
+    Returns: False (having done nothing) when the loop must run sequentially
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers < 2 or len(items) < 2 or _worker is not None:
+        # Nested parallel loops already run inside a worker
+        return False
+    if rt.limits is not None or rt.execute_block is not runner.execute_block:
+        # Limits and hooks only see statements run in this process
+        return False
+    try:
+        private, results = analyze(body, var_name, rt.functions)
+    except NotParallelizable:
+        return False
+    for name in results:
+        if not isinstance(variables.get(name), list_operations.LIST_TYPES) or variables[name] is items:
+            return False
+
+    try:
+        with ProcessPoolExecutor(
+                max_workers=min(workers, len(items)), initializer=_init_worker,
+                initargs=(rt.evaluator, rt.functions, body, var_name, items, variables, private, results)) as pool:
+            chunks = list(pool.map(_run_items, _chunks(len(items), workers)))
+    except (BrokenProcessPool, pickle.PicklingError, AttributeError):
+        # Workers couldn't be started with this state (e.g. unpicklable handlers under spawn)
+        return False
+
+    # Merge in item order
+    for chunk in chunks:
+        for output, errors, appended, final in chunk:
+            if output:
+                print(output, end="", file=rt.stdout)
+            rt.errors += errors
+            for name, values in appended.items():
+                for value in values:
+                    list_operations.append_item(variables, name, variables[name], value, rt)
+            if final is not None:
+                variables.update(final)
+    return True
@@ -0,0 +1,95 @@
+import json
+import time
+
+
+class LineProfiler:
+    """
+    Per-source-line profiler for ZENOLang scripts
+    Records hit count, total (inclusive) and self (exclusive) wall time per line
+    """
+
+    def __init__(self):
+        # lineno -> [hits, total_seconds, self_seconds, source_text]
+        self.stats = {}
+        self.elapsed = 0.0
+        self._stack = []
+        self._active = {}
+
+    def attach(self, rt):
+        """Start profiling every statement the runtime executes"""
+        rt.hooks.add('statement_start', self.statement_start)
+        rt.hooks.add('statement_end', self.statement_end)
+
+    def detach(self, rt):
+        rt.hooks.remove('statement_start', self.statement_start)
+        rt.hooks.remove('statement_end', self.statement_end)
+
+    def statement_start(self, stmt, variables):
+        lineno = stmt.lineno
+        # [start, time spent in nested statements]
+        self._stack.append([time.perf_counter(), 0.0])
+        self._active[lineno] = self._active.get(lineno, 0) + 1
+
+    def statement_end(self, stmt, variables):
+        start, nested = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        lineno = stmt.lineno
+        self._active[lineno] -= 1
+        entry = self.stats.get(lineno)
+        if entry is None:
+            entry = self.stats[lineno] = [0, 0.0, 0.0, stmt.text]
+        entry[0] += 1
+        entry[2] += elapsed - nested
+        # Recursive calls re-enter the same line; count inclusive time once
+        if not self._active[lineno]:
+            entry[1] += elapsed
+        if self._stack:
+            self._stack[-1][1] += elapsed
+
+    def run(self, func, *args):
+        """Call func(*args) and record the overall wall time"""
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.elapsed += time.perf_counter() - start
+
+    def rows(self):
+        """Per-line results sorted by self time (slowest first)"""
+        total = self.elapsed or sum(entry[2] for entry in self.stats.values()) or 1.0
+        rows = [
+            {
+                "line": lineno,
+                "hits": hits,
+                "total_ms": total_s * 1000,
+                "self_ms": self_s * 1000,
+                "percent": self_s / total * 100,
+                "source": text,
+            }
+            for lineno, (hits, total_s, self_s, text) in self.stats.items()
+        ]
+        rows.sort(key=lambda row: (-row["self_ms"], row["line"]))
+        return rows
+
+    def format_table(self, limit=None):
+        rows = self.rows()[:limit] if limit else self.rows()
+        lines = [
+            f"{'line':>6} {'hits':>9} {'total ms':>11} {'self ms':>11} {'%':>7}  source",
+            "-" * 72,
+        ]
+        for row in rows:
+            lines.append(
+                f"{row['line']:>6} {row['hits']:>9} {row['total_ms']:>11.3f} "
+                f"{row['self_ms']:>11.3f} {row['percent']:>6.1f}%  {row['source']}"
+            )
+        lines.append("-" * 72)
+        lines.append(f"Total wall time: {self.elapsed * 1000:.3f} ms")
+        return "\n".join(lines)
+
+    def write_json(self, path, script=None):
+        with open(path, 'w') as f:
+            json.dump({
+                "script": script,
+                "total_ms": self.elapsed * 1000,
+                "lines": self.rows(),
+            }, f, indent=2)
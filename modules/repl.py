@@ -0,0 +1,92 @@
+"""
+Interactive session
+
+    zeno            (or zeno --repl)
+
+Each input chunk is compiled on its own and run in one long-lived
+interpreter, so variables and functions stay defined between inputs and
+nothing typed earlier is parsed or run again. A line that opens a block
+(if, while, repeat, define) continues until an empty line.
+"""
+
+from . import runner
+from .interpreter import ZENOLangInterpreter
+
+PROMPT = "zeno> "
+CONTINUE_PROMPT = "...   "
+EXIT_COMMANDS = ("exit", "quit")
+
+
+class Repl:
+    """Feeds lines typed at a prompt to a persistent ZENOLangInterpreter"""
+
+    def __init__(self, interpreter=None):
+        self.interpreter = interpreter if interpreter is not None else ZENOLangInterpreter()
+        self.pending = []
+        # Session line numbers, so error messages point at what was typed
+        self.lineno = 1
+
+    def push(self, line):
+        """
+        Add one input line; a complete chunk is compiled and run right away
+        Returns: True while the current block needs more lines
+        """
+        stripped = line.strip()
+        if self.pending:
+            if stripped:
+                self.pending.append(line)
+                return True
+            self.run_pending()
+            self.lineno += 1
+            return False
+
+        if runner.is_blank_or_comment(stripped):
+            self.lineno += 1
+            return False
+        self.pending.append(line)
+        entry = runner.resolve_statement(stripped)
+        if entry is not None and entry[1]:
+            return True
+        self.run_pending()
+        return False
+
+    def run_pending(self):
+        """Compile and run the buffered chunk, then start a new one"""
+        lines, self.pending = self.pending, []
+        program = self.interpreter.compile(lines, self.lineno)
+        self.lineno += len(lines)
+        self.interpreter.run_compiled(program)
+
+    def reset(self):
+        """Drop a half-typed block"""
+        self.pending = []
+
+    def interact(self, banner="ZENOLang Interpreter v1.0 - type 'exit' to leave"):
+        """Read lines with input() until EOF or 'exit'"""
+        print(banner)
+        while True:
+            try:
+                line = input(CONTINUE_PROMPT if self.pending else PROMPT)
+            except EOFError:
+                print()
+                if self.pending:
+                    self.run_pending()
+                return
+            except KeyboardInterrupt:
+                print("\nKeyboardInterrupt")
+                self.reset()
+                continue
+
+            if not self.pending and line.strip() in EXIT_COMMANDS:
+                return
+            try:
+                self.push(line)
+            except KeyboardInterrupt:
+                # Ctrl-C stops a running chunk but keeps the session
+                print("\nKeyboardInterrupt")
+                self.reset()
+
+
+def main():
+    Repl().interact()
+    return 0
@@ -1,276 +1,188 @@
+import importlib
+from .exception_case import BreakLoop, ReturnValue
+from .runtime import default_runtime
 
-from . import let, say, ask, if_else, while_, for_, list_operations
-from .exception_case import BreakLoop
-from . import function_handler
-from .function_handler import ReturnValue
 
+# Statement registry: first keyword (or first two words, e.g. 'repeat each') -> handler
+STATEMENTS = {}
 
-def get_indent_level(line):
-    # Convert tabs to spaces (4 spaces per tab)
-    line_expanded = line.expandtabs(4)
-    return len(line_expanded) - len(line_expanded.lstrip(' '))
-
-def find_matching_else(lines, if_line_index, if_indent):
-    """Find the else that matches the if at if_line_index"""
-    i = if_line_index + 1
-    while i < len(lines):
-        line = lines[i].strip()
-        if not line or line.startswith('#') or line.startswith('//'):
-            i += 1
-            continue
-
-        current_indent = get_indent_level(lines[i])
-
-        # If we hit same indentation level
-        if current_indent == if_indent and line == 'else':
-            return i
-        elif current_indent == if_indent or current_indent < if_indent:
-            # Hit another statement at same level, no else
-            return None
-        i += 1
-    return None
-
-def run_script(lines, variables):  # sourcery skip: use-contextlib-suppress
-    i = 0
-    return_value = None
-
-    while i < len(lines):
-        line = lines[i].rstrip('\n')
-        indent = get_indent_level(line)
-        stripped = line.strip()
-
-        # Skip empty lines and comments
-        if not stripped or stripped.startswith(('#', '//')):
-            i += 1
-            continue
+def register_statement(keyword, handler, block=False, with_else=False):
+    """
+    Register a statement handler keyed by its leading keyword(s)
 
-        try:
-            if stripped.startswith('let '):
-                let.execute(stripped, variables, run_script)
-                i += 1
+    Simple handlers are called as handler(line, variables, rt).
+    Block handlers (block=True) own the indented lines below them and are called
+    as handler(stmt, variables, rt) with the compiled body in stmt.body
+    (and the matching 'else' block in stmt.orelse when with_else=True).
+    rt.evaluator is the interpreter's single shared evaluator.
 
-            elif stripped.startswith('say '):
-                say.execute(stripped, variables)
-                i += 1
+    handler may also be a 'module:function' string; the module is imported
+    the first time a script uses the keyword.
+    """
+    STATEMENTS[keyword] = (handler, block, with_else)
 
-            elif stripped.startswith('ask '):
-                ask.execute(stripped, variables)
-                i += 1
+def import_handler(spec):
+    """Import a 'module:function' handler spec (module relative to this package)"""
+    module_name, _, attr = spec.partition(':')
+    return getattr(importlib.import_module(module_name, __package__), attr)
 
-            elif stripped.startswith('return'):
-                # Handle return statement using function_handler
-                # You'll need to pass your expression evaluator here
-                function_handler.handle_return_statement(stripped, variables)
 
-            elif stripped.startswith('if '):
-                condition = if_else.evaluate(stripped, variables)
+class Statement:
+    """A compiled source line with its handler already resolved"""
+    __slots__ = ('lineno', 'text', 'handler', 'arg', 'body', 'orelse', 'hits', 'compiled')
 
-                # Find all lines in the if block
-                if_block = []
-                else_block = []
-                j = i + 1
+    def __init__(self, lineno, text, handler):
+        self.lineno = lineno
+        self.text = text
+        self.handler = handler
+        self.arg = text
+        self.body = None
+        self.orelse = None
+        # Loop statements: body runs so far, and the compiled body once hot (see tiering.py).
+        # 'if' and 'match' keep their dispatch table in compiled (see dispatch.py)
+        self.hits = 0
+        self.compiled = None
 
-                # Collect if block
-                while j < len(lines):
-                    current_line = lines[j].strip()
-                    if not current_line or current_line.startswith('#') or current_line.startswith('//'):
-                        j += 1
-                        continue
 
-                    current_indent = get_indent_level(lines[j])
-
-                    if current_indent <= indent:
-                        break
-
-                    if_block.append(lines[j])
-                    j += 1
-
-                # Check if there's an else at the same indentation level
-                else_index = find_matching_else(lines, i, indent)
-                if else_index is not None:
-                    # Collect else block
-                    j = else_index + 1
-                    while j < len(lines):
-                        current_line = lines[j].strip()
-                        if not current_line or current_line.startswith('#') or current_line.startswith('//'):
-                            j += 1
-                            continue
-
-                        current_indent = get_indent_level(lines[j])
-
-                        if current_indent <= indent:
-                            break
-
-                        else_block.append(lines[j])
-                        j += 1
-
-                # Execute the appropriate block
-                if condition:
-                    if if_block:
-                        try:
-                            run_script(if_block, variables)
-                        except (BreakLoop, ReturnValue):
-                            raise
-                elif else_block:
-                    try:
-                        run_script(else_block, variables)
-                    except (BreakLoop, ReturnValue):
-                        raise
+def get_indent_level(line):
+    # Convert tabs to spaces (4 spaces per tab)
+    line_expanded = line.expandtabs(4)
+    return len(line_expanded) - len(line_expanded.lstrip(' '))
 
-                i = j
+def is_blank_or_comment(stripped):
+    return not stripped or stripped.startswith(('#', '//'))
+
+def resolve_statement(stripped):
+    """Find the registry entry for a line: two-word keywords win over one-word ones"""
+    words = stripped.split(None, 2)
+    keyword = words[0]
+    entry = None
+    if len(words) > 1:
+        entry = STATEMENTS.get(f"{words[0]} {words[1]}")
+        if entry is not None:
+            keyword = f"{words[0]} {words[1]}"
+    if entry is None:
+        entry = STATEMENTS.get(keyword)
+    if entry is not None and isinstance(entry[0], str):
+        # Lazily registered: import once, then keep the real handler
+        entry = (import_handler(entry[0]),) + entry[1:]
+        STATEMENTS[keyword] = entry
+    return entry
+
+def keyword_of(text):
+    """Leading keyword(s) of a statement, as registered in STATEMENTS ('at' for list indexing)"""
+    words = text.split(None, 2)
+    if len(words) > 1 and f"{words[0]} {words[1]}" in STATEMENTS:
+        return f"{words[0]} {words[1]}"
+    if words[0] in STATEMENTS:
+        return words[0]
+    if " at " in text and " in " in text:
+        return 'at'
+    return words[0]
+
+def compile_block(lines, first_lineno=1):
+    """Compile source lines into a list of Statements (blocks nested by indentation)"""
+    entries = []
+    for offset, line in enumerate(lines):
+        stripped = line.strip()
+        if not is_blank_or_comment(stripped):
+            entries.append((first_lineno + offset, get_indent_level(line), stripped))
+    return _compile_entries(entries, 0, len(entries))
+
+def _block_end(entries, start, end, indent):
+    while start < end and entries[start][1] > indent:
+        start += 1
+    return start
+
+def _compile_entries(entries, start, end):
+    block = []
+    i = start
+    while i < end:
+        lineno, indent, stripped = entries[i]
+        i += 1
+        entry = resolve_statement(stripped)
 
+        if entry is None:
+            if " at " in stripped and " in " in stripped:
+                stmt = Statement(lineno, stripped, import_handler('.list_operations:handle_list_command'))
             elif stripped == 'else':
-                print(f"Unexpected 'else' at line {i+1} - this should be handled by if statement")
-                i += 1
-
-            elif stripped.startswith('while '):
-                # Collect the while block
-                while_block = []
-                j = i + 1
-
-                while j < len(lines):
-                    current_line = lines[j].strip()
-                    if not current_line or current_line.startswith('#') or current_line.startswith('//'):
-                        j += 1
-                        continue
-
-                    current_indent = get_indent_level(lines[j])
-
-                    if current_indent <= indent:
-                        break
-
-                    while_block.append(lines[j])
-                    j += 1
-
-                try:
-                    while while_.evaluate(stripped, variables):
-                        if while_block:
-                            try:
-                                run_script(while_block, variables)
-                            except BreakLoop:
-                                break
-                            except ReturnValue:
-                                raise
-                except BreakLoop:
-                    pass
-
-                i = j
-
-            elif stripped.startswith('repeat counting '):
-                indent = get_indent_level(lines[i])
-                var_name, start, end, step = for_.evaluate(stripped, variables)
-
-                # Collect the repeat block
-                repeat_block = []
-                j = i + 1
-                while j < len(lines):
-                    current_line = lines[j].strip()
-                    if not current_line or current_line.startswith('#') or current_line.startswith('//'):
-                        j += 1
-                        continue
-
-                    current_indent = get_indent_level(lines[j])
-                    if current_indent <= indent:
-                        break
-
-                    repeat_block.append(lines[j])
-                    j += 1
-
-                try:
-                    step_sign = 1 if step > 0 else -1
-                    for val in range(start, end + step_sign, step):
-                        variables[var_name] = val
-                        if repeat_block:
-                            try:
-                                run_script(repeat_block, variables)
-                            except BreakLoop:
-                                break
-                            except ReturnValue:
-                                raise
-                except BreakLoop:
-                    pass
-
-                i = j
-            
-            elif stripped.startswith("repeat each "):
-                indent = get_indent_level(lines[i])
-                
-                # Use your new evaluator
-                var_name, iterable = for_.evaluate_list_loop(stripped, variables)
-
-                # Collect the repeat block
-                repeat_block = []
-                j = i + 1
-                while j < len(lines):
-                    current_line = lines[j].strip()
-                    if not current_line or current_line.startswith('#') or current_line.startswith('//'):
-                        j += 1
-                        continue
-
-                    current_indent = get_indent_level(lines[j])
-                    if current_indent <= indent:
-                        break
-
-                    repeat_block.append(lines[j])
-                    j += 1
-
-                # Execute block for each item
-                try:
-                    for val in iterable:
-                        variables[var_name] = val
-                        if repeat_block:
-                            try:
-                                run_script(repeat_block, variables)
-                            except BreakLoop:
-                                break
-                            except ReturnValue:
-                                raise
-                except BreakLoop:
-                    pass
-
-                i = j
-            elif (stripped.startswith("add ") or 
-                stripped.startswith("remove ") or 
-                stripped.startswith("length of ") or
-                (" at " in stripped and " in " in stripped)):
-                list_operations.handle_list_command(stripped, variables)
-                i += 1
-
-
-            elif stripped.startswith('stop'):
-                raise BreakLoop()
-            
-            # Function definition handling
-            elif function_handler.is_function_definition(stripped):
-                func_name, params = function_handler.parse_function_definition(stripped)
-                func_body, next_i = function_handler.collect_function_body(lines, i)
-                function_handler.register_function(func_name, params, func_body)
-                i = next_i
-                continue
-
-            # Function call handling
-            elif function_handler.is_function_call(stripped):
-                func_name, args = function_handler.parse_function_call(stripped)
-                if function_handler.function_exists(func_name):
-                    # Execute function - pass run_script and optionally your expression evaluator
-                    # Example: ret_val = function_handler.execute_function(func_name, args, variables, run_script, your_expression_module.evaluate)
-                    ret_val = function_handler.execute_function(func_name, args, variables, run_script)
-                    # Handle return value if needed (e.g., for assignment)
-                else:
-                    print(f"Function '{func_name}' is not defined")
-                i += 1
-                continue
-
+                stmt = Statement(lineno, stripped, _unexpected_else)
+                stmt.arg = stmt
             else:
-                print(f"Unknown command at line {i+1}: {stripped}")
-                i += 1
-
-        except BreakLoop:
-            raise
-        except ReturnValue:
-            raise
-        except Exception as e:
-            print(f"Error: {e}")
-            return
+                stmt = Statement(lineno, stripped, _unknown_command)
+                stmt.arg = stmt
+            block.append(stmt)
+            continue
 
-    return return_value
\ No newline at end of file
+        handler, is_block, with_else = entry
+        stmt = Statement(lineno, stripped, handler)
+        if is_block:
+            stmt.arg = stmt
+            j = _block_end(entries, i, end, indent)
+            stmt.body = _compile_entries(entries, i, j)
+            i = j
+            # An else belongs to this statement only if it directly follows at the same indent
+            if with_else and i < end and entries[i][1] == indent and entries[i][2] == 'else':
+                j = _block_end(entries, i + 1, end, indent)
+                stmt.orelse = _compile_entries(entries, i + 1, j)
+                i = j
+        block.append(stmt)
+    return block
+
+def execute_block(block, variables, rt):
+    """Run compiled statements; an error stops this block only"""
+    rt.steps += len(block)
+    if rt.steps >= rt.next_check:
+        rt.limits.checkpoint(rt)
+    try:
+        for stmt in block:
+            stmt.handler(stmt.arg, variables, rt)
+    except (BreakLoop, ReturnValue):
+        raise
+    except Exception as e:
+        rt.errors += 1
+        print(f"Error: {e}", file=rt.stdout)
+
+def run_script(lines, variables, rt=None):
+    """Compile and run source lines in the given variable scope"""
+    if rt is None:
+        rt = default_runtime()
+    rt.execute_block(compile_block(lines), variables, rt)
+    rt.wait_for_tasks()
+
+
+def _unexpected_else(stmt, variables, rt):
+    rt.errors += 1
+    print(f"Unexpected 'else' at line {stmt.lineno} - this should be handled by if statement", file=rt.stdout)
+
+def _unknown_command(stmt, variables, rt):
+    rt.errors += 1
+    print(f"Unknown command at line {stmt.lineno}: {stmt.text}", file=rt.stdout)
+
+def _stop(line, variables, rt):
+    raise BreakLoop()
+
+
+# Built-in statements are imported only when a script first uses them
+register_statement('let', '.let:execute')
+register_statement('say', '.say:execute')
+register_statement('ask', '.ask:execute')
+register_statement('return', '.function_handler:handle_return_statement')
+register_statement('stop', _stop)
+register_statement('if', '.if_else:execute', block=True, with_else=True)
+register_statement('match', '.dispatch:execute_match', block=True)
+register_statement('when', '.dispatch:case_outside_match', block=True)
+register_statement('otherwise', '.dispatch:case_outside_match', block=True)
+register_statement('while', '.while_:execute', block=True)
+register_statement('repeat counting', '.for_:execute_counting', block=True)
+register_statement('repeat each', '.for_:execute_each', block=True)
+register_statement('load csv', '.csv_:execute_load')
+register_statement('add', '.list_operations:handle_list_command')
+register_statement('remove', '.list_operations:handle_list_command')
+register_statement('length of', '.list_operations:handle_list_command')
+register_statement('sort', '.list_operations:handle_list_command')
+register_statement('define', '.function_handler:handle_definition', block=True)
+register_statement('call', '.function_handler:handle_call_statement')
+register_statement('spawn', '.tasks:handle_spawn')
+register_statement('wait for', '.tasks:handle_wait')
+register_statement('use', '.use:execute')
@@ -0,0 +1,86 @@
+import sys
+
+from .evaluator.context import get_evaluator
+
+
+class Runtime:
+    """
+    Per-interpreter state handed to every statement handler
+    Nothing here is shared between runtimes, so separate interpreters can run
+    in separate threads without seeing each other's functions or output
+    """
+
+    def __init__(self, evaluator=None, functions=None, stdout=None, stdin=None):
+        from .runner import execute_block
+        from .function_handler import call_function
+
+        self.evaluator = evaluator if evaluator is not None else get_evaluator()
+        self.functions = functions if functions is not None else {}
+        # None means the process-wide sys.stdout / sys.stdin
+        self.stdout = stdout
+        self.stdin = stdin
+        # Runtime errors reported (and recovered from) so far
+        self.errors = 0
+        # Resource limit counters; Limits.start() arms them for one run
+        self.limits = None
+        self.steps = 0
+        self.next_check = float('inf')
+        self.depth = 0
+        self.max_depth = float('inf')
+        self.max_size = None
+        # Bound once so handlers don't create a bound method per statement
+        self.evaluate = self.evaluator.evaluate
+        # Blocks, function bodies and expressions all go through these three
+        # attributes; Hooks replaces them with traced versions only while
+        # callbacks are registered, so disabled tracing costs nothing
+        self.execute_block = execute_block
+        self.call_function = call_function
+        self._hooks = None
+        self._tasks = None
+
+    def input(self, prompt=""):
+        """input() that honours this runtime's stdin/stdout"""
+        if self.stdin is None and self.stdout is None:
+            return input(prompt)
+        out = self.stdout if self.stdout is not None else sys.stdout
+        out.write(prompt)
+        line = (self.stdin if self.stdin is not None else sys.stdin).readline()
+        if not line:
+            raise EOFError("No more input")
+        return line.rstrip('\n')
+
+    @property
+    def hooks(self):
+        """Instrumentation hooks for this runtime (created on first use)"""
+        if self._hooks is None:
+            from .hooks import Hooks
+            self._hooks = Hooks(self)
+        return self._hooks
+
+    @property
+    def tasks(self):
+        """Event loop for spawned tasks (started on first use)"""
+        if self._tasks is None:
+            from .tasks import TaskRunner
+            self._tasks = TaskRunner()
+        return self._tasks
+
+    def wait_for_tasks(self):
+        """Let every spawned task finish, then stop the event loop"""
+        if self._tasks is not None:
+            tasks, self._tasks = self._tasks, None
+            try:
+                tasks.join(self)
+            finally:
+                tasks.close()
+
+
+_default_runtime = None
+
+def default_runtime():
+    """Runtime around the global evaluator, for callers that don't own one"""
+    global _default_runtime
+    if _default_runtime is None or _default_runtime.evaluator is not get_evaluator():
+        from . import function_handler
+        _default_runtime = Runtime(functions=function_handler.functions)
+    return _default_runtime
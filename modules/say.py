@@ -1,10 +1,5 @@
-from .evaluator.context import get_evaluator
-
-
-
-def execute(line, variables):
-    evaluator = get_evaluator()
-    evaluate_expression = evaluator.evaluate
+def execute(line, variables, rt):
+    evaluate_expression = rt.evaluate
     parts = line.split(" ", 1)
 
     if len(parts) != 2:
@@ -23,4 +18,4 @@ def execute(line, variables):
             val = evaluate_expression(fragment, variables)
             output += str(val)
 
-    print(output)
\ No newline at end of file
+    print(output, file=rt.stdout)
\ No newline at end of file
@@ -0,0 +1,191 @@
+"""
+Local execution service
+
+    zeno serve [--host 127.0.0.1] [--port 8765] [--socket PATH] [--workers N] [--timeout SECONDS]
+               [--max-statements N] [--max-depth N] [--max-size N]
+
+POST /run with a JSON body {"source": "...", "input": "...", "timeout": 5}
+returns {"status", "errors", "wall_seconds", "stdout"} (see modules/batch.py
+for status codes). GET /health returns {"status": "ok"}.
+
+Requests are handled by asyncio and executed in a pool of warm worker
+processes; each worker keeps a cache of compiled programs keyed by source.
+"""
+
+import asyncio
+import json
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from . import batch
+
+PROGRAM_CACHE_SIZE = 128
+MAX_BODY_BYTES = 1 << 20
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large"}
+
+# Per worker process: source text -> compiled program
+_programs = OrderedDict()
+
+
+def compiled(source):
+    """Compile source, reusing this worker's cached program for repeated sources"""
+    program = _programs.get(source)
+    if program is not None:
+        _programs.move_to_end(source)
+        return program
+
+    from .interpreter import ZENOLangInterpreter
+    program = ZENOLangInterpreter.compile(source.splitlines(keepends=True))
+    _programs[source] = program
+    if len(_programs) > PROGRAM_CACHE_SIZE:
+        _programs.popitem(last=False)
+    return program
+
+
+def run_request(source, input_text, timeout, limits):
+    """Worker entry point for one /run request"""
+    try:
+        program = compiled(source)
+    except Exception as e:
+        return {"status": batch.STATUS_CRASHED, "errors": 0, "wall_seconds": 0.0,
+                "error": f"{type(e).__name__}: {e}", "stdout": ""}
+    return batch.execute(program, input_text, timeout, limits)
+
+
+class ExecutionService:
+    """asyncio front end for a pool of warm interpreter processes"""
+
+    # Extra time the event loop waits beyond the worker's own timer before giving up on it
+    GRACE_SECONDS = 1.0
+
+    def __init__(self, workers=None, timeout=10.0, limits=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        # Resource limits applied to every request (see batch.execute)
+        self.limits = limits
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=batch.warm_up)
+
+    def warm(self):
+        """
+        Start every worker now. Workers forked after the server starts accepting
+        would inherit open client sockets and keep those connections from closing
+        """
+        for future in [self.pool.submit(batch.warm_up) for _ in range(self.workers)]:
+            future.result()
+
+    async def run(self, source, input_text="", timeout=None):
+        """Execute source in the pool; returns the result dict"""
+        # Clients may ask for less time than the server allows, never more
+        timeout = min(timeout, self.timeout) if timeout else self.timeout
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(self.pool, run_request, source, input_text, timeout, self.limits),
+                timeout + self.GRACE_SECONDS)
+        except asyncio.TimeoutError:
+            return {"status": batch.STATUS_TIMEOUT, "errors": 0, "wall_seconds": timeout,
+                    "error": "Worker did not finish in time", "stdout": ""}
+
+    async def handle_connection(self, reader, writer):
+        try:
+            status, body = await self._dispatch(reader)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        payload = json.dumps(body).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: close\r\n\r\n".encode() + payload)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _dispatch(self, reader):
+        request_line = (await reader.readline()).decode("latin-1").split()
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if len(request_line) < 2:
+            return 400, {"error": "Malformed request line"}
+        method, path = request_line[0], request_line[1]
+
+        if path == "/health":
+            return 200, {"status": "ok"}
+        if path != "/run":
+            return 404, {"error": f"No such endpoint: {path}"}
+        if method != "POST":
+            return 405, {"error": "Use POST /run"}
+
+        length = int(headers.get("content-length", 0) or 0)
+        if length > MAX_BODY_BYTES:
+            return 413, {"error": "Request body too large"}
+        try:
+            request = json.loads(await reader.readexactly(length))
+            source = request["source"]
+        except (ValueError, KeyError, TypeError):
+            return 400, {"error": "Body must be JSON with a 'source' string"}
+        if not isinstance(source, str):
+            return 400, {"error": "Body must be JSON with a 'source' string"}
+
+        timeout = request.get("timeout")
+        if timeout is not None and not isinstance(timeout, (int, float)):
+            return 400, {"error": "'timeout' must be a number of seconds"}
+        return 200, await self.run(source, request.get("input", ""), timeout)
+
+    async def start(self, host="127.0.0.1", port=8765, socket_path=None):
+        """Start listening on a TCP port, or on a Unix socket when socket_path is given"""
+        self.warm()
+        if socket_path:
+            return await asyncio.start_unix_server(self.handle_connection, path=socket_path)
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+async def serve(host, port, socket_path, workers, timeout, limits):
+    service = ExecutionService(workers=workers, timeout=timeout, limits=limits)
+    server = await service.start(host, port, socket_path)
+    where = socket_path or "http://{}:{}".format(*server.sockets[0].getsockname()[:2])
+    print(f"ZENOLang execution service listening on {where}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv):
+    options = {"--host": "127.0.0.1", "--port": "8765", "--socket": None, "--workers": None, "--timeout": "10"}
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if (arg in options or arg in batch.LIMIT_OPTIONS) and i + 1 < len(argv):
+            options[arg] = argv[i + 1]
+            i += 2
+        else:
+            print(f"Error: Unexpected argument '{arg}'")
+            print("Usage: zeno serve [--host HOST] [--port PORT] [--socket PATH] [--workers N] [--timeout SECONDS]")
+            print("                  [--max-statements N] [--max-depth N] [--max-size N]")
+            return 1
+
+    try:
+        asyncio.run(serve(
+            options["--host"], int(options["--port"]), options["--socket"],
+            int(options["--workers"]) if options["--workers"] else None,
+            float(options["--timeout"]),
+            batch.limits_from_options(options),
+        ))
+    except KeyboardInterrupt:
+        pass
+    return 0
@@ -0,0 +1,70 @@
+import importlib
+import sys
+import time
+
+# Import + setup time targeted for the core path every script needs
+# (evaluator, custom operators, runner and 'say'). Timings depend on the
+# host, so going over it only fails the report when --budget is passed
+STARTUP_BUDGET_MS = 15.0
+
+# Statement modules in the order a typical script would load them
+STATEMENT_MODULES = [
+    'let', 'say', 'ask', 'if_else', 'while_', 'for_',
+    'list_operations', 'csv_', 'function_handler',
+]
+CORE_PHASES = {'evaluator', 'evaluator setup', 'runner', 'say'}
+
+
+def _measure(label, func):
+    before = set(sys.modules)
+    start = time.perf_counter()
+    func()
+    elapsed = (time.perf_counter() - start) * 1000
+    loaded = sorted(name for name in set(sys.modules) - before if not name.startswith('modules'))
+    return label, elapsed, loaded
+
+
+def collect(create_evaluator):
+    """
+    Time each startup phase in this (fresh) process
+    Returns: list of (phase, milliseconds, newly loaded stdlib modules)
+    """
+    phases = [
+        _measure('evaluator', lambda: importlib.import_module('modules.evaluator.main')),
+        _measure('evaluator setup', create_evaluator),
+        _measure('runner', lambda: importlib.import_module('modules.runner')),
+    ]
+    for name in STATEMENT_MODULES:
+        phases.append(_measure(name, lambda name=name: importlib.import_module(f'modules.{name}')))
+    return phases
+
+
+def main(create_evaluator, budget_ms=None):
+    """
+    Print the startup breakdown
+    With an explicit budget_ms, exit status 1 if the core path is over it
+    """
+    already_loaded = [name for name in ('modules.evaluator.main', 'modules.runner') if name in sys.modules]
+    if already_loaded:
+        print(f"Warning: {', '.join(already_loaded)} already imported; timings will be understated")
+
+    phases = collect(create_evaluator)
+
+    print(f"{'phase':<18}{'ms':>9}  stdlib modules loaded")
+    print("-" * 60)
+    for label, elapsed, loaded in phases:
+        marker = '*' if label in CORE_PHASES else ' '
+        print(f"{marker}{label:<17}{elapsed:>9.2f}  {', '.join(loaded)}")
+
+    core = sum(elapsed for label, elapsed, _ in phases if label in CORE_PHASES)
+    total = sum(elapsed for _, elapsed, _ in phases)
+    print("-" * 60)
+    print(f"{'all modules':<18}{total:>9.2f}")
+    budget = budget_ms if budget_ms is not None else STARTUP_BUDGET_MS
+    print(f"{'core (*)':<18}{core:>9.2f}  budget {budget:.1f} ms")
+
+    if core > budget:
+        print(f"Core startup is {core - budget:.2f} ms over budget")
+        if budget_ms is not None:
+            return 1
+    return 0
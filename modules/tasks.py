@@ -0,0 +1,158 @@
+"""
+Concurrent tasks
+
+    spawn call <function> [with <args>] as <task>
+    wait for <task> into <variable>
+
+A spawned call runs in the background, scheduled by an asyncio event
+loop that the runtime starts on first use. The call itself runs in a
+worker thread with its own runtime and evaluator, against a snapshot of
+the caller's variables. Blocking reads (load csv, csv loops) release the
+interpreter lock while they wait, so tasks overlap their I/O with each
+other and with the main script.
+
+'wait for' blocks until the task is done and stores its return value;
+an error in the task is reported by the 'wait for' line. A run waits
+for every task it spawned before it returns.
+
+With resource limits or hooks active, 'spawn' runs the call right away
+instead, so the limits and instrumentation see every statement.
+"""
+
+import asyncio
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Tasks running at the same time; later ones queue until a thread is free
+MAX_RUNNING = 32
+
+
+class Task:
+    """Handle stored in a variable by 'spawn'"""
+
+    def __init__(self, func_name, future):
+        self.func_name = func_name
+        self.future = future
+        self.collected = False
+
+    def __repr__(self):
+        state = "done" if self.future.done() else "running"
+        return f"<task {self.func_name} ({state})>"
+
+
+class TaskRunner:
+    """One runtime's event loop, running on a background thread"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.executor = ThreadPoolExecutor(max_workers=MAX_RUNNING, thread_name_prefix="zeno-task")
+        self.thread = threading.Thread(target=self.loop.run_forever, name="zeno-tasks", daemon=True)
+        self.thread.start()
+        self.tasks = []
+
+    def spawn(self, func_name, call):
+        """Schedule call() (run in a worker thread); returns its Task"""
+        async def run():
+            return await self.loop.run_in_executor(self.executor, call)
+
+        task = Task(func_name, asyncio.run_coroutine_threadsafe(run(), self.loop))
+        self.tasks.append(task)
+        return task
+
+    def join(self, rt):
+        """Wait for every task; errors nobody waited for are reported here"""
+        while self.tasks:
+            tasks, self.tasks = self.tasks, []
+            for task in tasks:
+                if task.collected:
+                    continue
+                try:
+                    collect(task, rt)
+                except Exception as e:
+                    rt.errors += 1
+                    print(f"Error in task '{task.func_name}': {e}", file=rt.stdout)
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        self.executor.shutdown()
+
+
+def collect(task, rt):
+    """A task's return value; the first collection adds its error count to rt"""
+    first = not task.collected
+    task.collected = True
+    value, errors = task.future.result()
+    if first:
+        rt.errors += errors
+    return value
+
+
+def _task_runtime(rt):
+    from .interpreter import create_evaluator
+    from .runtime import Runtime
+
+    task_rt = Runtime(create_evaluator(), functions=rt.functions, stdout=rt.stdout, stdin=rt.stdin)
+    # Tasks may spawn tasks of their own on the same loop
+    task_rt._tasks = rt.tasks
+    return task_rt
+
+
+def _traced(rt):
+    """True while limits or hooks are watching this runtime's statements"""
+    from . import function_handler, runner
+
+    return (rt.limits is not None or rt.execute_block is not runner.execute_block
+            or rt.call_function is not function_handler.call_function)
+
+
+def handle_spawn(line, variables, rt):
+    """
+    Handle spawn statement
+    Syntax: spawn call <func_name> [with <arg1>, ...] as <task>
+    """
+    from . import function_handler
+
+    match = re.match(r"spawn (call .+) as (\S+)$", line)
+    if not match:
+        raise SyntaxError("Invalid syntax in 'spawn' command (expected: spawn call <function> with <args> as <task>)")
+    call_text, task_name = match.groups()
+    func_name, args = function_handler.parse_function_call(call_text)
+    if not function_handler.function_exists(func_name, rt):
+        raise Exception(f"Function '{func_name}' is not defined")
+
+    if _traced(rt):
+        future = Future()
+        try:
+            future.set_result((function_handler.execute_function(func_name, args, variables, rt), 0))
+        except Exception as e:
+            future.set_exception(e)
+        variables[task_name] = Task(func_name, future)
+        return
+
+    # Arguments are evaluated in the task, against the variables as they are now
+    snapshot = variables.copy()
+    task_rt = _task_runtime(rt)
+
+    def call():
+        value = function_handler.execute_function(func_name, args, snapshot, task_rt)
+        return value, task_rt.errors
+
+    variables[task_name] = rt.tasks.spawn(func_name, call)
+
+
+def handle_wait(line, variables, rt):
+    """
+    Handle wait statement
+    Syntax: wait for <task> into <variable>
+    """
+    match = re.match(r"wait for (\S+) into (\S+)$", line)
+    if not match:
+        raise SyntaxError("Invalid syntax in 'wait for' command (expected: wait for <task> into <variable>)")
+    task_name, var_name = match.groups()
+    task = variables.get(task_name)
+    if not isinstance(task, Task):
+        raise NameError(f"'{task_name}' is not a task")
+    variables[var_name] = collect(task, rt)
@@ -0,0 +1,1309 @@
+"""
+Interpreter-level tests: running whole ZENOLang scripts
+"""
+
+import asyncio
+import io
+import itertools
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+
+from modules.batch import run_one as _real_run_one
+from modules.interpreter import ZENOLangInterpreter
+
+
+def run_source(source, inputs=()):
+    """Run ZENOLang source in a fresh interpreter and return its output"""
+    stdout = io.StringIO()
+    stdin = io.StringIO("".join(f"{value}\n" for value in inputs))
+    interpreter = ZENOLangInterpreter(stdout=stdout, stdin=stdin)
+    interpreter.run(source.strip("\n").splitlines(keepends=True))
+    return stdout.getvalue()
+
+
+class TestIsolation(unittest.TestCase):
+    """Interpreters must not share functions, operators or output"""
+
+    def test_functions_are_per_interpreter(self):
+        first = ZENOLangInterpreter(stdout=io.StringIO())
+        first.run(["define greet\n", "    say \"first\"\n"])
+        second = ZENOLangInterpreter(stdout=io.StringIO())
+        second.run(["call greet\n"])
+
+        self.assertIn("Function 'greet' is not defined", second.runtime.stdout.getvalue())
+
+    def test_custom_operators_are_per_interpreter(self):
+        first = ZENOLangInterpreter()
+        first.evaluator.add_operator("double", lambda value: value * 2)
+        second = ZENOLangInterpreter()
+
+        self.assertIn("double", first.evaluator.evaluator.operators)
+        self.assertNotIn("double", second.evaluator.evaluator.operators)
+
+    def test_concurrent_scripts(self):
+        source = """
+define label with n
+    return "{name}-" + n
+
+repeat counting i from 1 to 50
+    let text be call label with i
+say text
+ask reply
+say reply
+"""
+        jobs = [(source.replace("{name}", f"job{n}"), [f"answer{n}"]) for n in range(16)]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            outputs = list(pool.map(lambda job: run_source(*job), jobs))
+
+        for n, output in enumerate(outputs):
+            self.assertEqual(output, f"job{n}-50\n>> answer{n}\n")
+
+
+class TestDefaultRuntime(unittest.TestCase):
+    """Entry points that don't take a runtime fall back to the shared default one"""
+
+    def test_run_script_without_runtime(self):
+        from contextlib import redirect_stdout
+        from modules import runner
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            runner.run_script(["let x be 3\n", "if x greater 2 then\n", '    say upper "ok"\n'], {})
+        self.assertEqual(output.getvalue(), "OK\n")
+
+    def test_conditions_without_evaluator(self):
+        from modules import condition_checker, if_else, while_
+
+        self.assertTrue(if_else.evaluate("if 3 greater 2 then", {}))
+        self.assertFalse(while_.evaluate("while n greater 2 then", {"n": 1}))
+        self.assertTrue(condition_checker.check_condition("x less 5 and y is 'a'", {"x": 1, "y": "a"}))
+
+
+class TestStatementRegistry(unittest.TestCase):
+    """register_statement: keyword lookup, lazy handlers and new statements"""
+
+    def setUp(self):
+        from modules import runner
+
+        self.runner = runner
+        saved = dict(runner.STATEMENTS)
+        self.addCleanup(lambda: (runner.STATEMENTS.clear(), runner.STATEMENTS.update(saved)))
+
+    def test_two_word_keyword_wins(self):
+        self.runner.register_statement("show", lambda line, variables, rt: print("one", file=rt.stdout))
+        self.runner.register_statement("show all", lambda line, variables, rt: print("two", file=rt.stdout))
+
+        self.assertEqual(run_source("show x\nshow all x\nshow allx\n"), "one\ntwo\none\n")
+
+    def test_lazy_handler_spec(self):
+        self.runner.register_statement("echo", ".say:execute")
+        self.assertIsInstance(self.runner.STATEMENTS["echo"][0], str)
+
+        # say.execute prints whatever follows the first word, whatever that word is
+        self.assertEqual(run_source('echo "hi"\n'), "hi\n")
+        from modules import say
+        self.assertIs(self.runner.STATEMENTS["echo"][0], say.execute)
+
+    def test_third_party_block_statement(self):
+        def twice(stmt, variables, rt):
+            for _ in range(2):
+                rt.execute_block(stmt.body, variables, rt)
+
+        self.runner.register_statement("twice", twice, block=True)
+        output = run_source("""
+let n be 0
+twice
+    let n be n add 1
+    say n
+say "done"
+""")
+        self.assertEqual(output, "1\n2\ndone\n")
+
+
+class TestConditions(unittest.TestCase):
+    """Compiled condition predicates: precedence, negation and short-circuiting"""
+
+    def setUp(self):
+        from modules.interpreter import create_evaluator
+
+        self.evaluator = create_evaluator()
+        self.variables = {"x": 5, "y": 10, "role": "admin", "flag": False}
+        self.evaluated = []
+
+    def check(self, condition):
+        from modules.condition_checker import check_condition
+
+        def evaluate(expression, variables):
+            self.evaluated.append(expression)
+            return self.evaluator.evaluate(expression, variables)
+
+        self.evaluated.clear()
+        return check_condition(condition, self.variables, evaluate)
+
+    def test_and_short_circuits_left_to_right(self):
+        self.assertFalse(self.check("x greater y and role is 'admin'"))
+        self.assertEqual(self.evaluated, ["x greater y"])
+
+        self.assertTrue(self.check("x less y and role is 'admin' and y is 10"))
+        self.assertEqual(self.evaluated, ["x less y", "role is 'admin'", "y is 10"])
+
+    def test_or_short_circuits_left_to_right(self):
+        self.assertTrue(self.check("x less y or role is 'guest'"))
+        self.assertEqual(self.evaluated, ["x less y"])
+
+        self.assertFalse(self.check("x greater y or role is 'guest' or y is 3"))
+        self.assertEqual(self.evaluated, ["x greater y", "role is 'guest'", "y is 3"])
+
+    def test_and_binds_tighter_than_or(self):
+        # Split on 'and' first: (x greater y) and (y is 10 or role is 'admin')
+        self.assertFalse(self.check("x greater y and y is 10 or role is 'admin'"))
+        self.assertEqual(self.evaluated, ["x greater y"])
+
+    def test_not(self):
+        self.assertTrue(self.check("not x greater y"))
+        self.assertFalse(self.check("not x less y and y is 10"))
+        self.assertTrue(self.check("flag is false"))
+
+    def test_logical_words_inside_quotes_are_not_split(self):
+        self.check("motto is 'rock and roll'")
+        self.assertEqual(self.evaluated, ["motto is 'rock and roll'"])
+
+    def test_compiled_once(self):
+        from modules.condition_checker import compile_condition
+
+        condition = "x less y and role is 'admin'"
+        self.assertIs(compile_condition(condition), compile_condition(condition))
+
+
+class TestHooks(unittest.TestCase):
+    """Instrumentation callbacks (modules/hooks.py)"""
+
+    def setUp(self):
+        self.interpreter = ZENOLangInterpreter(stdout=io.StringIO())
+        self.events = []
+
+    def record(self, event):
+        def callback(*args):
+            self.events.append((event,) + args)
+        self.interpreter.add_hook(event, callback)
+        return callback
+
+    def run_lines(self, source):
+        self.interpreter.run(source.strip("\n").splitlines(keepends=True))
+
+    def test_statement_events_wrap_each_statement(self):
+        self.record("statement_start")
+        self.record("statement_end")
+        self.run_lines("let x be 1\nsay x\n")
+
+        self.assertEqual([(event, stmt.lineno, stmt.text) for event, stmt, _ in self.events], [
+            ("statement_start", 1, "let x be 1"), ("statement_end", 1, "let x be 1"),
+            ("statement_start", 2, "say x"), ("statement_end", 2, "say x"),
+        ])
+
+    def test_function_events_bind_arguments(self):
+        self.record("function_enter")
+        self.record("function_exit")
+        self.run_lines("""
+define add_up with a, b
+    return a add b
+let total be call add_up with 2, 3
+""")
+        self.assertEqual(self.events, [
+            ("function_enter", "add_up", {"a": 2, "b": 3}),
+            ("function_exit", "add_up", 5),
+        ])
+
+    def test_function_exit_fires_when_body_raises(self):
+        self.record("function_enter")
+        self.record("function_exit")
+        # 'stop' outside a loop makes the call itself fail
+        self.run_lines("define bad\n    stop\ncall bad\n")
+
+        self.assertEqual([event[:2] for event in self.events],
+                         [("function_enter", "bad"), ("function_exit", "bad")])
+        self.assertIsNone(self.events[1][2])
+
+    def test_expression_results(self):
+        self.record("expression")
+        self.run_lines("let x be 2\nlet y be x multiply 3\n")
+
+        self.assertEqual([(expression, result) for _, expression, _, result in self.events],
+                         [("2", 2), ("x multiply 3", 6)])
+
+    def test_removing_last_callback_restores_plain_path(self):
+        runtime = self.interpreter.runtime
+        plain = (runtime.execute_block, runtime.call_function, runtime.evaluate)
+
+        callbacks = [self.record(event) for event in ("statement_start", "function_enter", "expression")]
+        self.assertNotEqual((runtime.execute_block, runtime.call_function, runtime.evaluate), plain)
+
+        for event, callback in zip(("statement_start", "function_enter", "expression"), callbacks):
+            self.interpreter.remove_hook(event, callback)
+        self.assertEqual((runtime.execute_block, runtime.call_function, runtime.evaluate), plain)
+
+    def test_unknown_event(self):
+        with self.assertRaises(ValueError):
+            self.interpreter.add_hook("line", print)
+
+
+class TestProfiler(unittest.TestCase):
+    """zeno --profile: per-line hits and self/total time"""
+
+    def profile(self, source):
+        from modules import profiler
+
+        interpreter = ZENOLangInterpreter(stdout=io.StringIO())
+        line_profiler = profiler.LineProfiler()
+        line_profiler.attach(interpreter.runtime)
+        # Every clock reading advances one second, so timings are exact
+        with mock.patch.object(profiler.time, "perf_counter", itertools.count().__next__):
+            line_profiler.run(interpreter.run, source.strip("\n").splitlines(keepends=True))
+        line_profiler.detach(interpreter.runtime)
+        return line_profiler, {row["line"]: row for row in line_profiler.rows()}
+
+    def test_loop(self):
+        _, rows = self.profile("""
+let total be 0
+repeat counting i from 1 to 3
+    let total be total add i
+say total
+""")
+        self.assertEqual({line: row["hits"] for line, row in rows.items()}, {1: 1, 2: 1, 3: 3, 4: 1})
+        # Each body statement takes one tick; the loop's self time excludes them
+        self.assertEqual(rows[3]["total_ms"], 3000)
+        self.assertEqual(rows[3]["self_ms"], 3000)
+        self.assertEqual(rows[2]["total_ms"], rows[2]["self_ms"] + rows[3]["total_ms"])
+
+    def test_recursion_counts_total_time_once(self):
+        _, rows = self.profile("""
+define countdown with n
+    if n greater 0 then
+        call countdown with n subtract 1
+call countdown with 3
+""")
+        self.assertEqual(rows[2]["hits"], 4)
+        self.assertEqual(rows[3]["hits"], 3)
+        # Inclusive time of the recursive lines is that of their outermost run
+        for line in (2, 3):
+            self.assertLess(rows[line]["total_ms"], rows[4]["total_ms"])
+        self.assertEqual(sum(rows[line]["self_ms"] for line in (2, 3, 4)), rows[4]["total_ms"])
+
+    def test_json_report(self):
+        line_profiler, _ = self.profile('let x be 1\nsay x\n')
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "script.profile.json")
+            line_profiler.write_json(path, "script.znl")
+            with open(path) as f:
+                report = json.load(f)
+
+        self.assertEqual(set(report), {"script", "total_ms", "lines"})
+        self.assertEqual(report["script"], "script.znl")
+        self.assertEqual([set(row) for row in report["lines"]],
+                         [{"line", "hits", "total_ms", "self_ms", "percent", "source"}] * 2)
+        self.assertEqual(sorted(row["source"] for row in report["lines"]), ["let x be 1", "say x"])
+        self.assertEqual(report["lines"], sorted(report["lines"], key=lambda row: -row["self_ms"]))
+
+
+class TestCsv(unittest.TestCase):
+    """repeat each ... in csv and load csv"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "marks.csv")
+        with open(self.path, "w") as f:
+            # Second row is short: it has no score and no grade
+            f.write("name,score,grade\nada,91,A\nbob\ncyd,78,C\n")
+
+    def test_repeat_each_rebinds_every_column(self):
+        output = run_source(f"""
+repeat each row in csv "{self.path}"
+    say row.name + ":" + row.score + ":" + row.grade
+""")
+        self.assertEqual(output, "ada:91:A\nbob::\ncyd:78:C\n")
+
+    def test_repeat_each_parses_numbers(self):
+        output = run_source(f"""
+let total be 0
+repeat each row in csv "{self.path}"
+    if row.grade is "" then
+        say "skip " + row.name
+    else
+        let total be total add row.score
+say total
+""")
+        self.assertEqual(output, "skip bob\n169\n")
+
+    def test_load_csv_keeps_columns_aligned(self):
+        interpreter = ZENOLangInterpreter(stdout=io.StringIO())
+        interpreter.run([f'load csv "{self.path}" into marks\n'])
+        columns = interpreter.variables["marks"]
+
+        self.assertEqual({name: len(column) for name, column in columns.items()},
+                         {"name": 3, "score": 3, "grade": 3})
+        self.assertEqual(list(columns["name"]), ["ada", "bob", "cyd"])
+        self.assertIs(interpreter.variables["marks.grade"], columns["grade"])
+
+    def test_load_csv_typed_columns_widen_on_add(self):
+        with open(self.path, "w") as f:
+            f.write("id,ratio\n1,0.5\n2,0.25\n")
+        interpreter = ZENOLangInterpreter(stdout=io.StringIO())
+        interpreter.run([
+            f'load csv "{self.path}" into data\n',
+            'add 3 to data.id\n',
+            'add 2.5 to data.id\n',
+            'add "n/a" to data.ratio\n',
+        ])
+        columns = interpreter.variables["data"]
+
+        self.assertEqual(interpreter.runtime.errors, 0)
+        self.assertEqual(columns["id"].typecode, "d")
+        self.assertEqual(list(columns["id"]), [1.0, 2.0, 3.0, 2.5])
+        self.assertEqual(columns["ratio"], ["0.5", "0.25", "n/a"])
+        self.assertIs(interpreter.variables["data.id"], columns["id"])
+
+
+class TestAggregates(unittest.TestCase):
+    """sum of, min of, max of, average of, count of ... in; sort and position of"""
+
+    def test_plain_lists(self):
+        output = run_source("""
+let marks be [90, 75, 88, 90]
+say sum of marks
+say min of marks
+say max of marks
+say average of marks
+say count of 90 in marks
+say "total: " + sum of marks
+let ratio be (sum of marks) divide (count of 90 in marks)
+say ratio
+""")
+        self.assertEqual(output, "343\n75\n90\n85.75\n2\ntotal: 343\n171.5\n")
+
+    def test_typed_columns(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "marks.csv")
+        with open(path, "w") as f:
+            f.write("name,score\nada,91\nbob,78\ncyd,91\n")
+        output = run_source(f"""
+load csv "{path}" into marks
+say sum of marks.score
+say average of marks.score
+say max of marks.name
+say count of 91 in marks.score
+""")
+        self.assertEqual(output, "260\n86.66666666666667\ncyd\n2\n")
+
+    def test_sort_and_search(self):
+        output = run_source("""
+let xs be [5, 3, 9, 1, 7]
+sort xs
+say xs
+say position of 7 in sorted xs
+say position of 4 in sorted xs
+say position of 9 in xs
+sort xs descending
+say xs
+let names be ["bob", "Al", "carla"]
+sort names by length
+say names
+sort names descending by lower
+say names
+let sorted be 1
+say sorted
+sort xs by score
+""")
+        self.assertEqual(output, "[1, 3, 5, 7, 9]\n3\n-1\n4\n[9, 7, 5, 3, 1]\n['Al', 'bob', 'carla']\n"
+                                 "['carla', 'bob', 'Al']\n1\nError: Cannot sort by 'score': 9 has no such field\n")
+
+    def test_sort_typed_column_in_place(self):
+        interpreter = ZENOLangInterpreter(stdout=io.StringIO())
+        path = os.path.join(os.path.dirname(__file__), "..", "examples", "grades.csv")
+        interpreter.run([f'load csv "{path}" into g\n', 'sort g.mark1 descending\n',
+                         'let top be position of 95 in g.mark1\n'])
+        column = interpreter.variables["g.mark1"]
+        self.assertEqual(list(column), [95, 88, 78, 62, 55])
+        self.assertEqual(column.typecode, "q")
+        self.assertIs(interpreter.variables["g"]["mark1"], column)
+        self.assertEqual(interpreter.variables["top"], 0)
+
+    def test_names_stay_variables(self):
+        output = run_source("""
+let count be 3
+let sum be count plus 1
+let items be []
+say sum
+say max of items
+say sum of count
+""")
+        self.assertEqual(output, "4\n[Error: 'max of' needs a non-empty list]\n"
+                                 "[Error: 'sum of' needs a list, got 3]\n")
+
+
+class TestStrings(unittest.TestCase):
+    """split, join, replace, substring, index of, repeat"""
+
+    def test_builtins(self):
+        output = run_source("""
+let line be "ada,91,london"
+let fields be split line by ","
+say fields
+say join fields with " | "
+say replace "," with ";" in line
+say substring of line from 4 to 5
+say index of "91" in line
+say index of "london" in fields
+say index of "paris" in fields
+say repeat "=" 3 times
+say split "abc" by ""
+let by be "x"
+say join split "a-b" by "-" with by
+""")
+        self.assertEqual(output, "['ada', '91', 'london']\nada | 91 | london\nada;91;london\n91\n4\n2\n-1\n"
+                                 "===\n['a', 'b', 'c']\naxb\n")
+
+    def test_errors(self):
+        output = run_source("""
+say split 5 by ","
+say substring of "abc" from 1 to 7
+say repeat "a" 1.5 times
+say join "abc" with ","
+""")
+        self.assertEqual(output, "[Error: 'split' needs text, got 5]\n"
+                                 "[Error: 'substring' positions 1 to 7 are outside text of length 3]\n"
+                                 "[Error: 'repeat' needs a whole number, got 1.5]\n"
+                                 "[Error: 'join' needs a list, got 'abc']\n")
+
+
+class TestLimits(unittest.TestCase):
+    """run() limits stop runaway scripts with a message naming the limit"""
+
+    def run_limited(self, source, **limits):
+        interpreter = ZENOLangInterpreter(stdout=io.StringIO())
+        interpreter.run(source.strip("\n").splitlines(keepends=True), **limits)
+        return interpreter
+
+    def test_statement_limit(self):
+        from modules.exception_case import LimitExceeded
+
+        with self.assertRaisesRegex(LimitExceeded, "Statement limit of 1000 exceeded"):
+            self.run_limited("let x be 1\nwhile x greater 0 then\n    let x be x + 1\n",
+                             max_statements=1000)
+
+    def test_timeout(self):
+        from modules.exception_case import ScriptTimeout
+
+        with self.assertRaisesRegex(ScriptTimeout, "Time limit of 0.2s exceeded"):
+            self.run_limited("let x be 1\nwhile x greater 0 then\n    let x be x + 1\n", timeout=0.2)
+
+    def test_call_depth_limit(self):
+        from modules.exception_case import LimitExceeded
+
+        source = """
+define down with n
+    let m be call down with n + 1
+    return m
+let r be call down with 0
+"""
+        with self.assertRaisesRegex(LimitExceeded, "Call depth limit of 20 exceeded in 'down'"):
+            self.run_limited(source, max_depth=20)
+
+    def test_size_limits(self):
+        from modules.exception_case import LimitExceeded
+
+        grow_list = "let xs be []\nlet x be 1\nwhile x greater 0 then\n    add x to xs\n"
+        with self.assertRaisesRegex(LimitExceeded, "List 'xs' exceeds the size limit of 50"):
+            self.run_limited(grow_list, max_size=50)
+        grow_string = "let s be 'a'\nlet x be 1\nwhile x greater 0 then\n    let s be s + s\n"
+        with self.assertRaisesRegex(LimitExceeded, "String 's' exceeds the size limit of 50"):
+            self.run_limited(grow_string, max_size=50)
+
+    def test_limits_reset_after_run(self):
+        interpreter = self.run_limited("let x be 1\n", max_statements=10, max_depth=5, max_size=5)
+        interpreter.run(["let s be 'longer than five'\n"])
+        self.assertEqual(interpreter.variables["s"], "longer than five")
+        self.assertIsNone(interpreter.runtime.limits)
+
+    def test_within_limits(self):
+        source = "let total be 0\nlet ns be [1, 2, 3]\nrepeat each n in ns\n    let total be total plus n\nsay total\n"
+        stdout = io.StringIO()
+        ZENOLangInterpreter(stdout=stdout).run(
+            source.splitlines(keepends=True), max_statements=100, max_depth=5, max_size=10, timeout=5)
+        self.assertEqual(stdout.getvalue(), "6\n")
+
+
+class TestRepl(unittest.TestCase):
+    """The REPL keeps one session and compiles each chunk on its own"""
+
+    def setUp(self):
+        from modules.repl import Repl
+
+        self.stdout = io.StringIO()
+        self.repl = Repl(ZENOLangInterpreter(stdout=self.stdout))
+
+    def feed(self, *lines):
+        return [self.repl.push(line) for line in lines]
+
+    def test_state_persists_between_inputs(self):
+        self.feed("let x be 5", "define double with n", "    return n multiplies 2", "")
+        self.feed("let y be call double with x", "say y")
+        self.assertEqual(self.stdout.getvalue(), "10\n")
+
+    def test_block_waits_for_empty_line(self):
+        more = self.feed("let n be 3", "if n greater 2 then", '    say "big"', "else", '    say "small"')
+        self.assertEqual(more, [False, True, True, True, True])
+        self.assertEqual(self.stdout.getvalue(), "")
+        self.assertFalse(self.repl.push(""))
+        self.assertEqual(self.stdout.getvalue(), "big\n")
+
+    def test_earlier_input_is_not_rerun(self):
+        compiled = []
+        real_compile = self.repl.interpreter.compile
+        with mock.patch.object(self.repl.interpreter, "compile",
+                               lambda lines, lineno: compiled.append(lines) or real_compile(lines, lineno)):
+            self.feed('say "one"', 'say "two"')
+        self.assertEqual(compiled, [['say "one"'], ['say "two"']])
+        self.assertEqual(self.stdout.getvalue(), "one\ntwo\n")
+
+    def test_errors_report_session_line_numbers(self):
+        self.feed("let x be 1", "", "# comment", "bogus line")
+        self.assertEqual(self.stdout.getvalue(), "Unknown command at line 4: bogus line\n")
+        self.assertEqual(self.repl.interpreter.runtime.errors, 1)
+
+
+class TestWatch(unittest.TestCase):
+    """zeno --watch recompiles only the top-level chunks that changed"""
+
+    VERSION_1 = [
+        "define sq with n\n", "    return n multiplies n\n", "\n",
+        "let y be call sq with 4\n", "say y\n",
+    ]
+    VERSION_2 = [
+        "# squares\n", "define sq with n\n", "    return n multiplies n\n", "\n",
+        "let y be call sq with 5\n", "say y\n", "bogus\n",
+    ]
+
+    def test_split_chunks(self):
+        from modules.watch import split_chunks
+
+        lines = ["let x be 1\n", "if x is 1 then\n", "    say x\n", "\n", "else\n", "    say 0\n", "# end\n"]
+        self.assertEqual(split_chunks(lines), [(1, lines[0:1]), (2, lines[1:6])])
+
+    def test_unchanged_define_is_reused(self):
+        from modules.watch import IncrementalCompiler
+
+        compiler = IncrementalCompiler()
+        first = compiler.compile(self.VERSION_1)
+        second = compiler.compile(self.VERSION_2)
+        self.assertEqual((compiler.compiled, compiler.reused), (2, 2))
+        self.assertIs(second[0], first[0])
+        self.assertIs(second[2], first[2])
+        # Reused statements follow the lines they moved to
+        self.assertEqual([stmt.lineno for stmt in second], [2, 5, 6, 7])
+        self.assertEqual(second[0].body[0].lineno, 3)
+
+    def test_reruns_in_fresh_session(self):
+        from modules.watch import Watcher
+
+        stdout = io.StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "demo.znl")
+            watcher = Watcher(path, ZENOLangInterpreter(stdout=stdout))
+            with open(path, "w") as f:
+                f.writelines(self.VERSION_1)
+            self.assertTrue(watcher.changed())
+            watcher.run_once()
+            self.assertFalse(watcher.changed())
+
+            with open(path, "w") as f:
+                f.writelines(self.VERSION_2)
+            os.utime(path, ns=(0, 0))
+            self.assertTrue(watcher.changed())
+            watcher.run_once()
+
+        self.assertEqual(stdout.getvalue(), "16\n25\nUnknown command at line 7: bogus\n")
+        self.assertEqual(watcher.interpreter.runtime.errors, 1)
+        self.assertEqual(set(watcher.interpreter.runtime.functions), {"sq"})
+
+
+class TestParallel(unittest.TestCase):
+    """repeat each ... in parallel: same results as the sequential loop"""
+
+    PROGRAM = """
+define square with n
+    return n multiplies n
+let xs be [3, 1, 4, 1, 5, 9, 2, 6]
+let results be []
+repeat each x in xs in parallel using 3 workers
+    let sq be call square with x
+    add sq to results
+    say "item " + x
+    call missing_function
+say results
+say sq
+"""
+
+    def body_of(self, source):
+        from modules.runner import compile_block
+
+        return compile_block(source.strip("\n").splitlines(keepends=True))[0].body
+
+    def analyze(self, source, functions=None):
+        from modules import parallel
+
+        return parallel.analyze(self.body_of(source), "x", functions or {})
+
+    def test_analysis(self):
+        from modules.parallel import NotParallelizable
+
+        private, results = self.analyze("repeat each x in xs\n    let y be x plus 1\n    add y to out\n")
+        self.assertEqual((private, results), ({"x", "y"}, ["out"]))
+        rejected = {
+            "let total be total plus x": "'total' is shared",
+            "if x greater 1 then\n        let last be x": "'last' is shared",
+            "add x to out\n    length of out": "'out' is also read",
+            "ask name": "'ask'",
+            "stop": "'stop'",
+        }
+        for body, reason in rejected.items():
+            with self.subTest(body=body):
+                with self.assertRaisesRegex(NotParallelizable, reason):
+                    self.analyze(f"repeat each x in xs\n    {body}\n")
+
+    def test_functions_must_not_change_lists(self):
+        from modules.parallel import NotParallelizable
+
+        functions = {"keep": {"params": ["v"], "body": self.body_of("if x then\n    add v to kept\n")}}
+        with self.assertRaisesRegex(NotParallelizable, "Function 'keep' uses 'add'"):
+            self.analyze("repeat each x in xs\n    call keep with x\n", functions)
+
+    def test_matches_sequential_run(self):
+        sequential = self.PROGRAM.replace(" in parallel using 3 workers", "")
+        interpreter = ZENOLangInterpreter(stdout=io.StringIO())
+        interpreter.run(self.PROGRAM.strip("\n").splitlines(keepends=True))
+        output = interpreter.runtime.stdout.getvalue()
+
+        self.assertEqual(output, run_source(sequential))
+        self.assertIn("item 3\nFunction 'missing_function' is not defined\nitem 1\n", output)
+        self.assertEqual(interpreter.runtime.errors, 8)
+        self.assertEqual(interpreter.variables["results"], [9, 1, 16, 1, 25, 81, 4, 36])
+        self.assertEqual(interpreter.variables["x"], 6)
+
+    def test_unsafe_body_runs_sequentially(self):
+        source = """
+let total be 0
+let xs be [1, 2, 3, 4]
+repeat each x in xs in parallel
+    let total be total plus x
+say total
+"""
+        self.assertEqual(run_source(source), "10\n")
+
+
+class TestTasks(unittest.TestCase):
+    """spawn call ... as task / wait for task into result"""
+
+    def setUp(self):
+        from modules import runner
+
+        saved = dict(runner.STATEMENTS)
+        self.addCleanup(lambda: (runner.STATEMENTS.clear(), runner.STATEMENTS.update(saved)))
+
+    def test_spawn_and_wait(self):
+        output = run_source("""
+define double with n
+    return n multiplies 2
+let x be 5
+spawn call double with x as task
+let x be 100
+wait for task into result
+say result
+wait for task into again
+say again
+""")
+        # Arguments are evaluated against the variables as they were at spawn time
+        self.assertEqual(output, "10\n10\n")
+
+    def test_tasks_overlap(self):
+        from modules import runner
+        import threading
+
+        # Both tasks have to be inside 'meet' at the same time to get past it
+        barrier = threading.Barrier(2, timeout=5)
+        runner.register_statement("meet", lambda line, variables, rt: barrier.wait())
+        output = run_source("""
+define visit with name
+    meet
+    return name
+spawn call visit with "a" as first
+spawn call visit with "b" as second
+wait for first into a
+wait for second into b
+say a + b
+""")
+        self.assertEqual(output, "ab\n")
+
+    def test_errors(self):
+        interpreter = ZENOLangInterpreter(stdout=io.StringIO())
+        interpreter.run("""
+define wrong_arity with a, b
+    return a
+spawn call wrong_arity with 1 as waited
+spawn call wrong_arity with 2 as forgotten
+wait for waited into result
+""".strip("\n").splitlines(keepends=True))
+        self.assertEqual(interpreter.runtime.stdout.getvalue(),
+                         "Error: Function 'wrong_arity' expects 2 arguments, got 1\n"
+                         "Error in task 'wrong_arity': Function 'wrong_arity' expects 2 arguments, got 1\n")
+        self.assertEqual(interpreter.runtime.errors, 2)
+        self.assertIsNone(interpreter.runtime._tasks)
+
+    def test_spawn_runs_inline_under_limits(self):
+        interpreter = ZENOLangInterpreter(stdout=io.StringIO())
+        interpreter.run("""
+define double with n
+    return n multiplies 2
+spawn call double with 4 as task
+wait for task into result
+""".strip("\n").splitlines(keepends=True), max_statements=100)
+        self.assertEqual(interpreter.variables["result"], 8)
+        self.assertIsNone(interpreter.runtime._tasks)
+
+
+class TestTiering(unittest.TestCase):
+    """Hot loops and functions switch to compiled bodies without changing results"""
+
+    SCRIPTS = {
+        "counting": """
+let i be 0
+let total be 0
+while i less 200 then
+    let total be total plus i
+    let i be i plus 1
+    if total greater 1000 and i less 60 then
+        say "big " + total
+say total
+""",
+        "types_change": """
+let x be 0
+repeat counting i from 1 to 150
+    if i is 100 then
+        let x be 0.5
+    if i is 120 then
+        let x be "text"
+    let y be x plus i
+    let x be x times 1
+say y
+say x
+""",
+        "functions": """
+define fib with n
+    if n less 2 then
+        return n
+    let a be call fib with n minus 1
+    let b be call fib with n minus 2
+    return a plus b
+let r be call fib with 12
+say r
+""",
+        "errors": """
+repeat counting i from 1 to 40
+    let z be missing plus 1
+    say z
+    let q be i divided by 0
+say q
+""",
+    }
+
+    def run_both(self, source):
+        from modules import tiering
+
+        compiled = run_source(source)
+        with mock.patch.object(tiering, "ENABLED", False):
+            plain = run_source(source)
+        return compiled, plain
+
+    def test_same_output_as_tree_walking(self):
+        for name, source in self.SCRIPTS.items():
+            with self.subTest(script=name):
+                compiled, plain = self.run_both(source)
+                self.assertEqual(compiled, plain)
+
+    def test_hot_loop_is_compiled(self):
+        interpreter = ZENOLangInterpreter(stdout=io.StringIO())
+        program = interpreter.compile(self.SCRIPTS["counting"].strip("\n").splitlines(keepends=True))
+        interpreter.run_compiled(program)
+        self.assertIsNotNone(program[2].compiled)
+        self.assertEqual(interpreter.variables["total"], sum(range(200)))
+
+    def test_hot_function_is_compiled(self):
+        interpreter = ZENOLangInterpreter(stdout=io.StringIO())
+        interpreter.run(self.SCRIPTS["functions"].strip("\n").splitlines(keepends=True))
+        self.assertIsNotNone(interpreter.runtime.functions["fib"]["compiled"])
+        self.assertEqual(interpreter.variables["r"], 144)
+
+    def test_changed_types_keep_compiled_body(self):
+        interpreter = ZENOLangInterpreter(stdout=io.StringIO())
+        program = interpreter.compile(self.SCRIPTS["types_change"].strip("\n").splitlines(keepends=True))
+        interpreter.run_compiled(program)
+        # int, then float, then str: each site re-specialises once and the body stays compiled
+        loop = program[1]
+        self.assertIsNotNone(loop.compiled)
+        self.assertEqual(loop.compiled.misses, 4)
+        self.assertEqual(interpreter.variables["y"], "[Error: can only concatenate str (not \"int\") to str]")
+
+    def test_unstable_types_drop_compiled_body(self):
+        from modules import tiering
+
+        source = """
+let x be 1
+repeat counting i from 1 to 100
+    if i mod 2 is 0 then
+        let x be 0.5
+    else
+        let x be 1
+    let y be x times i
+say y
+"""
+        interpreter = ZENOLangInterpreter(stdout=io.StringIO())
+        program = interpreter.compile(source.strip("\n").splitlines(keepends=True))
+        with mock.patch.object(tiering, "DEOPT_MISSES", 8):
+            interpreter.run_compiled(program)
+        loop = program[1]
+        self.assertIsNone(loop.compiled)
+        self.assertLess(loop.hits, 0)
+        self.assertEqual(interpreter.variables["y"], 50.0)
+
+    def test_tracing_sees_every_statement(self):
+        from modules.profiler import LineProfiler
+
+        interpreter = ZENOLangInterpreter(stdout=io.StringIO())
+        profiler = LineProfiler()
+        profiler.attach(interpreter.runtime)
+        profiler.run(interpreter.run, self.SCRIPTS["counting"].strip("\n").splitlines(keepends=True))
+        self.assertEqual(profiler.stats[4][0], 200)
+
+    def test_site_shapes(self):
+        from modules.evaluator.operators import OPERATORS
+        from modules.evaluator.sites import parse_site
+
+        self.assertEqual(parse_site("i less n", OPERATORS), ("i", "less", "n"))
+        self.assertEqual(parse_site("row.mark1 plus -2.5", OPERATORS), ("row.mark1", "plus", "-2.5"))
+        self.assertEqual(parse_site("total", OPERATORS), ("total",))
+        for expression in ("name + '!'", "x plus y plus z", "(x plus 1)", "x between 1 to 3",
+                           "row.add plus 1", "x and y", "plus", "lessons less 3"):
+            with self.subTest(expression=expression):
+                self.assertIsNone(parse_site(expression, OPERATORS))
+
+
+class TestDispatch(unittest.TestCase):
+    """match/when and if/else ladders dispatch through tables (modules/dispatch.py)"""
+
+    LADDERS = """
+define grade with mark
+    if mark greater 90 then
+        return "A"
+    else
+        if mark greater 80 then
+            return "B"
+        else
+            if mark greater 70 then
+                return "C"
+            else
+                return "F"
+define band with mark
+    if mark atmost 10 then
+        return "low"
+    else
+        if mark atmost 20 then
+            return "mid"
+        else
+            if mark atmost 30 then
+                return "high"
+define name with day
+    if day is 1 then
+        return "mon"
+    else
+        if day is 2 then
+            return "tue"
+        else
+            if day equals 3 then
+                return "wed"
+            else
+                return "other"
+let marks be [95, 91, 90.5, 90, 85, 80, 71, 70, 10, 10.5, 20, 30, 31, -1, 2, 3, 2.0, "text"]
+repeat each m in marks
+    let g be call grade with m
+    let b be call band with m
+    let n be call name with m
+    say g + " " + b + " " + n
+"""
+
+    def test_match(self):
+        output = run_source("""
+let days be [1, 7, 3, 3.0, "3", 9]
+repeat each day in days
+    match day
+        when 1, 7
+            say "weekend"
+        when 3
+            say "midweek"
+        otherwise
+            say "weekday"
+match "b"
+    when "a", 'b'
+        say "letter"
+match days
+    when 1
+        say "never"
+match 2 greater 1
+    when false
+        say "no"
+    when true
+        say "yes"
+""")
+        self.assertEqual(output, "weekend\nweekend\nmidweek\nmidweek\nweekday\nweekday\nletter\nyes\n")
+
+    def test_match_errors(self):
+        output = run_source('match 1\n    when x\n        say "no"\n')
+        self.assertEqual(output, "Error: 'when' values at line 2 must be numbers, quoted text, true/false or null, got 'x'\n")
+        output = run_source('match 1\n    otherwise\n        say "no"\n    when 1\n        say "no"\n')
+        self.assertEqual(output, "Error: 'when' at line 4 comes after 'otherwise'\n")
+        output = run_source('when 1\n    say "no"\nsay "after"\n')
+        self.assertEqual(output, "Unexpected 'when' at line 1 - cases belong inside a 'match' block\nafter\n")
+
+    def test_ladders_pick_the_same_branch(self):
+        from modules import dispatch
+
+        with mock.patch.object(dispatch, "MIN_CASES", 99):
+            plain = run_source(self.LADDERS)
+        self.assertEqual(run_source(self.LADDERS), plain)
+        self.assertIn("F mid other\nF high other\nF None other\nF low other\nF low tue\nF low wed\nF low tue\n", plain)
+
+    def test_ladder_detection(self):
+        from modules import dispatch
+
+        program = ZENOLangInterpreter.compile(self.LADDERS.strip("\n").splitlines(keepends=True))
+        grade, band, name = (stmt.body[0] for stmt in program[:3])
+        self.assertEqual(dispatch.ladder(grade).thresholds, [70, 80, 90])
+        self.assertEqual(dispatch.ladder(band).op, "atmost")
+        self.assertIsNone(dispatch.ladder(name), "mixes 'is' and 'equals'")
+        fizz = ZENOLangInterpreter.compile([
+            "if (i mod 15) is 0 then\n", "    say 1\n", "else\n", "    if (i mod 3) is 0 then\n",
+            "        say 2\n", "    else\n", "        if (i mod 5) is 0 then\n", "            say 3\n"])
+        self.assertIsNone(dispatch.ladder(fizz[0]))
+        unsorted = ZENOLangInterpreter.compile([
+            "if x greater 1 then\n", "    say 1\n", "else\n", "    if x greater 5 then\n",
+            "        say 2\n", "    else\n", "        if x greater 0 then\n", "            say 3\n"])
+        self.assertIsNone(dispatch.ladder(unsorted[0]))
+
+    def test_redefined_operator_runs_conditions(self):
+        interpreter = ZENOLangInterpreter(stdout=io.StringIO())
+        interpreter.evaluator.add_operator("greater", lambda x, y: x < y)
+        interpreter.run(self.LADDERS.strip("\n").splitlines(keepends=True)[:11] +
+                        ["let g be call grade with 65\n", "say g\n"])
+        self.assertEqual(interpreter.runtime.stdout.getvalue(), "A\n")
+
+    def test_check(self):
+        from modules import analysis
+
+        program = ZENOLangInterpreter.compile("""
+match day
+    when 1
+        let kind be "a"
+    say "stray"
+    otherwise
+        let kind be "b"
+say kind
+when 2
+    say "x"
+""".strip("\n").splitlines(keepends=True))
+        self.assertEqual([(d.lineno, d.message) for d in analysis.check(program)], [
+            (1, "'day' is not defined"),
+            (4, "Only 'when' and 'otherwise' cases can go in a 'match' block"),
+            (8, "'when' outside a 'match' block"),
+        ])
+
+
+class TestAnalysis(unittest.TestCase):
+    """zeno --check finds mistakes without running the script"""
+
+    def check(self, source):
+        from modules import analysis
+        from modules.interpreter import create_evaluator
+
+        program = ZENOLangInterpreter.compile(source.strip("\n").splitlines(keepends=True))
+        evaluator = create_evaluator().evaluator
+        return [(d.lineno, d.severity, d.message)
+                for d in analysis.check(program, evaluator.operators, evaluator.phrases)]
+
+    def test_reports_problems(self):
+        diagnostics = self.check("""
+let name be "Ann"
+let n be 3
+say total
+let x be name minus 1
+if n less 5 then
+    let y be 1
+say y
+define add_two with a, b
+    return a plus b
+let r be call add_two with 1
+call nothing
+frobnicate x
+""")
+        self.assertEqual(diagnostics, [
+            (3, "error", "'total' is not defined"),
+            (4, "warning", "'minus' can't be applied to str and int in 'name minus 1'"),
+            (7, "warning", "'y' may not be set yet"),
+            (10, "error", "Function 'add_two' expects 2 arguments, got 1"),
+            (11, "error", "Function 'nothing' is not defined"),
+            (12, "error", "Unknown command: frobnicate x"),
+        ])
+
+    def test_clean_script(self):
+        self.assertEqual(self.check("""
+ask n
+let total be 0
+let words be ["a", "b"]
+repeat counting i from 1 to n
+    let total be total plus i
+repeat each w in words
+    say w + "!"
+say count of "a" in words
+if total greater 10 and n is 5 then
+    say "big"
+else
+    let total be 0
+define scale with v
+    return v times factor
+let factor be 2
+let s be call scale with total
+say s + " " + upper "done"
+"""), [])
+
+    def test_infers_types(self):
+        from modules import analysis
+
+        program = ZENOLangInterpreter.compile("""
+let a be 1
+let b be a times 2.5
+let c be "x" + a
+let d be a less b
+repeat counting i from 1 to 3
+    let e be i
+define half with v
+    return v divided_by 2
+define greet
+    return "hi"
+let g be call greet
+""".strip("\n").splitlines(keepends=True))
+        result = analysis.Analysis(program)
+        self.assertEqual(result.run(), [])
+        self.assertEqual({name: result.types[name] for name in "abcdg"},
+                         {"a": "int", "b": "float", "c": "str", "d": "bool", "g": "str"})
+        self.assertEqual(result.functions["half"], [["v"], None])
+        # Set only inside a loop that may not run
+        self.assertNotIn("e", result.types)
+
+    def test_csv_fields_and_tasks(self):
+        self.assertEqual(self.check("""
+load csv "grades.csv" into marks
+length of marks.score
+repeat each row in csv "grades.csv"
+    say row.name
+define work with v
+    return v
+spawn call work with 1 as job
+wait for job into result
+say result
+"""), [])
+
+
+class TestModules(unittest.TestCase):
+    """use "<file>" shares compiled functions between scripts and runs"""
+
+    def setUp(self):
+        from modules import use
+
+        self.use = use
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.addCleanup(use._modules.clear)
+        use._modules.clear()
+        self.write("lib/base.znl", """
+define times_of with a, b
+    return a times b
+""")
+        self.write("lib/math.znl", """
+use "base.znl"
+
+define square with x
+    let s be call times_of with x, x
+    return s
+""")
+        self.main = f'use "{os.path.join(self.dir.name, "lib", "math.znl")}"\n'
+
+    def write(self, name, source):
+        path = os.path.join(self.dir.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(source.lstrip("\n"))
+        return path
+
+    def test_functions_are_registered(self):
+        output = run_source(self.main + "let y be call square with 7\nsay y\nlet z be call times_of with 2, 3\nsay z")
+        self.assertEqual(output, "49\n6\n")
+
+    def test_compiled_once_per_process(self):
+        with mock.patch.object(self.use, "compile_module", wraps=self.use.compile_module) as compile_module:
+            for _ in range(3):
+                self.assertEqual(run_source(self.main + "let r be call square with 2\nsay r"), "4\n")
+        # math.znl and base.znl, once each
+        self.assertEqual(compile_module.call_count, 2)
+
+    def test_disk_cache(self):
+        run_source(self.main)
+        self.assertTrue(os.path.exists(os.path.join(self.dir.name, "lib", "__zenocache__", "math.znl.pickle")))
+        self.use._modules.clear()
+        with mock.patch.object(self.use, "compile_module") as compile_module:
+            self.assertEqual(run_source(self.main + "let r be call square with 3\nsay r"), "9\n")
+        compile_module.assert_not_called()
+
+    def test_changed_module_is_recompiled(self):
+        run_source(self.main)
+        path = self.write("lib/base.znl", """
+define times_of with a, b
+    return a plus b
+""")
+        stat = os.stat(path)
+        # Make sure the stamp changes even on coarse filesystem clocks
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertEqual(run_source(self.main + "let r be call square with 3\nsay r"), "6\n")
+
+    def test_errors(self):
+        bad = self.write("bad.znl", 'say "side effect"\n')
+        self.assertEqual(run_source(f'use "{bad}"'),
+                         "Error: Module 'bad.znl' line 1: modules can only define functions and use other modules\n")
+        missing = os.path.join(self.dir.name, "missing.znl")
+        self.assertEqual(run_source(f'use "{missing}"'), f"Error: Module '{os.path.realpath(missing)}' not found\n")
+        self.assertIn("Invalid syntax in 'use'", run_source("use mathlib"))
+
+    def test_check_sees_module_functions(self):
+        from modules import analysis
+
+        program = ZENOLangInterpreter.compile((self.main + "let r be call square with 3, 4\n").splitlines(keepends=True))
+        self.assertEqual([d.message for d in analysis.check(program)],
+                         ["Function 'square' expects 1 arguments, got 2"])
+
+
+def _run_one_or_die(task):
+    """Batch worker stand-in: scripts named *die.znl kill their worker process"""
+    if task[0].endswith("die.znl"):
+        os._exit(1)
+    return _real_run_one(task)
+
+
+class TestBatch(unittest.TestCase):
+    """zeno run-batch: one result line per script, in script order"""
+
+    def test_run_batch(self):
+        from modules import batch
+
+        scripts = {
+            "a_ok.znl": 'ask name\nsay "hi " + name\n',
+            "b_errors.znl": "call missing_function\n",
+            "c_timeout.znl": "let x be 1\nwhile x greater 0 then\n    let x be x + 1\n",
+            "d_limit.znl": "define down with n\n    let m be call down with n\n    return m\ncall down with 0\n",
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            for name, source in scripts.items():
+                with open(os.path.join(directory, name), "w") as f:
+                    f.write(source)
+            with open(os.path.join(directory, "a_ok.in"), "w") as f:
+                f.write("ada\n")
+            output = os.path.join(directory, "results.jsonl")
+
+            batch.run_batch(directory, jobs=2, timeout=0.5, output=output, limits={"max_depth": 20})
+            with open(output) as f:
+                results = [json.loads(line) for line in f]
+
+        self.assertEqual([os.path.basename(r["script"]) for r in results], sorted(scripts))
+        self.assertEqual([r["status"] for r in results],
+                         [batch.STATUS_OK, batch.STATUS_ERRORS, batch.STATUS_TIMEOUT, batch.STATUS_LIMIT])
+        self.assertEqual(results[0]["stdout"], ">> hi ada\n")
+
+    def test_dead_worker_fails_only_its_script(self):
+        from modules import batch
+
+        with tempfile.TemporaryDirectory() as directory:
+            for n in range(6):
+                with open(os.path.join(directory, f"s{n}.znl"), "w") as f:
+                    f.write(f"say {n}\n")
+            with open(os.path.join(directory, "s3die.znl"), "w") as f:
+                f.write("say 3\n")
+            output = os.path.join(directory, "results.jsonl")
+
+            # Workers are forked, so they inherit the patched run_one
+            with mock.patch.object(batch, "run_one", _run_one_or_die):
+                results = batch.run_batch(directory, jobs=2, output=output)
+            with open(output) as f:
+                written = [json.loads(line) for line in f]
+
+        self.assertEqual(written, results)
+        self.assertEqual([(os.path.basename(r["script"]), r["status"]) for r in results], [
+            ("s0.znl", 0), ("s1.znl", 0), ("s2.znl", 0), ("s3.znl", 0),
+            ("s3die.znl", batch.STATUS_CRASHED), ("s4.znl", 0), ("s5.znl", 0),
+        ])
+        self.assertEqual(results[5]["stdout"], "4\n")
+
+
+class TestServer(unittest.TestCase):
+    """zeno serve: HTTP on localhost, executed by the worker pool"""
+
+    async def _request(self, port, method, path, body=None):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        payload = json.dumps(body).encode() if body is not None else b""
+        writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(payload)}\r\n\r\n".encode() + payload)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), 30)
+        writer.close()
+        head, _, body = response.partition(b"\r\n\r\n")
+        return int(head.split()[1]), json.loads(body)
+
+    async def _exercise(self):
+        from modules import server
+
+        service = server.ExecutionService(workers=1)
+        listener = await service.start(port=0)
+        port = listener.sockets[0].getsockname()[1]
+        try:
+            source = 'ask name\nsay "hello " + name\n'
+            first = await self._request(port, "POST", "/run", {"source": source, "input": "ada\n"})
+            second = await self._request(port, "POST", "/run", {"source": source, "input": "bob\n"})
+            missing = await self._request(port, "POST", "/run", {"input": ""})
+            unknown = await self._request(port, "GET", "/nowhere")
+        finally:
+            listener.close()
+            await listener.wait_closed()
+            service.close()
+        return first, second, missing, unknown
+
+    def test_run_requests(self):
+        first, second, missing, unknown = asyncio.run(self._exercise())
+
+        self.assertEqual(first, (200, {"status": 0, "errors": 0, "stdout": ">> hello ada\n",
+                                       "wall_seconds": first[1]["wall_seconds"]}))
+        self.assertEqual(second[1]["stdout"], ">> hello bob\n")
+        self.assertEqual(missing[0], 400)
+        self.assertEqual(unknown[0], 404)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
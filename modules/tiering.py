@@ -0,0 +1,288 @@
+"""
+Tiered execution
+
+Cold code runs on the tree-walking path (runner.execute_block and the
+evaluator). Each loop counts the iterations of its body, and each
+function counts its calls. Once a count reaches the threshold, the body
+is compiled into Python closures:
+
+- 'let', 'say', 'if' and 'match' become closures with their expressions
+  already parsed; other statements still call their handlers. Ladders and
+  'match' keep their dispatch tables (see dispatch.py)
+- simple expressions ('x', 'x plus 1', 'i less n') become inline-cached
+  sites (evaluator.sites), which read operands straight from the
+  variables and dispatch on their types behind a guard
+- anything else goes to the evaluator as before
+
+Each failed type guard counts against the compiled body. Once it has
+seen DEOPT_MISSES of them, its operand types keep changing, so it is
+dropped. The loop or function then goes back to the tree-walking path.
+It is compiled again, with fresh sites, after BACKOFF more iterations.
+
+Compiled code is bound to one evaluator and its operator table. It is
+skipped while hooks are active, so tracing sees every statement.
+"""
+
+from .evaluator import sites
+from .exception_case import BreakLoop, ReturnValue
+
+ENABLED = True
+# Loop iterations (over all runs of the loop) / function calls before compiling
+HOT_ITERATIONS = 32
+HOT_CALLS = 32
+# Failed type guards before a compiled body is dropped
+DEOPT_MISSES = 16
+# Extra iterations / calls before a dropped body is compiled again
+BACKOFF = 1024
+
+
+def enabled(rt):
+    """Compiled code may run (tracing needs the tree-walking path)"""
+    return ENABLED and (rt._hooks is None or not rt._hooks.active)
+
+
+# ─────────────────────────────
+# Expression sites
+
+def compile_site(expression, unit):
+    """A function(variables) returning what evaluator.evaluate(expression, variables) would"""
+    site = sites.compile_site(expression, unit.operators, unit.miss)
+    if site is None:
+        evaluate = unit.evaluator.evaluate
+        return lambda variables: evaluate(expression, variables)
+
+    def checked_site(variables):
+        try:
+            return site(variables)
+        except Exception as e:
+            return f"[Error: {e}]"
+    return checked_site
+
+
+# ─────────────────────────────
+# Compiled blocks
+
+class Unit:
+    """The compiled form of one loop or function body, for one evaluator"""
+
+    def __init__(self, block, evaluator, drop):
+        self.evaluator = evaluator
+        self.operators = evaluator.evaluator.operators
+        self.operators_version = evaluator.evaluator.operators_version
+        self.sites = {}
+        self.misses = 0
+        self.valid = True
+        self._drop = drop
+        self.run = compile_block(block, self)
+
+    def usable(self, rt):
+        return (self.valid and rt.evaluator is self.evaluator and enabled(rt)
+                and self.evaluator.evaluator.operators_version == self.operators_version)
+
+    def miss(self):
+        """A type guard failed; too many and the compiled body is dropped"""
+        self.misses += 1
+        if self.misses >= DEOPT_MISSES and self.valid:
+            self.valid = False
+            self._drop()
+
+    def site(self, expression):
+        """The compiled site for expression (one per expression string in the unit)"""
+        site = self.sites.get(expression)
+        if site is None:
+            site = self.sites[expression] = compile_site(expression, self)
+        return site
+
+    def evaluate(self, expression, variables):
+        """evaluator.evaluate through this unit's sites (used for conditions)"""
+        site = self.sites.get(expression)
+        if site is None:
+            site = self.site(expression)
+        return site(variables)
+
+
+def compile_block(block, unit):
+    """A function(variables, rt) with runner.execute_block's semantics for block"""
+    steps = [compile_statement(stmt, unit) for stmt in block]
+    count = len(block)
+
+    def run(variables, rt):
+        rt.steps += count
+        if rt.steps >= rt.next_check:
+            rt.limits.checkpoint(rt)
+        try:
+            for step in steps:
+                step(variables, rt)
+        except (BreakLoop, ReturnValue):
+            raise
+        except Exception as e:
+            rt.errors += 1
+            print(f"Error: {e}", file=rt.stdout)
+    return run
+
+
+def compile_statement(stmt, unit):
+    from . import dispatch, if_else, let, say
+
+    compiler = {let.execute: _compile_let, say.execute: _compile_say, if_else.execute: _compile_if,
+                dispatch.execute_match: _compile_match}.get(stmt.handler)
+    step = compiler(stmt, unit) if compiler is not None else None
+    if step is not None:
+        return step
+
+    handler, arg = stmt.handler, stmt.arg
+    return lambda variables, rt: handler(arg, variables, rt)
+
+
+def _compile_let(stmt, unit):
+    # Mirrors let.execute for plain expressions; other forms keep the handler
+    parts = stmt.text[4:].split(" be ")
+    if len(parts) != 2:
+        return None
+    name, value_str = parts[0].strip(), parts[1].strip()
+    if value_str == '""' or value_str.startswith('call ') or (value_str.startswith("[") and value_str.endswith("]")):
+        return None
+    site = unit.site(value_str)
+
+    def step(variables, rt):
+        value = site(variables)
+        if rt.max_size is not None:
+            from .limits import check_size
+            check_size(rt, name, value)
+        variables[name] = value
+    return step
+
+
+def _compile_say(stmt, unit):
+    # Mirrors say.execute
+    parts = stmt.text.split(" ", 1)
+    if len(parts) != 2:
+        return None
+    pieces = []
+    for fragment in (fragment.strip() for fragment in parts[1].strip().split('+')):
+        if fragment.startswith('"') and fragment.endswith('"'):
+            text = fragment[1:-1]
+            pieces.append(lambda variables, text=text: text)
+        else:
+            pieces.append(unit.site(fragment))
+
+    def step(variables, rt):
+        print("".join([str(piece(variables)) for piece in pieces]), file=rt.stdout)
+    return step
+
+
+def _compile_if(stmt, unit):
+    from . import dispatch, if_else
+
+    try:
+        condition = if_else.compile_header(stmt.text)
+    except SyntaxError:
+        return None
+    body = compile_block(stmt.body, unit) if stmt.body else None
+    orelse = compile_block(stmt.orelse, unit) if stmt.orelse else None
+    evaluate = unit.evaluate
+
+    def step(variables, rt):
+        if condition(variables, evaluate):
+            if body is not None:
+                body(variables, rt)
+        elif orelse is not None:
+            orelse(variables, rt)
+
+    ladder = dispatch.ladder(stmt)
+    if ladder is None:
+        return step
+    blocks = [compile_block(block, unit) if block else None for block in ladder.blocks]
+
+    def ladder_step(variables, rt):
+        case = ladder.select(variables, rt)
+        if case is None:
+            step(variables, rt)
+        elif blocks[case] is not None:
+            blocks[case](variables, rt)
+    return ladder_step
+
+
+def _compile_match(stmt, unit):
+    from . import dispatch
+
+    try:
+        table = dispatch.match_table(stmt)
+    except SyntaxError:
+        return None
+    subject = unit.site(table.subject)
+    blocks = [compile_block(block, unit) if block else None for block in table.blocks]
+
+    def step(variables, rt):
+        block = blocks[table.select(subject(variables))]
+        if block is not None:
+            block(variables, rt)
+    return step
+
+
+# ─────────────────────────────
+# Tier-up points
+
+class Loop:
+    """
+    Runs one loop statement's body: tree-walking until the loop is hot, then
+    compiled. evaluate is the expression evaluator for the loop header
+    """
+
+    def __init__(self, stmt, rt):
+        self.stmt = stmt
+        self.rt = rt
+        self.unit = None
+        self.evaluate = rt.evaluate
+        unit = stmt.compiled
+        if unit is not None and unit.usable(rt):
+            self._use(unit)
+
+    def _use(self, unit):
+        self.unit = unit
+        self.evaluate = unit.evaluate
+
+    def run(self, variables):
+        unit = self.unit
+        if unit is not None:
+            if unit.valid:
+                unit.run(variables, self.rt)
+                return
+            self.unit = None
+            self.evaluate = self.rt.evaluate
+
+        stmt, rt = self.stmt, self.rt
+        stmt.hits += 1
+        if stmt.hits >= HOT_ITERATIONS and enabled(rt):
+            stmt.hits = 0
+            stmt.compiled = Unit(stmt.body, rt.evaluator, lambda: _drop_statement(stmt))
+            self._use(stmt.compiled)
+            stmt.compiled.run(variables, rt)
+            return
+        rt.execute_block(stmt.body, variables, rt)
+
+
+def _drop_statement(stmt):
+    stmt.compiled = None
+    stmt.hits = -BACKOFF
+
+
+def run_function(func_def, variables, rt):
+    """Run a function body: tree-walking until the function is hot, then compiled"""
+    unit = func_def.get("compiled")
+    if unit is not None and unit.usable(rt):
+        unit.run(variables, rt)
+        return
+
+    calls = func_def["calls"] = func_def.get("calls", 0) + 1
+    if calls >= HOT_CALLS and enabled(rt):
+        func_def["calls"] = 0
+        unit = func_def["compiled"] = Unit(func_def["body"], rt.evaluator, lambda: _drop_function(func_def))
+        unit.run(variables, rt)
+        return
+    rt.execute_block(func_def["body"], variables, rt)
+
+
+def _drop_function(func_def):
+    func_def["compiled"] = None
+    func_def["calls"] = -BACKOFF
@@ -0,0 +1,156 @@
+"""
+Modules
+
+    use "mathlib.znl"
+
+Registers the functions a module file defines, as if its 'define' blocks
+had been written in the script. A module contains only 'define' blocks
+and 'use' lines of its own. Paths are relative to the working directory,
+or to the using module's directory for a 'use' inside a module.
+
+Each module file is compiled once per process. Later 'use' lines, from
+any interpreter, share the compiled functions until the file changes.
+The compiled form is also written to a __zenocache__ directory next to
+the module, so later runs skip parsing too. Like a .pyc file, a cache
+file is only used while the source's modification time and size match
+the ones it was compiled from.
+"""
+
+import os
+import pickle
+import re
+import threading
+
+from . import function_handler, runner
+
+CACHE_DIR = "__zenocache__"
+# Bumped whenever the compiled form (runner.Statement) changes
+CACHE_FORMAT = 1
+
+# Real path -> Module, shared by every interpreter in the process
+_modules = {}
+_lock = threading.Lock()
+
+
+class Module:
+    """A compiled module file"""
+
+    def __init__(self, path, stamp, functions, uses):
+        self.path = path
+        self.stamp = stamp
+        # name -> (params, compiled body)
+        self.functions = functions
+        # Real paths of the modules this one uses
+        self.uses = uses
+
+
+def parse_path(line):
+    """The file name in a 'use "<file>"' line"""
+    match = re.match(r'use\s+"([^"]+)"$', line.strip())
+    if not match:
+        raise SyntaxError('Invalid syntax in \'use\' command (expected: use "<file.znl>")')
+    return match[1]
+
+
+def compile_module(path, lines):
+    """Compile module source; returns (functions, real paths of used modules)"""
+    functions = {}
+    uses = []
+    for stmt in runner.compile_block(lines):
+        keyword = runner.keyword_of(stmt.text)
+        if keyword == 'define':
+            name, params = function_handler.parse_function_definition(stmt.text)
+            functions[name] = (params, stmt.body or [])
+        elif keyword == 'use':
+            uses.append(os.path.realpath(os.path.join(os.path.dirname(path), parse_path(stmt.text))))
+        else:
+            raise SyntaxError(f"Module '{os.path.basename(path)}' line {stmt.lineno}: "
+                              f"modules can only define functions and use other modules")
+    return functions, uses
+
+
+def cache_path(path):
+    directory, name = os.path.split(path)
+    return os.path.join(directory, CACHE_DIR, name + ".pickle")
+
+
+def _read_cache(path, stamp):
+    try:
+        with open(cache_path(path), 'rb') as f:
+            cache_format, cached_stamp, functions, uses = pickle.load(f)
+    except Exception:
+        # Missing, unreadable or from an older interpreter: compile instead
+        return None
+    if cache_format != CACHE_FORMAT or cached_stamp != stamp:
+        return None
+    return functions, uses
+
+
+def _write_cache(path, stamp, functions, uses):
+    target = cache_path(path)
+    temp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(temp, 'wb') as f:
+            pickle.dump((CACHE_FORMAT, stamp, functions, uses), f, protocol=pickle.HIGHEST_PROTOCOL)
+        # Readers never see a half-written file
+        os.replace(temp, target)
+    except (OSError, pickle.PicklingError, AttributeError, TypeError):
+        # Read-only directory or a handler that can't be pickled: just don't cache
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+
+
+def load_module(path):
+    """The compiled Module for a file: from memory, the disk cache, or its source"""
+    path = os.path.realpath(path)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Module '{path}' not found") from None
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        module = _modules.get(path)
+    if module is not None and module.stamp == stamp:
+        return module
+
+    cached = _read_cache(path, stamp)
+    if cached is None:
+        with open(path) as f:
+            lines = f.readlines()
+        cached = compile_module(path, lines)
+        _write_cache(path, stamp, *cached)
+    module = Module(path, stamp, *cached)
+    with _lock:
+        _modules[path] = module
+    return module
+
+
+def functions_of(path):
+    """Every function a module makes available, including those of modules it uses"""
+    functions = {}
+    seen = set()
+
+    def visit(module_path):
+        module = load_module(module_path)
+        if module.path in seen:
+            # Shared or circular uses are loaded once
+            return
+        seen.add(module.path)
+        for used in module.uses:
+            visit(used)
+        functions.update(module.functions)
+
+    visit(path)
+    return functions
+
+
+def execute(line, variables, rt):
+    """
+    Handle use statement
+    Syntax: use "<file.znl>"
+    """
+    for name, (params, body) in functions_of(parse_path(line)).items():
+        function_handler.register_function(name, params, body, rt)
@@ -0,0 +1,139 @@
+"""
+Watch mode
+
+    zeno --watch script.znl
+
+Keeps one warm interpreter and re-runs the script whenever it changes on
+disk. The script is split into top-level chunks (a statement with its
+indented block); chunks whose text is unchanged since the last run reuse
+their compiled statements, so only edited statements and function bodies
+are parsed again.
+"""
+
+import os
+import time
+
+from . import runner
+from .interpreter import ZENOLangInterpreter
+
+POLL_SECONDS = 0.25
+
+
+def split_chunks(lines):
+    """
+    Split source lines into top-level chunks
+    Returns: list of (first_lineno, lines); blank and comment lines between
+    chunks are dropped, so a chunk's text changes only when its code does
+    """
+    chunks = []
+    current = None
+    last_code = 0
+    for offset, line in enumerate(lines):
+        stripped = line.strip()
+        if runner.is_blank_or_comment(stripped):
+            continue
+        # An 'else' at the top level still belongs to the 'if' above it
+        if current is None or (runner.get_indent_level(line) == 0 and stripped != 'else'):
+            if current is not None:
+                chunks.append((current, lines[current - 1:last_code + 1]))
+            current = offset + 1
+        last_code = offset
+    if current is not None:
+        chunks.append((current, lines[current - 1:last_code + 1]))
+    return chunks
+
+
+def _renumber(block, delta):
+    for stmt in block:
+        stmt.lineno += delta
+        if stmt.body:
+            _renumber(stmt.body, delta)
+        if stmt.orelse:
+            _renumber(stmt.orelse, delta)
+
+
+class IncrementalCompiler:
+    """Compiles successive versions of one script, reusing unchanged chunks"""
+
+    def __init__(self):
+        # chunk text -> (first_lineno, compiled statements)
+        self.chunks = {}
+        self.reused = 0
+        self.compiled = 0
+
+    def compile(self, lines):
+        """Compile a version of the script; returns the program for run_compiled()"""
+        program = []
+        chunks = {}
+        self.reused = self.compiled = 0
+        for first_lineno, chunk_lines in split_chunks(lines):
+            key = "".join(chunk_lines)
+            cached = self.chunks.get(key)
+            if cached is not None and key not in chunks:
+                lineno, statements = cached
+                if lineno != first_lineno:
+                    _renumber(statements, first_lineno - lineno)
+                self.reused += 1
+            else:
+                # A chunk repeated in the same version gets its own statements
+                statements = runner.compile_block(chunk_lines, first_lineno)
+                self.compiled += 1
+            chunks.setdefault(key, (first_lineno, statements))
+            program.extend(statements)
+        # Only the latest version is kept
+        self.chunks = chunks
+        return program
+
+
+class Watcher:
+    """Re-runs a script in a warm interpreter each time the file changes"""
+
+    def __init__(self, path, interpreter=None):
+        self.path = path
+        self.interpreter = interpreter if interpreter is not None else ZENOLangInterpreter()
+        self.compiler = IncrementalCompiler()
+        self._stamp = None
+
+    def changed(self):
+        """True when the file differs from the version last run"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            # Editors may replace the file on save; try again on the next poll
+            return False
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        return True
+
+    def run_once(self):
+        """Compile the current file and run it in a fresh session"""
+        with open(self.path) as f:
+            lines = f.readlines()
+        program = self.compiler.compile(lines)
+        self.interpreter.reset()
+        self.interpreter.run_compiled(program)
+
+    def watch(self, poll_seconds=POLL_SECONDS):
+        """Run now and after every change, until interrupted"""
+        while True:
+            if self.changed():
+                try:
+                    self.run_once()
+                except OSError as e:
+                    print(f"Error: {e}")
+                except KeyboardInterrupt:
+                    print("\nKeyboardInterrupt")
+                compiler = self.compiler
+                print(f"--- {self.path}: {compiler.compiled} chunks compiled, {compiler.reused} reused; "
+                      f"waiting for changes (Ctrl-C to stop) ---")
+            time.sleep(poll_seconds)
+
+
+def main(path):
+    try:
+        Watcher(path).watch()
+    except KeyboardInterrupt:
+        pass
+    return 0
@@ -1,7 +1,17 @@
-from . import runner, condition_checker
+from functools import lru_cache
+from . import condition_checker
+from .evaluator.context import get_evaluator
+from . import tiering
+from .exception_case import BreakLoop
 # from commands.operators import operators
 
 def evaluate(line, variables):
+    # Compiled once per distinct 'while' line, so each iteration only runs the predicate
+    return compile_header(line)(variables, get_evaluator().evaluate)
+
+
+@lru_cache(maxsize=1024)
+def compile_header(line):
     # Basic syntax check
     if not line.startswith("while ") or " then" not in line:
         raise SyntaxError("Invalid syntax in 'while' command - missing 'then'")
@@ -9,15 +19,19 @@ def evaluate(line, variables):
     # Extract condition part between "while" and "then"
     condition_part = line.strip()[6:].split(" then")[0].strip()
 
-    # if condition_checker.check_condition(condition_part, variables) is None:
-    #     print(f"Invalid condition: {condition_part}")
-    # elif condition_checker.check_condition(condition_part, variables) is False:
-    #     print(f"Condition evaluated to False: {condition_part}")
-    # elif condition_checker.check_condition(condition_part, variables) is True:
-    #     print(f"Condition evaluated to True: {condition_part}")
-
     # Pass condition to the condition checker
-    return condition_checker.check_condition(condition_part, variables)
+    return condition_checker.compile_condition(condition_part)
+
+
+def execute(stmt, variables, rt):
+    # Block handler: run stmt.body until the condition fails or 'stop' is hit
+    condition = compile_header(stmt.text)
+    loop = tiering.Loop(stmt, rt)
+    while condition(variables, loop.evaluate):
+        try:
+            loop.run(variables)
+        except BreakLoop:
+            break
 
 
 